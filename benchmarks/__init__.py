@@ -0,0 +1,6 @@
+"""Furniture Creator benchmarks.
+
+Generates reproducible synthetic workloads (see benchmarks.workload) and
+measures throughput, latency and peak memory of the furniture creator on
+them (see benchmarks.measure). Run with: python -m benchmarks --help
+"""
@@ -0,0 +1,176 @@
+"""Furniture Creator benchmarks command line."""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence
+import argparse
+import dataclasses
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.workload import Workload, MIXES, FILLERS, write_workload
+from benchmarks.measure import BENCHMARKS, ROOT, STARTUP_BUDGET_MS, \
+    measure_startup, over_startup_budget, run_isolated
+
+PRESETS: Dict[str, Dict[str, List[Any]]] = {
+    'quick': {
+        'designs': [10, 1000],
+        'parts': [10_000, 100_000],
+        'mix': ['uniform', 'skewed'],
+        'filler': ['normal', 'high'],
+    },
+    'full': {
+        'designs': [10, 1000, 100_000],
+        'parts': [10_000, 1_000_000, 100_000_000],
+        'mix': list(MIXES),
+        'filler': list(FILLERS),
+    },
+}
+
+
+def current_commit() -> str:
+    """Return current git commit hash, or empty string outside git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def workloads_for(arguments: argparse.Namespace) -> List[Workload]:
+    """Return workloads for every combination of chosen parameters."""
+    preset = PRESETS[arguments.preset]
+    return [
+        Workload(designs, parts, mix, filler, arguments.seed)
+        for designs, parts, mix, filler in itertools.product(
+            arguments.designs or preset['designs'],
+            arguments.parts or preset['parts'],
+            arguments.mix or preset['mix'],
+            arguments.filler or preset['filler'],
+        )
+    ]
+
+
+def run(arguments: argparse.Namespace) -> Dict[str, Any]:
+    """Run chosen benchmarks on all workloads and return the report."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for workload in workloads_for(arguments):
+            path = os.path.join(directory, workload.name + '.txt')
+            write_workload(workload, path)
+            for name in arguments.benchmark or list(BENCHMARKS):
+                function_args: List[Any] = [workload]
+                if name == 'furniture_creator_main':
+                    function_args.append(path)
+                result = run_isolated(BENCHMARKS[name], *function_args)
+                print(f'{workload.name} {name}: {result["seconds"]:.3f}s',
+                      file=sys.stderr)
+                results.append({
+                    'benchmark': name,
+                    'workload': dataclasses.asdict(workload),
+                    **result,
+                })
+            os.remove(path)
+    return {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now(
+            datetime.timezone.utc).isoformat(),
+        'results': results,
+    }
+
+
+def write_report(report: Dict[str, Any], output: str) -> None:
+    """Write report as JSON to output path, '-' for STDOUT."""
+    text = json.dumps(report, indent=2)
+    if output == '-':
+        print(text)
+    else:
+        with open(output, 'w') as file:
+            file.write(text + '\n')
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Generate synthetic workloads and benchmark the '
+                    'furniture creator on them.'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='write a workload file')
+    generate.add_argument('path', help='file to write the workload to')
+    generate.add_argument('--designs', type=int, default=100)
+    generate.add_argument('--parts', type=int, default=100_000)
+    generate.add_argument('--mix', choices=MIXES, default='uniform')
+    generate.add_argument('--filler', choices=FILLERS, default='normal')
+    generate.add_argument('--seed', type=int, default=1)
+
+    measure = commands.add_parser('run', help='run benchmarks')
+    measure.add_argument('--preset', choices=list(PRESETS), default='quick',
+                         help='workload matrix to use (default: quick)')
+    measure.add_argument('--designs', type=int, nargs='+',
+                         help='design catalog sizes, overrides preset')
+    measure.add_argument('--parts', type=int, nargs='+',
+                         help='part stream lengths, overrides preset')
+    measure.add_argument('--mix', choices=MIXES, nargs='+',
+                         help='part mixes, overrides preset')
+    measure.add_argument('--filler', choices=FILLERS, nargs='+',
+                         help='design filler amounts, overrides preset')
+    measure.add_argument('--benchmark', choices=list(BENCHMARKS), nargs='+',
+                         help='benchmarks to run (default: all)')
+    measure.add_argument('--seed', type=int, default=1)
+    measure.add_argument('--output', default='-', metavar='PATH',
+                         help='JSON results file (default: STDOUT)')
+
+    startup = commands.add_parser(
+        'startup', help='measure startup time against its budget')
+    startup.add_argument('--input', metavar='PATH',
+                         default=os.path.join(ROOT, 'samples', 'short1.txt'),
+                         help='input to create the first product from '
+                              '(default: samples/short1.txt)')
+    startup.add_argument('--runs', type=int, default=20,
+                         help='runs to take the median of (default: 20)')
+    startup.add_argument('--output', default='-', metavar='PATH',
+                         help='JSON results file (default: STDOUT)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> None:
+    """Run benchmarks command."""
+    arguments = parse_arguments(argv)
+    if arguments.command == 'generate':
+        write_workload(Workload(arguments.designs, arguments.parts,
+                                arguments.mix, arguments.filler,
+                                arguments.seed), arguments.path)
+        return
+
+    if arguments.command == 'startup':
+        result = measure_startup(arguments.input, arguments.runs)
+        write_report({
+            'commit': current_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'budget_ms': STARTUP_BUDGET_MS,
+            'startup': result,
+        }, arguments.output)
+        if over := over_startup_budget(result):
+            sys.exit('Startup over budget: ' + ', '.join(
+                f'{name} {result[name]:.1f} > {STARTUP_BUDGET_MS[name]:.1f}'
+                for name in over))
+        return
+
+    write_report(run(arguments), arguments.output)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,269 @@
+"""Measurements of furniture creator stages on synthetic workloads."""
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+import compileall
+import io
+import os
+import random
+import resource
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from furniturecreator import FurnitureCreator
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.product_manager import ProductManager
+from furniturecreator.output_writer import OutputWriter
+from benchmarks.workload import Workload, generate_designs, generate_parts
+
+# Stage benchmarks keep all part lines in memory, so they are limited to
+# this many parts; the end to end benchmark streams the full workload.
+STAGE_PARTS_LIMIT = 1_000_000
+LATENCY_SAMPLE_EVERY = 64
+# Startup budget in milliseconds on top of starting a bare interpreter:
+# importing the package and running the command line until its first
+# product on a short input.
+STARTUP_BUDGET_MS = {'import_ms': 15.0, 'first_product_ms': 20.0}
+# Seconds to wait for the first product before closing the input.
+FIRST_LINE_TIMEOUT = 2.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Result = Dict[str, Any]
+
+
+def percentile(values: List[int], fraction: float) -> int:
+    """Return the value at fraction (0-1) of the sorted values."""
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def latency_summary(samples: List[int]) -> Result:
+    """Return p50, p99 and maximum of latency samples in nanoseconds."""
+    return {
+        'latency_samples': len(samples),
+        'latency_p50_ns': percentile(samples, 0.5),
+        'latency_p99_ns': percentile(samples, 0.99),
+        'latency_max_ns': max(samples, default=0),
+    }
+
+
+def stage_part_lines(workload: Workload) -> List[str]:
+    """Return the part lines of a workload, limited for stage benchmarks."""
+    stream = io.BytesIO()
+    generate_parts(Workload(workload.designs,
+                            min(workload.parts, STAGE_PARTS_LIMIT),
+                            workload.mix, workload.filler, workload.seed),
+                   stream)
+    return stream.getvalue().decode().split()
+
+
+def measure_part_repository_save(workload: Workload) -> Result:
+    """Measure PartRepository.save() on the parts of workload."""
+    lines = stage_part_lines(workload)
+    part_repository = PartRepository()
+    save = part_repository.save
+    samples = []
+    start = time.perf_counter()
+    for i, part_str in enumerate(lines):
+        if i % LATENCY_SAMPLE_EVERY:
+            save(part_str)
+        else:
+            call_start = time.perf_counter_ns()
+            save(part_str)
+            samples.append(time.perf_counter_ns() - call_start)
+    seconds = time.perf_counter() - start
+    return {
+        'parts': len(lines),
+        'seconds': seconds,
+        'parts_per_second': len(lines) / seconds if seconds else 0,
+        **latency_summary(samples),
+    }
+
+
+def measure_create_product(workload: Workload) -> Result:
+    """Measure ProductManager.create_product() after every part."""
+    random.seed(workload.seed)
+    lines = stage_part_lines(workload)
+    part_repository = PartRepository()
+    product_manager = ProductManager(part_repository)
+    for design_str in generate_designs(workload):
+        product_manager.save_design(design_str)
+    save = part_repository.save
+    create_product = product_manager.create_product
+    products = 0
+    seconds = 0.0
+    samples = []
+    for i, part_str in enumerate(lines):
+        save(part_str)
+        call_start = time.perf_counter_ns()
+        if create_product():
+            products += 1
+        elapsed = time.perf_counter_ns() - call_start
+        seconds += elapsed / 1e9
+        if not i % LATENCY_SAMPLE_EVERY:
+            samples.append(elapsed)
+    return {
+        'parts': len(lines),
+        'products': products,
+        'seconds': seconds,
+        'calls_per_second': len(lines) / seconds if seconds else 0,
+        'products_per_second': products / seconds if seconds else 0,
+        **latency_summary(samples),
+    }
+
+
+def measure_end_to_end(workload: Workload, path: str) -> Result:
+    """Measure FurnitureCreator.main() on the workload file at path."""
+    random.seed(workload.seed)
+    with open(os.devnull, 'wb') as devnull:
+        app = FurnitureCreator(input_path=path,
+                               output=OutputWriter(devnull, 'block'))
+        start = time.perf_counter()
+        app.main()
+        seconds = time.perf_counter() - start
+    return {
+        'parts': app.parts_read,
+        'products': app.products_created,
+        'seconds': seconds,
+        'parts_per_second': app.parts_read / seconds if seconds else 0,
+        'products_per_second':
+            app.products_created / seconds if seconds else 0,
+        'latency_mean_ns':
+            int(seconds * 1e9 / app.parts_read) if app.parts_read else 0,
+    }
+
+
+def read_terminal(fd: int) -> bytes:
+    """Return output read from terminal fd, b'' once the command exited."""
+    try:
+        return os.read(fd, 1 << 16)
+    except OSError:
+        # Linux reports EIO when the other end of the terminal is closed.
+        return b''
+
+
+def time_to_first_line(command: List[str],
+                       input_path: str = '',
+                       cwd: str = ROOT) -> float:
+    """Return seconds from starting command until its first output line.
+
+    The command writes to a terminal, as it does interactively, and reads
+    its input from a pipe. The input is written once the command has
+    started, but the pipe is only closed after the first line, so a command
+    waiting for the end of its input is timed over FIRST_LINE_TIMEOUT. The
+    input should fit in the pipe. Commands without output are timed until
+    they exit.
+    """
+    data = b''
+    if input_path:
+        with open(input_path, 'rb') as file:
+            data = file.read()
+    terminal, stdout = os.openpty()
+    try:
+        with subprocess.Popen(command, stdin=subprocess.PIPE, stdout=stdout,
+                              cwd=cwd) as process:
+            os.close(stdout)
+            assert process.stdin
+            start = time.perf_counter()
+            process.stdin.write(data)
+            process.stdin.flush()
+            if not data:
+                process.stdin.close()
+            line = b''
+            while b'\n' not in line:
+                if not process.stdin.closed and not select.select(
+                        [terminal], [], [], FIRST_LINE_TIMEOUT)[0]:
+                    # No line in time: the command waits for the end of
+                    # its input.
+                    process.stdin.close()
+                if not (chunk := read_terminal(terminal)):
+                    break
+                line += chunk
+            seconds = time.perf_counter() - start
+            process.stdin.close()
+            while read_terminal(terminal):
+                pass
+            if process.wait():
+                raise RuntimeError(
+                    f'{" ".join(command)} failed with exit code '
+                    f'{process.returncode}.')
+    finally:
+        os.close(terminal)
+    return seconds
+
+
+def measure_startup(input_path: str, runs: int = 20) -> Result:
+    """Measure startup of the command line on input_path, median of runs.
+
+    Import and first product times are on top of the time to start a bare
+    interpreter, so they do not depend on the interpreter installation. The
+    package is compiled to bytecode first, as it is in the Docker image, in
+    a temporary copy so the source tree is left alone.
+    """
+    input_path = os.path.abspath(input_path)
+    with tempfile.TemporaryDirectory() as directory:
+        package = os.path.join(directory, 'furniturecreator')
+        shutil.copytree(os.path.join(ROOT, 'furniturecreator'), package,
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        compileall.compile_dir(package, quiet=1)
+        commands = {
+            'interpreter_ms': [sys.executable, '-c', 'pass'],
+            'import_ms': [sys.executable, '-c', 'import furniturecreator'],
+            'first_product_ms': [sys.executable, '-m', 'furniturecreator'],
+        }
+        samples: Dict[str, List[float]] = {name: [] for name in commands}
+        # Interleave the commands, so they are measured under the same load.
+        for _ in range(runs):
+            for name, command in commands.items():
+                samples[name].append(time_to_first_line(
+                    command,
+                    input_path if name == 'first_product_ms' else '',
+                    directory))
+    result: Result = {
+        name: percentile(values, 0.5) * 1000  # type: ignore
+        for name, values in samples.items()
+    }
+    for name in STARTUP_BUDGET_MS:
+        result[name] -= result['interpreter_ms']
+    result['runs'] = runs
+    return result
+
+
+def over_startup_budget(result: Result) -> List[str]:
+    """Return the startup measurements of result over their budget."""
+    return [name for name, budget in STARTUP_BUDGET_MS.items()
+            if result[name] > budget]
+
+
+def peak_rss_kib() -> int:
+    """Return peak resident set size of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_measurement(function: Callable[..., Result], *args: Any) -> Result:
+    """Run measurement and add peak memory of the running process."""
+    result = function(*args)
+    result['peak_rss_kib'] = peak_rss_kib()
+    return result
+
+
+def run_isolated(function: Callable[..., Result], *args: Any) -> Result:
+    """Run measurement in a fresh process, so peak memory is its own."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_measurement, function, *args).result()
+
+
+BENCHMARKS: Dict[str, Callable[..., Result]] = {
+    'part_repository_save': measure_part_repository_save,
+    'product_manager_create_product': measure_create_product,
+    'furniture_creator_main': measure_end_to_end,
+}
@@ -0,0 +1,96 @@
+"""Reproducible synthetic workloads for the furniture creator."""
+
+from __future__ import annotations
+from typing import List, BinaryIO
+from dataclasses import dataclass
+import random
+
+from furniturecreator.dataclasses import PART_TYPES, PART_SIZES
+
+MIXES = ('uniform', 'skewed')
+FILLERS = ('none', 'normal', 'high')
+CHUNK_SIZE = 1 << 16
+
+
+@dataclass(frozen=True)
+class Workload:
+    """Parameters fully describing a synthetic workload."""
+
+    designs: int = 100
+    parts: int = 100_000
+    mix: str = 'uniform'
+    filler: str = 'normal'
+    seed: int = 1
+
+    def __post_init__(self) -> None:
+        """Validate parameters."""
+        if self.mix not in MIXES:
+            raise ValueError(f'Mix should be either of: {", ".join(MIXES)}.')
+        if self.filler not in FILLERS:
+            raise ValueError(
+                f'Filler should be either of: {", ".join(FILLERS)}.')
+        if self.designs < 1 or self.parts < 0:
+            raise ValueError('Workload needs designs and parts.')
+
+    @property
+    def name(self) -> str:
+        """Return short name identifying the workload."""
+        return (f'd{self.designs}-p{self.parts}-{self.mix}-{self.filler}'
+                f'-s{self.seed}')
+
+
+def generate_designs(workload: Workload) -> List[str]:
+    """Return design lines of workload.
+
+    Designs use 1 to 6 part types with amounts of 1 to 10. The filler
+    setting adds no, up to half or two to five times the required amount
+    of parts as extra parts to the total.
+    """
+    generator = random.Random(f'{workload.seed}-designs')
+    designs = []
+    for i in range(workload.designs):
+        size = generator.choice(PART_SIZES)
+        types = sorted(generator.sample(PART_TYPES, generator.randint(1, 6)))
+        amounts = [generator.randint(1, 10) for _ in types]
+        required = sum(amounts)
+        if workload.filler == 'none':
+            extra = 0
+        elif workload.filler == 'normal':
+            extra = generator.randint(0, required // 2)
+        else:
+            extra = generator.randint(2 * required, 5 * required)
+        parts = ''.join(f'{x}{y}' for x, y in zip(amounts, types))
+        designs.append(f'[Design {i}]{size}{parts}{required + extra}')
+    return designs
+
+
+def part_weights(workload: Workload) -> List[float]:
+    """Return weight per part code, uniform or Zipf-like skewed."""
+    count = len(PART_TYPES) * len(PART_SIZES)
+    if workload.mix == 'uniform':
+        return [1.0] * count
+    generator = random.Random(f'{workload.seed}-weights')
+    ranks = list(range(1, count + 1))
+    generator.shuffle(ranks)
+    return [1 / rank for rank in ranks]
+
+
+def generate_parts(workload: Workload, stream: BinaryIO) -> None:
+    """Write part lines of workload to a binary stream, in chunks."""
+    generator = random.Random(f'{workload.seed}-parts')
+    lines = [f'{x}{y}\n'.encode() for y in PART_SIZES for x in PART_TYPES]
+    weights = part_weights(workload)
+    remaining = workload.parts
+    while remaining > 0:
+        count = min(remaining, CHUNK_SIZE)
+        stream.write(b''.join(generator.choices(lines, weights, k=count)))
+        remaining -= count
+
+
+def write_workload(workload: Workload, path: str) -> None:
+    """Write complete input (designs, empty line, parts) to path."""
+    with open(path, 'wb') as file:
+        for design_str in generate_designs(workload):
+            file.write(design_str.encode() + b'\n')
+        file.write(b'\n')
+        generate_parts(workload, file)
@@ -8,11 +8,27 @@ parts in stock.
 """
 
 from __future__ import annotations
-from typing import Iterator
+import io
+import os
 import sys
 
+from furniturecreator.dataclasses import PARTS
 from furniturecreator.part_repository import PartRepository
 from furniturecreator.product_manager import ProductManager
+from furniturecreator.part_parser import PartParser, PartRun, line_parts
+from furniturecreator.output_writer import OutputWriter
+
+# The typing module is slow to import, only type checkers import it.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, Generator, BinaryIO, Dict, \
+        Optional, Tuple, Union
+    import mmap
+    from furniturecreator.catalog_cache import CatalogSource
+    from furniturecreator.dataclasses import Product
+    from furniturecreator.checkpoint import Checkpointer
+    from furniturecreator.journal import Journal
+    from furniturecreator.part_parser import Codes
 
 
 class FurnitureCreator:
@@ -21,20 +37,263 @@ class FurnitureCreator:
     Run FurnitureCreator.main() to start the furniture creator.
     """
 
-    def __init__(self) -> None:
-        """Initialize the application."""
+    def __init__(self,
+                 batch_size: int = 0,
+                 input_path: str = '',
+                 output: Optional[OutputWriter] = None,
+                 checkpointer: Optional[Checkpointer] = None,
+                 journal: Optional[Journal] = None,
+                 resume: bool = False,
+                 policy: str = 'round-robin',
+                 weights: Optional[Dict[str, float]] = None,
+                 catalog_cache: Optional[CatalogSource] = None) -> None:
+        """Initialize the application.
+
+        With a batch size parts are processed in chunks of that size by the
+        NumPy batch engine instead of one by one. With an input path the
+        input is read from that file, memory-mapped, instead of from STDIN.
+        Products are written to output, by default STDOUT.
+
+        With a checkpointer the facility state is saved when a checkpoint is
+        due and at the end of the input. With resume the state of its last
+        checkpoint is restored and the input continues where it was taken.
+        A journal, which requires a checkpointer, records the parts processed
+        since the last checkpoint; on resume they are replayed as well.
+
+        Designs are scheduled for creation by policy, with weights (or
+        priorities) per design name (see DesignScheduler). With a catalog
+        cache designs are loaded compiled from the cache when it holds them.
+        """
+        if journal and not checkpointer:
+            raise ValueError('A journal requires a checkpointer.')
         self.part_repository = PartRepository()
-        self.product_manager = ProductManager(self.part_repository)
+        self.product_manager = ProductManager(self.part_repository, policy,
+                                              weights)
+        self.batch_size = batch_size
+        self.input_path = input_path
+        self.output = output
+        self.checkpointer = checkpointer
+        self.journal = journal
+        self.resume = resume
+        self.catalog_cache = catalog_cache
+        self.parser = PartParser()
+        self.lines_read = 0
+        self.offset = 0
+        self.parts_read = 0
+        self.products_created = 0
 
     def main(self) -> None:
         """Start the furniture creator."""
-        for design_str in self.read_design():
+        if not self.output:
+            self.output = OutputWriter.for_stdout()
+        try:
+            if self.input_path:
+                self.main_mapped(self.input_path)
+                return
+            self.main_stream(decompressing(sys.stdin.buffer))
+        finally:
+            self.output.flush()
+
+    def main_stream(self, stream: BinaryIO) -> None:
+        """Start the furniture creator on a binary input stream."""
+        self.save_designs(self.read_design_buffer(stream))
+        if self.resume:
+            self.restore_checkpoint(stream)
+        self.create_products(self.read_part_codes(stream))
+
+    def main_mapped(self, path: str) -> None:
+        """Start the furniture creator on a memory-mapped input file.
+
+        A compressed input file is decompressed as a stream instead.
+        """
+        import mmap
+
+        with open(path, 'rb') as file:
+            if (stream := decompressing(file)) is not file:
+                with stream:
+                    self.main_stream(stream)
+                return
+            if not os.fstat(file.fileno()).st_size:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    as buffer:
+                if hasattr(buffer, 'madvise'):
+                    buffer.madvise(mmap.MADV_SEQUENTIAL)
+                self.save_designs(self.read_design_mapped(buffer))
+                if self.resume:
+                    self.restore_checkpoint(buffer)
+                codes = self.read_part_codes_mapped(buffer)
+                try:
+                    self.create_products(codes)
+                finally:
+                    # Release the views on the buffer before unmapping it.
+                    codes.close()
+
+    def save_designs(self, design_strs: Iterable[str]) -> None:
+        """Save designs, from the catalog cache if there is one."""
+        if self.catalog_cache:
+            self.catalog_cache.save_designs(
+                self.product_manager.design_repository, list(design_strs))
+            return
+        for design_str in design_strs:
             self.product_manager.save_design(design_str)
-        for part_str in self.read_part():
-            self.part_repository.save(part_str)
 
-            if product := self.product_manager.create_product():
-                print(product)
+    def create_products(self, codes: Iterator[Codes]) -> None:
+        """Create products from blocks of part codes and write them.
+
+        Runs of parts are added to stock at once up to every product they
+        create (see ProductManager.add_run()).
+        """
+        assert self.output
+        if self.checkpointer:
+            codes = self.checkpoint_blocks(codes)
+        if self.journal:
+            codes = self.journal_blocks(codes)
+        if self.batch_size:
+            self.create_products_batch(codes)
+            return
+        write = self.output.write
+        for block in codes:
+            self.parts_read += len(block)
+            if isinstance(block, PartRun):
+                self.write_products(self.product_manager.add_run(
+                    PARTS[block.code], block.amount))
+                continue
+            for code in block:
+                self.part_repository.add(PARTS[code])
+
+                if product := self.product_manager.create_product():
+                    write(str(product))
+                    self.products_created += 1
+
+    def drain(self) -> None:
+        """Create and write every product that can be created from stock.
+
+        Unlike the input, which creates at most one product per part, this
+        empties stock of products after it is loaded in bulk, restored or
+        matched by new designs (see ProductManager.create_all_products()).
+        """
+        if not self.output:
+            self.output = OutputWriter.for_stdout()
+        self.write_products(self.product_manager.create_all_products())
+
+    def write_products(self, products: Iterable[Product]) -> None:
+        """Write and count products."""
+        assert self.output
+        for product in products:
+            self.output.write(str(product))
+            self.products_created += 1
+
+    def create_products_batch(self, codes: Iterator[Codes]) -> None:
+        """Create products from blocks of part codes with the batch engine.
+
+        Runs of parts are added to stock at once as in create_products().
+        """
+        # NumPy is only needed in batch mode, so import the engine on demand.
+        from furniturecreator.batch_engine import BatchEngine
+
+        assert self.output
+        engine = BatchEngine(self.product_manager, self.batch_size)
+        for block in codes:
+            self.parts_read += len(block)
+            if isinstance(block, PartRun):
+                self.write_products(self.product_manager.add_run(
+                    PARTS[block.code], block.amount))
+            else:
+                self.write_products(engine.process(block))
+
+    def checkpoint_blocks(self, codes: Iterator[Codes]) -> Iterator[Codes]:
+        """Yield blocks of codes, saving checkpoints between them when due."""
+        assert self.checkpointer
+        for block in codes:
+            if self.checkpointer.due(self.parts_read):
+                self.save_checkpoint()
+            yield block
+        self.save_checkpoint()
+
+    def journal_blocks(self, codes: Iterator[Codes]) -> Iterator[Codes]:
+        """Yield blocks of codes, journaling them and the products created."""
+        from furniturecreator.checkpoint import designs_crc
+
+        assert self.journal and self.output
+        journal = self.journal
+        journal.reset(self.parts_read,
+                      designs_crc(self.product_manager.design_repository
+                                  .catalog))
+        try:
+            for block in codes:
+                if isinstance(block, PartRun):
+                    journal.append_run(block)
+                else:
+                    journal.append_parts(block)
+                products_created = self.products_created
+                yield block
+                journal.append_products(
+                    self.products_created - products_created)
+                if journal.due():
+                    self.output.flush()
+                    journal.commit()
+            self.output.flush()
+            journal.commit()
+        finally:
+            journal.close()
+
+    def save_checkpoint(self) -> None:
+        """Save a checkpoint at the input position of the parser."""
+        from furniturecreator.checkpoint import Checkpoint
+
+        assert self.checkpointer
+        # Products before the checkpoint must not be lost when it is resumed.
+        if self.output:
+            self.output.flush()
+        checkpoint = Checkpoint.capture(
+            self, self.parser.offset, self.parser.offset_line)
+        self.checkpointer.save(checkpoint)
+        if self.journal:
+            # The journaled parts are included in the checkpoint now.
+            self.journal.reset(checkpoint.parts_read, checkpoint.designs_crc)
+
+    def restore_checkpoint(self,
+                           source: Union[BinaryIO, mmap.mmap]) -> int:
+        """Restore the last checkpoint and journal, skipping their input.
+
+        Source is the input stream or mapped buffer, positioned after the
+        designs. Return the number of journaled parts replayed.
+        """
+        import mmap
+
+        assert self.checkpointer
+        if checkpoint := self.checkpointer.load():
+            if checkpoint.offset < self.offset:
+                raise ValueError('Checkpoint offset is inside the designs.')
+            checkpoint.restore(self)
+            if not isinstance(source, mmap.mmap):
+                skip_bytes(source, checkpoint.offset - self.offset)
+            self.offset = checkpoint.offset
+            self.lines_read = checkpoint.line - 1
+        if not self.journal:
+            return 0
+
+        from furniturecreator.journal import JournalTail, replay
+
+        tail = JournalTail.read(self.journal.path)
+        # A journal with an older base was reset by a later checkpoint.
+        if not tail or tail.base < self.parts_read:
+            return 0
+        if tail.base > self.parts_read:
+            raise ValueError('Journal continues a checkpoint that is missing.')
+        replay(self, tail)
+        if isinstance(source, mmap.mmap):
+            end, lines = skip_parts_mapped(source, self.offset, tail.parts)
+        else:
+            skipped, lines = skip_parts(source, tail.parts)
+            end = self.offset + skipped
+        self.offset = end
+        self.lines_read += lines
+        # Save the replayed state, which also empties the journal.
+        self.parser = PartParser(self.lines_read + 1, self.offset)
+        self.save_checkpoint()
+        return tail.parts
 
     def read_stdin(self) -> Iterator[str]:
         """Read standard input and yield line by line."""
@@ -53,3 +312,97 @@ class FurnitureCreator:
     def read_part(self) -> Iterator[str]:
         """Retrieve parts from STDIN after the first empty line."""
         yield from self.read_stdin()
+
+    def read_design_buffer(self, stream: BinaryIO) -> Iterator[str]:
+        """Retrieve product designs from binary stream until an empty line."""
+        while line := stream.readline():
+            self.lines_read += 1
+            self.offset += len(line)
+            if not (design_str := line.decode().strip()):
+                return
+            yield design_str
+
+    def read_part_codes(self, stream: BinaryIO) -> Iterator[Codes]:
+        """Retrieve parts from binary stream as blocks of part codes."""
+        self.parser = PartParser(self.lines_read + 1, self.offset)
+        yield from self.parser.read(stream)
+
+    def read_design_mapped(self, buffer: mmap.mmap) -> Iterator[str]:
+        """Retrieve product designs from mapped buffer until an empty line."""
+        while self.offset < len(buffer):
+            end = buffer.find(b'\n', self.offset)
+            end = len(buffer) if end < 0 else end + 1
+            line = buffer[self.offset:end]
+            self.offset = end
+            self.lines_read += 1
+            if not (design_str := line.decode().strip()):
+                return
+            yield design_str
+
+    def read_part_codes_mapped(
+            self,
+            buffer: mmap.mmap) -> Generator[Codes, None, None]:
+        """Retrieve parts from mapped buffer as blocks of part codes."""
+        self.parser = PartParser(self.lines_read + 1, self.offset)
+        yield from self.parser.read_buffer(buffer, self.offset)
+
+
+def skip_bytes(stream: BinaryIO, length: int) -> None:
+    """Move stream forward by length bytes, reading them if not seekable."""
+    if stream.seekable():
+        stream.seek(length, io.SEEK_CUR)
+        return
+    while length:
+        if not (skipped := stream.read(min(length, 1 << 16))):
+            raise ValueError('Input ends before the checkpoint offset.')
+        length -= len(skipped)
+
+
+def decompressing(stream: BinaryIO) -> BinaryIO:
+    """Return stream, decompressed if it is gzip, xz or bzip2 compressed.
+
+    The compression is recognized by the magic number at the start of the
+    stream, peeked at without consuming it.
+    """
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)  # type: ignore
+    # The compression modules are only imported for compressed input.
+    head = stream.peek(6)[:6]  # type: ignore
+    if head.startswith(b'\x1f\x8b'):
+        import gzip
+        return gzip.open(stream)  # type: ignore
+    if head.startswith(b'\xfd7zXZ\x00'):
+        import lzma
+        return lzma.open(stream)  # type: ignore
+    if head.startswith(b'BZh'):
+        import bz2
+        return bz2.open(stream)  # type: ignore
+    return stream
+
+
+def skip_parts(stream: BinaryIO, count: int) -> Tuple[int, int]:
+    """Move stream past the lines of count parts, return bytes and lines."""
+    skipped = lines = 0
+    while count > 0:
+        if not (line := stream.readline()):
+            raise ValueError('Input ends before the journaled parts.')
+        skipped += len(line)
+        lines += 1
+        count -= line_parts(line)
+    return skipped, lines
+
+
+def skip_parts_mapped(buffer: mmap.mmap,
+                      offset: int,
+                      count: int) -> Tuple[int, int]:
+    """Return offset and lines past the lines of count parts at offset."""
+    lines = 0
+    while count > 0:
+        if offset >= len(buffer):
+            raise ValueError('Input ends before the journaled parts.')
+        end = buffer.find(b'\n', offset)
+        end = len(buffer) if end < 0 else end + 1
+        count -= line_parts(buffer[offset:end])
+        offset = end
+        lines += 1
+    return offset, lines
@@ -1,7 +1,194 @@
 """Furniture Creator main start script."""
 
+from __future__ import annotations
+import sys
+
 from furniturecreator import FurnitureCreator
+from furniturecreator.output_writer import OutputWriter, FLUSH_POLICIES
+from furniturecreator.design_scheduler import POLICIES
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Tuple
+    import argparse
+
+
+def parse_weight(weight_str: str) -> Tuple[str, float]:
+    """Parse NAME=VALUE design weight argument."""
+    import argparse
+
+    name, separator, value = weight_str.rpartition('=')
+    try:
+        if not separator:
+            raise ValueError
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'invalid design weight: {weight_str!r} (expected NAME=VALUE)'
+        ) from None
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command line arguments."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='furniturecreator',
+        description='Create products from product designs and parts read '
+                    'from standard input or an input file.'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=0, metavar='N',
+        help='process parts in chunks of N with the NumPy batch engine'
+    )
+    parser.add_argument(
+        '--input', default='', metavar='PATH',
+        help='read input from file PATH (memory-mapped) instead of STDIN'
+    )
+    parser.add_argument(
+        '--flush', choices=FLUSH_POLICIES, default='auto',
+        help='output flush policy: every line, full blocks, every '
+             '--flush-count products or every --flush-interval ms '
+             '(default: line on a terminal, otherwise block)'
+    )
+    parser.add_argument(
+        '--flush-count', type=int, default=100, metavar='N',
+        help='products per flush for the count policy'
+    )
+    parser.add_argument(
+        '--flush-interval', type=float, default=100, metavar='MS',
+        help='milliseconds between flushes for the time policy'
+    )
+    parser.add_argument(
+        '--policy', choices=POLICIES, default='round-robin',
+        help='order in which designs take turns to be created '
+             '(default: round-robin)'
+    )
+    parser.add_argument(
+        '--weight', type=parse_weight, action='append', default=[],
+        metavar='NAME=VALUE',
+        help='weight (weighted policy) or priority (priority policy) of '
+             'the designs named NAME, 1 by default; can be repeated'
+    )
+    parser.add_argument(
+        '--catalog-cache', default='', metavar='DIR',
+        help='load compiled designs from the catalog cache in DIR when it '
+             'holds them, otherwise parse and save them there'
+    )
+    parser.add_argument(
+        '--checkpoint', default='', metavar='PATH',
+        help='save facility state to checkpoint file PATH at the end of the '
+             'input and every --checkpoint-parts parts or '
+             '--checkpoint-interval seconds'
+    )
+    parser.add_argument(
+        '--checkpoint-parts', type=int, default=0, metavar='N',
+        help='parts between checkpoints (checked between blocks of parts)'
+    )
+    parser.add_argument(
+        '--checkpoint-interval', type=float, default=0, metavar='SECONDS',
+        help='seconds between checkpoints (checked between blocks of parts)'
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='restore the state of the --checkpoint file, if it exists, and '
+             'continue the input from where it was taken'
+    )
+    parser.add_argument(
+        '--journal', default='', metavar='PATH',
+        help='journal parts processed since the last checkpoint to PATH '
+             '(requires --checkpoint); replayed by --resume'
+    )
+    parser.add_argument(
+        '--journal-commit-parts', type=int, default=1 << 16, metavar='N',
+        help='parts per journal commit (checked between blocks of parts)'
+    )
+    parser.add_argument(
+        '--journal-commit-interval', type=float, default=0,
+        metavar='SECONDS',
+        help='seconds between journal commits (checked between blocks of '
+             'parts)'
+    )
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='print counters and time per stage to STDERR at the end'
+    )
+    parser.add_argument(
+        '--profile', default='', metavar='PATH',
+        help='run under cProfile and write its statistics to PATH'
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    app = FurnitureCreator()
-    app.main()
+    if sys.argv[1:2] == ['batch']:
+        from furniturecreator import batch_runner
+        sys.exit(batch_runner.main(sys.argv[2:]))
+    if sys.argv[1:2] == ['serve']:
+        from furniturecreator import server
+        sys.exit(server.main(sys.argv[2:]))
+    if sys.argv[1:2] == ['replay']:
+        from furniturecreator import journal
+        sys.exit(journal.main(sys.argv[2:]))
+    if sys.argv[1:2] == ['plan']:
+        from furniturecreator import planner
+        sys.exit(planner.main(sys.argv[2:]))
+    if not sys.argv[1:]:
+        # Without arguments there is nothing to parse, so argparse, which is
+        # slow to import, is not needed for the default mode.
+        FurnitureCreator().main()
+        sys.exit()
+
+    arguments = parse_arguments()
+    checkpointer = None
+    if arguments.checkpoint:
+        from furniturecreator.checkpoint import Checkpointer
+        checkpointer = Checkpointer(arguments.checkpoint,
+                                    arguments.checkpoint_parts,
+                                    arguments.checkpoint_interval)
+    elif arguments.resume or arguments.journal:
+        sys.exit('furniturecreator: error: --resume and --journal require '
+                 '--checkpoint')
+    journal_file = None
+    if arguments.journal:
+        from furniturecreator.journal import Journal
+        journal_file = Journal(arguments.journal,
+                               arguments.journal_commit_parts,
+                               arguments.journal_commit_interval)
+    catalog_cache = None
+    if arguments.catalog_cache:
+        from furniturecreator.catalog_cache import CatalogCache
+        catalog_cache = CatalogCache(arguments.catalog_cache)
+    output = OutputWriter.for_stdout(
+        arguments.flush,
+        flush_count=arguments.flush_count,
+        flush_interval=arguments.flush_interval
+    )
+    app = FurnitureCreator(batch_size=arguments.batch_size,
+                           input_path=arguments.input,
+                           output=output,
+                           checkpointer=checkpointer,
+                           journal=journal_file,
+                           resume=arguments.resume,
+                           policy=arguments.policy,
+                           weights=dict(arguments.weight),
+                           catalog_cache=catalog_cache)
+
+    stats = None
+    if arguments.stats:
+        from furniturecreator.stats import Stats
+        stats = Stats()
+        stats.instrument(app)
+    try:
+        if arguments.profile:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.runcall(app.main)
+            finally:
+                profile.dump_stats(arguments.profile)
+        else:
+            app.main()
+    finally:
+        if stats:
+            print(stats.report(), file=sys.stderr)
@@ -0,0 +1,134 @@
+"""Furniture Creator's NumPy batch engine.
+
+Processes chunks of parts at once against a requirement matrix compiled from
+the design catalog, while producing exactly the products the part by part
+flow of FurnitureCreator.main() would produce.
+"""
+
+from __future__ import annotations
+from typing import Iterator, Optional, Sequence, Union
+from collections import Counter
+
+import numpy as np
+
+from furniturecreator.dataclasses import Product, PARTS, PART_TYPES, \
+                                        SLOT_COUNT
+from furniturecreator.product_manager import ProductManager
+
+MIN_WINDOW = 32
+
+
+class BatchEngine:
+    """Feeds chunks of part slots to a ProductManager."""
+
+    def __init__(self,
+                 product_manager: ProductManager,
+                 chunk_size: int = 1024) -> None:
+        """Initialize engine for product manager and compile its designs."""
+        if chunk_size < 1:
+            raise ValueError('Chunk size should be at least one part.')
+        self.product_manager = product_manager
+        self.part_repository = product_manager.part_repository
+        self.chunk_size = chunk_size
+        # Parts searched at once for the next product, adapted to the
+        # distance between products and at most the chunk size.
+        self.window = min(MIN_WINDOW, chunk_size)
+        self.compile()
+
+    def compile(self) -> None:
+        """Compile design catalog into requirement matrix and vectors.
+
+        The requirement matrix holds a row of 52 slot amounts per design,
+        the totals vector the total amount of parts per design and the
+        large vector whether a design is large.
+        """
+        compiled = self.product_manager.design_repository.compiled
+        rows = [design_id for design_id, design in enumerate(compiled)
+                for _ in design.requirements]
+        slots, amounts = zip(*(requirement for design in compiled
+                               for requirement in design.requirements)) \
+            if rows else ((), ())
+        self.requirements = np.zeros((len(compiled), SLOT_COUNT), np.int64)
+        self.requirements[rows, slots] = amounts
+        self.totals = np.array([x.total_parts for x in compiled], np.int64)
+        self.large = np.array([x.size == 'L' for x in compiled], bool)
+        self.compiled_designs = len(compiled)
+        # Slots required by any design and the requirement column of each.
+        self.slots = np.flatnonzero(self.requirements.any(axis=0))
+        self.slot_requirements = [self.requirements[:, slot].copy()
+                                  for slot in self.slots]
+
+    def process(self,
+                slots: Union[bytes, Sequence[int]]) -> Iterator[Product]:
+        """Add parts by stock slot and yield every product created.
+
+        A product is created after the first part that makes any design
+        creatable, which is found for a window of parts at once by searching
+        the cumulative stock of every slot. The window doubles, up to the
+        chunk size, while no product is found and shrinks to about twice the
+        distance between products when one is, so frequent products do not
+        cost a search of a whole chunk each.
+        """
+        catalog = self.product_manager.design_repository.catalog
+        if self.compiled_designs != len(catalog):
+            self.compile()
+
+        if isinstance(slots, bytes):
+            codes = np.frombuffer(slots, np.uint8).astype(np.int64)
+        else:
+            codes = np.asarray(slots, np.int64)
+        position = 0
+        while position < len(codes):
+            chunk = codes[position:position + self.window]
+            ready_at = self.find_first_ready(chunk)
+            if ready_at is None:
+                self.add_parts(chunk)
+                position += len(chunk)
+                self.window = min(self.window * 2, self.chunk_size)
+                continue
+            self.add_parts(chunk[:ready_at + 1])
+            position += ready_at + 1
+            # Search about twice the distance to this product for the next.
+            self.window = min(max(MIN_WINDOW, 2 * (ready_at + 1)),
+                              self.chunk_size)
+            product = self.product_manager.create_product()
+            if product:
+                yield product
+
+    def find_first_ready(self, chunk: np.ndarray) -> Optional[int]:
+        """Return index of first part in chunk making any design ready."""
+        if not self.compiled_designs:
+            return None
+        # Cumulative stock within the chunk of only the slots in a design.
+        stock = np.array(self.part_repository.stock, np.int64)
+        cumulative = np.cumsum(chunk[:, None] == self.slots, axis=0)
+        cumulative += stock[self.slots]
+
+        # Stock only grows within a chunk, so every column is sorted and the
+        # first index with enough stock is found by binary search.
+        ready_at = np.zeros(self.compiled_designs, np.int64)
+        for column, requirements in enumerate(self.slot_requirements):
+            np.maximum(ready_at,
+                       cumulative[:, column].searchsorted(requirements),
+                       out=ready_at)
+        totals = self.part_repository.total_per_size
+        large = np.cumsum(chunk >= len(PART_TYPES), dtype=np.int64)
+        small = np.arange(1, len(chunk) + 1) - large
+        large += totals['L']
+        small += totals['S']
+        np.maximum(
+            ready_at,
+            np.where(self.large,
+                     large.searchsorted(self.totals),
+                     small.searchsorted(self.totals)),
+            out=ready_at
+        )
+
+        first = int(ready_at.min())
+        return first if first < len(chunk) else None
+
+    def add_parts(self, chunk: np.ndarray) -> None:
+        """Add parts of chunk to stock, slot by slot in order of arrival."""
+        # Counter keeps the slots in order of their first occurrence.
+        for slot, count in Counter(chunk.tolist()).items():
+            self.part_repository.add(PARTS[slot], count)
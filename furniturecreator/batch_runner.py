@@ -0,0 +1,200 @@
+"""Furniture Creator's process pool runner for many input files.
+
+Run with: python -m furniturecreator batch [options] PATH [PATH ...]
+"""
+
+from __future__ import annotations
+from typing import List, Sequence, Optional, TYPE_CHECKING
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import sys
+import time
+
+from furniturecreator import FurnitureCreator, decompressing
+from furniturecreator.catalog_cache import CatalogCache
+from furniturecreator.output_writer import OutputWriter
+from furniturecreator.shared_catalog import SharedCatalog, SharedCatalogs
+
+if TYPE_CHECKING:
+    from furniturecreator.catalog_cache import CatalogSource
+
+
+@dataclass
+class RunStats:
+    """Statistics of processing one input file."""
+
+    input_path: str
+    output_path: str
+    parts: int = 0
+    products: int = 0
+    seconds: float = 0.0
+    error: str = ''
+
+    def __str__(self) -> str:
+        """Output readable one line summary."""
+        if self.error:
+            return f'{self.input_path}: error: {self.error}'
+        rate = self.parts / self.seconds if self.seconds else 0
+        return (f'{self.input_path} -> {self.output_path}: '
+                f'{self.parts} parts, {self.products} products, '
+                f'{self.seconds:.3f}s ({rate:.0f} parts/s)')
+
+
+def run_file(input_path: str,
+             output_path: str,
+             batch_size: int = 0,
+             catalog_cache: str = '',
+             shared_catalog: str = '') -> RunStats:
+    """Process one input file with its own facility state.
+
+    With a catalog cache directory, designs are loaded from and saved to
+    the catalog cache in that directory. With the name of a shared memory
+    block, designs are loaded from the shared catalog in it instead.
+    """
+    stats = RunStats(input_path, output_path)
+    start = time.perf_counter()
+    try:
+        with open(output_path, 'wb') as file:
+            cache: Optional[CatalogSource] = None
+            shared: Optional[SharedCatalog] = None
+            if shared_catalog:
+                cache = shared = SharedCatalog(shared_catalog)
+            elif catalog_cache:
+                cache = CatalogCache(catalog_cache)
+            app = FurnitureCreator(batch_size=batch_size,
+                                   input_path=input_path,
+                                   output=OutputWriter(file, 'block'),
+                                   catalog_cache=cache)
+            try:
+                app.main()
+            finally:
+                stats.parts = app.parts_read
+                stats.products = app.products_created
+                if shared is not None:
+                    # The designs are read from the block until here.
+                    shared.close()
+    except Exception as error:
+        stats.error = f'{type(error).__name__}: {error}'
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def read_design_strs(input_path: str) -> List[str]:
+    """Return design lines of input file, none if it can not be read."""
+    try:
+        with open(input_path, 'rb') as file, \
+                decompressing(file) as stream:
+            return list(FurnitureCreator().read_design_buffer(stream))
+    except (OSError, EOFError, UnicodeDecodeError):
+        return []
+
+
+def collect_input_paths(paths: Sequence[str]) -> List[str]:
+    """Expand directories into the files they contain, in name order."""
+    input_paths: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            input_paths.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            input_paths.append(path)
+    return input_paths
+
+
+def output_paths_for(input_paths: Sequence[str],
+                     output_dir: str) -> List[str]:
+    """Return output path per input path: its file name plus '.out'."""
+    output_paths = [
+        os.path.join(output_dir, os.path.basename(path) + '.out')
+        for path in input_paths
+    ]
+    if len(set(output_paths)) != len(output_paths):
+        raise ValueError('Input files should have unique file names.')
+    return output_paths
+
+
+def run(input_paths: Sequence[str],
+        output_dir: str,
+        workers: Optional[int] = None,
+        batch_size: int = 0,
+        catalog_cache: str = '',
+        shared_catalog: bool = False) -> List[RunStats]:
+    """Process input files in a process pool and return stats in order.
+
+    With shared catalog, the catalog of every distinct set of designs is
+    compiled once and placed in shared memory for the workers.
+    """
+    output_paths = output_paths_for(input_paths, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    with SharedCatalogs(CatalogCache(catalog_cache)
+                        if catalog_cache else None) as catalogs:
+        shared_catalogs = [
+            catalogs.share(read_design_strs(path)) if shared_catalog else ''
+            for path in input_paths
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                run_file,
+                input_paths,
+                output_paths,
+                [batch_size] * len(input_paths),
+                [catalog_cache] * len(input_paths),
+                shared_catalogs
+            ))
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse command line arguments of the batch command."""
+    parser = argparse.ArgumentParser(
+        prog='furniturecreator batch',
+        description='Process many input files, each with its own designs '
+                    'and parts, in parallel worker processes.'
+    )
+    parser.add_argument(
+        'paths', nargs='+', metavar='PATH',
+        help='input file, or directory of input files'
+    )
+    parser.add_argument(
+        '--output-dir', default='.', metavar='DIR',
+        help='directory to write <input file name>.out files to'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None, metavar='N',
+        help='number of worker processes (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=0, metavar='N',
+        help='process parts in chunks of N with the NumPy batch engine'
+    )
+    parser.add_argument(
+        '--catalog-cache', default='', metavar='DIR',
+        help='load compiled designs from, and save them to, the catalog '
+             'cache in DIR'
+    )
+    parser.add_argument(
+        '--shared-catalog', action='store_true',
+        help='compile every distinct catalog of designs once and share it '
+             'with the workers in shared memory'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    """Run batch command, report stats on STDERR and return exit code."""
+    arguments = parse_arguments(argv)
+    input_paths = collect_input_paths(arguments.paths)
+    all_stats = run(input_paths, arguments.output_dir,
+                    arguments.workers, arguments.batch_size,
+                    arguments.catalog_cache, arguments.shared_catalog)
+
+    for stats in all_stats:
+        print(stats, file=sys.stderr)
+    print(f'Total: {len(all_stats)} files, '
+          f'{sum(x.parts for x in all_stats)} parts, '
+          f'{sum(x.products for x in all_stats)} products',
+          file=sys.stderr)
+    return 1 if any(x.error for x in all_stats) else 0
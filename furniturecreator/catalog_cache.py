@@ -0,0 +1,227 @@
+"""Furniture Creator's on-disk cache of compiled design catalogs.
+
+A catalog is cached in a directory under the hash of its design lines, so a
+run with the same designs loads the parsed and compiled designs from one
+file instead of parsing them again. Files of other catalogs are left alone.
+
+The compiled requirements are stored as they are used, so a hit restores
+the compiled designs without compiling them again.
+
+Binary format (little endian), version 2:
+- header: magic b'FCDC', format version (uint16), BLAKE2b hash of the design
+  lines (16 bytes) and number of designs (uint32);
+- names: length (uint32) of the UTF-8 names of all designs, joined by
+  newlines;
+- per design its size (uint8, index in PART_SIZES), then its total parts
+  (uint64);
+- requirements: the index of the first requirement of every design and the
+  end of the last (uint32), then per requirement its slot (uint8), in slot
+  order per design, and its amount (uint64);
+- order: per part of a design in the order of the design, the index of its
+  requirement within the design (uint8);
+- trailer: CRC-32 of all preceding bytes (uint32).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import struct
+import tempfile
+import zlib
+
+from itertools import accumulate
+
+from furniturecreator.dataclasses import CompiledDesign, Design, PARTS, \
+                                        PART_SIZES
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Sequence, Protocol, Tuple
+    from furniturecreator.design_repository import DesignRepository
+
+    class CatalogSource(Protocol):
+        """Adds designs to a repository from a catalog, like CatalogCache."""
+
+        def save_designs(self,
+                         design_repository: DesignRepository,
+                         design_strs: Sequence[str]) -> None:
+            """Add designs to repository, parsing those not in catalog."""
+
+MAGIC = b'FCDC'
+VERSION = 2
+SUFFIX = '.catalog'
+
+HEADER = struct.Struct('<4sH16sI')
+LENGTH = struct.Struct('<I')
+CRC = struct.Struct('<I')
+
+
+def catalog_key(design_strs: Sequence[str]) -> bytes:
+    """Return hash of design lines, which keys their cached catalog."""
+    return hashlib.blake2b('\n'.join(design_strs).encode(),
+                           digest_size=16).digest()
+
+
+def catalog_to_bytes(key: bytes,
+                     designs: Sequence[Design],
+                     compiled: Sequence[CompiledDesign]) -> bytes:
+    """Return binary format of designs and their compiled forms under key."""
+    names = '\n'.join(design.name for design in designs).encode()
+    sizes = bytes(PART_SIZES.index(design.size) for design in designs)
+    starts = list(accumulate(
+        (len(design.requirements) for design in compiled), initial=0))
+    slots = bytes(slot for design in compiled
+                  for slot, _ in design.requirements)
+    amounts = [amount for design in compiled
+               for _, amount in design.requirements]
+    order = bytearray()
+    for design, compiled_design in zip(designs, compiled):
+        design_slots = [slot for slot, _ in compiled_design.requirements]
+        order.extend(design_slots.index(part.slot) for part in design.parts)
+    data = b''.join([
+        HEADER.pack(MAGIC, VERSION, key, len(designs)),
+        LENGTH.pack(len(names)), names, sizes,
+        struct.pack(f'<{len(designs)}Q',
+                    *(design.total_parts for design in designs)),
+        struct.pack(f'<{len(starts)}I', *starts),
+        slots,
+        struct.pack(f'<{len(amounts)}Q', *amounts),
+        order,
+    ])
+    return data + CRC.pack(zlib.crc32(data))
+
+
+def catalog_from_bytes(
+        key: bytes,
+        data: bytes) -> Tuple[List[Design], List[CompiledDesign]]:
+    """Return designs and their compiled forms from binary format.
+
+    The data must be cached under key.
+    """
+    if len(data) < HEADER.size + CRC.size or data[:4] != MAGIC:
+        raise ValueError('Not a Furniture Creator catalog.')
+    magic, version, data_key, count = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f'Unsupported catalog version: {version}.')
+    if data_key != key:
+        raise ValueError('Catalog was cached for different designs.')
+    (crc,) = CRC.unpack_from(data, len(data) - CRC.size)
+    if zlib.crc32(data[:-CRC.size]) != crc:
+        raise ValueError('Catalog is corrupt.')
+
+    try:
+        position = HEADER.size
+        (length,) = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        names = data[position:position + length].decode().split('\n') \
+            if count else []
+        position += length
+        sizes = data[position:position + count]
+        position += count
+        totals = struct.unpack_from(f'<{count}Q', data, position)
+        position += 8 * count
+        starts = struct.unpack_from(f'<{count + 1}I', data, position)
+        position += 4 * (count + 1)
+        parts = starts[-1]
+        slots = data[position:position + parts]
+        position += parts
+        amounts = struct.unpack_from(f'<{parts}Q', data, position)
+        position += 8 * parts
+        order = data[position:position + parts]
+        position += parts
+    except struct.error as error:
+        raise ValueError(f'Catalog is truncated: {error}.') from None
+    if position != len(data) - CRC.size or len(names) != count \
+            or len(slots) != parts or len(order) != parts \
+            or max(sizes, default=0) > 1 \
+            or max(slots, default=0) >= len(PARTS) \
+            or any(end < start for start, end in zip(starts, starts[1:])) \
+            or any(index >= end - start
+                   for start, end in zip(starts, starts[1:])
+                   for index in order[start:end]):
+        raise ValueError('Catalog is invalid.')
+
+    designs = []
+    compiled = []
+    for name, size, total, start, end in zip(names, sizes, totals, starts,
+                                             starts[1:]):
+        requirements = tuple(zip(slots[start:end], amounts[start:end]))
+        designs.append(Design(
+            name, PART_SIZES[size],
+            {PARTS[requirements[index][0]]: requirements[index][1]
+             for index in order[start:end]},
+            total))
+        compiled.append(CompiledDesign(PART_SIZES[size], total,
+                                       requirements))
+    return designs, compiled
+
+
+class CatalogCache:
+    """Loads and saves compiled design catalogs in a directory."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize cache in directory, which is created when needed."""
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: bytes) -> str:
+        """Return path of the catalog file cached under key."""
+        return os.path.join(self.directory, key.hex() + SUFFIX)
+
+    def load(
+            self,
+            key: bytes) -> Optional[Tuple[List[Design], List[CompiledDesign]]]:
+        """Return designs and their compiled forms cached under key.
+
+        Return None if they are not cached or invalid.
+        """
+        try:
+            with open(self.path(key), 'rb') as file:
+                catalog = catalog_from_bytes(key, file.read())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return catalog
+
+    def save(self,
+             key: bytes,
+             designs: Sequence[Design],
+             compiled: Sequence[CompiledDesign]) -> None:
+        """Write designs and compiled forms atomically under key.
+
+        Nothing is written if they can not be stored.
+        """
+        try:
+            data = catalog_to_bytes(key, designs, compiled)
+        except struct.error:
+            # Amounts of 2**64 and up are valid, but not cached.
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(
+            prefix='.catalog-', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary_path, self.path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def save_designs(self,
+                     design_repository: DesignRepository,
+                     design_strs: Sequence[str]) -> None:
+        """Add designs to repository from the cache, parsing on a miss.
+
+        Designs parsed on a miss are cached for the next run.
+        """
+        key = catalog_key(design_strs)
+        if (catalog := self.load(key)) is not None:
+            design_repository.add_all(*catalog)
+            return
+        for design_str in design_strs:
+            design_repository.save(design_str)
+        first = len(design_repository.catalog) - len(design_strs)
+        self.save(key, design_repository.catalog[first:],
+                  design_repository.compiled[first:])
@@ -0,0 +1,248 @@
+"""Furniture Creator's binary checkpoints of facility state.
+
+A checkpoint holds everything needed to continue processing an input from
+the part where it was taken: the input position, the stock in order of
+arrival, the order in which designs are considered for creation, the
+products created per design and the state of the random number generator.
+
+Binary format (little endian), version 2:
+- header: magic b'FCCP', format version (uint16);
+- input: byte offset and line number of the first part not processed, parts
+  read and products created (4 x uint64), CRC-32 of the designs (uint32);
+- stock: number of slots (uint8), then slot (uint8) and amount (uint64) per
+  slot in stock, in order of arrival;
+- design order: number of designs (uint32), then their ids (uint32);
+- products created: per design in order of id (uint32), absent in version 1;
+- random state: version (uint8), 625 state words (uint32), flag (uint8) and
+  value (double) of the pending Gaussian;
+- trailer: CRC-32 of all preceding bytes (uint32).
+"""
+
+from __future__ import annotations
+from typing import Any, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+import os
+import random
+import struct
+import tempfile
+import time
+import zlib
+
+from furniturecreator.dataclasses import Design, PARTS, SLOT_COUNT
+
+if TYPE_CHECKING:
+    from furniturecreator import FurnitureCreator
+
+MAGIC = b'FCCP'
+VERSION = 2
+VERSIONS = (1, 2)
+
+HEADER = struct.Struct('<4sH')
+INPUT = struct.Struct('<QQQQI')
+STOCK = struct.Struct('<BQ')
+COUNT_8 = struct.Struct('<B')
+COUNT_32 = struct.Struct('<I')
+RANDOM_STATE_WORDS = 625
+RANDOM = struct.Struct(f'<B{RANDOM_STATE_WORDS}IBd')
+CRC = struct.Struct('<I')
+
+
+def designs_crc(designs: Sequence[Design]) -> int:
+    """Return CRC-32 of the text format of designs."""
+    return zlib.crc32('\n'.join(map(str, designs)).encode())
+
+
+@dataclass
+class Checkpoint:
+    """State of a facility between two blocks of parts."""
+
+    offset: int = 0
+    line: int = 1
+    parts_read: int = 0
+    products_created: int = 0
+    designs_crc: int = 0
+    stock: List[Tuple[int, int]] = field(default_factory=list)
+    order: List[int] = field(default_factory=list)
+    produced: List[int] = field(default_factory=list)
+    random_state: Any = None
+
+    @classmethod
+    def capture(cls,
+                app: FurnitureCreator,
+                offset: int,
+                line: int) -> Checkpoint:
+        """Return checkpoint of app, continuing at input offset and line."""
+        part_repository = app.part_repository
+        design_repository = app.product_manager.design_repository
+        return cls(
+            offset=offset,
+            line=line,
+            parts_read=app.parts_read,
+            products_created=app.products_created,
+            designs_crc=designs_crc(design_repository.catalog),
+            stock=[(slot, part_repository.stock[slot])
+                   for slot in part_repository.slots_in_stock],
+            order=design_repository.order,
+            produced=list(design_repository.scheduler.produced),
+            random_state=random.getstate()
+        )
+
+    def restore(self, app: FurnitureCreator) -> None:
+        """Restore state into app with its designs saved and no stock."""
+        product_manager = app.product_manager
+        design_repository = product_manager.design_repository
+        if designs_crc(design_repository.catalog) != self.designs_crc:
+            raise ValueError('Checkpoint was taken with different designs.')
+        if product_manager.part_repository.sum_stock():
+            raise ValueError('Checkpoint can only be restored without stock.')
+        produced = self.produced or [0] * len(self.order)
+        try:
+            design_repository.scheduler.restore(self.order, produced)
+        except ValueError:
+            raise ValueError('Checkpoint design order is not valid.') from None
+
+        # Adding the stock in order of arrival rebuilds every stock index.
+        product_manager.track_designs()
+        for slot, amount in self.stock:
+            product_manager.part_repository.add(PARTS[slot], amount)
+        if self.random_state is not None:
+            random.setstate(self.random_state)
+        app.parts_read = self.parts_read
+        app.products_created = self.products_created
+
+    def to_bytes(self) -> bytes:
+        """Return binary format of the checkpoint."""
+        chunks = [
+            HEADER.pack(MAGIC, VERSION),
+            INPUT.pack(self.offset, self.line, self.parts_read,
+                       self.products_created, self.designs_crc),
+            COUNT_8.pack(len(self.stock)),
+        ]
+        chunks.extend(STOCK.pack(slot, amount) for slot, amount in self.stock)
+        chunks.append(COUNT_32.pack(len(self.order)))
+        chunks.append(struct.pack(f'<{len(self.order)}I', *self.order))
+        produced = self.produced or [0] * len(self.order)
+        chunks.append(struct.pack(f'<{len(produced)}I', *produced))
+        version, words, gauss = self.random_state or (
+            0, (0,) * RANDOM_STATE_WORDS, None)
+        chunks.append(RANDOM.pack(version, *words, gauss is not None,
+                                  gauss or 0.0))
+        data = b''.join(chunks)
+        return data + CRC.pack(zlib.crc32(data))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Checkpoint:
+        """Return checkpoint from its binary format."""
+        if len(data) < HEADER.size + CRC.size or data[:4] != MAGIC:
+            raise ValueError('Not a Furniture Creator checkpoint.')
+        magic, version = HEADER.unpack_from(data)
+        if version not in VERSIONS:
+            raise ValueError(f'Unsupported checkpoint version: {version}.')
+        format_version = version
+        (crc,) = CRC.unpack_from(data, len(data) - CRC.size)
+        if zlib.crc32(data[:-CRC.size]) != crc:
+            raise ValueError('Checkpoint is corrupt.')
+
+        try:
+            position = HEADER.size
+            offset, line, parts_read, products_created, design_crc = \
+                INPUT.unpack_from(data, position)
+            position += INPUT.size
+            (count,) = COUNT_8.unpack_from(data, position)
+            position += COUNT_8.size
+            stock = []
+            for _ in range(count):
+                slot, amount = STOCK.unpack_from(data, position)
+                if slot >= SLOT_COUNT:
+                    raise ValueError(f'Checkpoint slot out of range: {slot}.')
+                stock.append((slot, amount))
+                position += STOCK.size
+            (count,) = COUNT_32.unpack_from(data, position)
+            position += COUNT_32.size
+            order = list(struct.unpack_from(f'<{count}I', data, position))
+            position += count * COUNT_32.size
+            produced = []
+            if format_version > 1:
+                produced = list(
+                    struct.unpack_from(f'<{count}I', data, position))
+                position += count * COUNT_32.size
+            version, *words, has_gauss, gauss = \
+                RANDOM.unpack_from(data, position)
+            position += RANDOM.size
+        except struct.error as error:
+            raise ValueError(f'Checkpoint is truncated: {error}.') from None
+        if position != len(data) - CRC.size:
+            raise ValueError('Checkpoint has trailing data.')
+
+        random_state = None
+        if version:
+            random_state = (version, tuple(words),
+                            gauss if has_gauss else None)
+        return cls(offset, line, parts_read, products_created, design_crc,
+                   stock, order, produced, random_state)
+
+    def save(self, path: str) -> None:
+        """Write checkpoint to path atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporary_path = tempfile.mkstemp(
+            prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(self.to_bytes())
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> Checkpoint:
+        """Read checkpoint from path."""
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+class Checkpointer:
+    """Decides when checkpoints are due and writes them to a path.
+
+    A checkpoint is due every parts parts or every interval seconds, checked
+    between blocks of parts. Zero disables either condition.
+    """
+
+    def __init__(self,
+                 path: str,
+                 parts: int = 0,
+                 interval: float = 0.0) -> None:
+        """Initialize checkpointer for path."""
+        if parts < 0 or interval < 0:
+            raise ValueError('Checkpoint parts and interval should be '
+                             'positive.')
+        self.path = path
+        self.parts = parts
+        self.interval = interval
+        self.last_parts = 0
+        self.last_time = time.monotonic()
+        self.saved = 0
+
+    def due(self, parts_read: int) -> bool:
+        """Return whether a checkpoint is due after parts_read parts."""
+        if self.parts and parts_read - self.last_parts >= self.parts:
+            return True
+        return bool(self.interval) \
+            and time.monotonic() - self.last_time >= self.interval
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        """Write checkpoint and restart the intervals."""
+        checkpoint.save(self.path)
+        self.last_parts = checkpoint.parts_read
+        self.last_time = time.monotonic()
+        self.saved += 1
+
+    def load(self) -> Optional[Checkpoint]:
+        """Return the last checkpoint written, or None if there is none."""
+        if not os.path.exists(self.path):
+            return None
+        checkpoint = Checkpoint.load(self.path)
+        self.last_parts = checkpoint.parts_read
+        return checkpoint
@@ -1,32 +1,159 @@
-"""Furniture Creator's dataclasses."""
+"""Furniture Creator's dataclasses.
+
+The classes are written out on a small Record base instead of being
+generated by the dataclasses module, which takes longer to import than the
+rest of the package.
+"""
 
 from __future__ import annotations
-from typing import Dict
-from dataclasses import dataclass
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, Tuple
+
+# Every Part maps onto one of 52 stock slots: small parts 'a'-'z' occupy slots
+# 0-25 and large parts 'a'-'z' occupy slots 26-51.
+PART_TYPES = 'abcdefghijklmnopqrstuvwxyz'
+PART_SIZES = 'SL'
+SLOT_COUNT = len(PART_TYPES) * len(PART_SIZES)
+# The shared Parts by text format, filled as they are created (see Part).
+PARTS_BY_CODE: Dict[str, Part] = {}
+
+
+class Record:
+    """Value object compared and represented by its fields."""
+
+    __slots__ = ()
+    fields: Tuple[str, ...] = ()
+
+    def values(self) -> Tuple[Any, ...]:
+        """Return the values of the fields."""
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare fields with a record of the same class."""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.values() == other.values()  # type: ignore
+
+    def __repr__(self) -> str:
+        """Output class name and fields (eg. "Part(type='a', size='S')")."""
+        fields = ', '.join(f'{name}={getattr(self, name)!r}'
+                           for name in self.fields)
+        return f'{self.__class__.__name__}({fields})'
+
+
+class FrozenRecord(Record):
+    """Record that can not be changed after initialization, and is hashable.
 
-@dataclass(frozen=True)
-class Part:
-    """Part for creating Products from multiple Parts."""
+    Fields are set in __init__() with object.__setattr__().
+    """
 
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Refuse to change a field."""
+        raise AttributeError(f'cannot assign to field {name!r}')
+
+    def __delattr__(self, name: str) -> None:
+        """Refuse to delete a field."""
+        raise AttributeError(f'cannot delete field {name!r}')
+
+    def __hash__(self) -> int:
+        """Return hash of the fields."""
+        return hash(self.values())
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Unpickle by initializing with the fields."""
+        return (self.__class__, self.values())
+
+
+class Part(FrozenRecord):
+    """Part for creating Products from multiple Parts.
+
+    Only 52 different parts exist, each created once: Part() returns the
+    shared instance, which is also available in PARTS by slot and in
+    PARTS_BY_CODE by text format. The stock slot index (eg. 'aS' -> 0) and
+    the hash are computed once on creation.
+    """
+
+    __slots__ = ('type', 'size', 'slot', 'hash_value')
+    fields = ('type', 'size')
     type: str
     size: str
+    slot: int
+    hash_value: int
+
+    def __new__(cls, type: str, size: str) -> Part:
+        """Return the shared Part of type and size, creating it once."""
+        if (len(type) != 1 or type not in PART_TYPES
+                or len(size) != 1 or size not in PART_SIZES):
+            raise ValueError(f'Incorrect part (\'{type}\', \'{size}\').')
+        if part := PARTS_BY_CODE.get(type + size):
+            return part
+        part = super().__new__(cls)
+        object.__setattr__(part, 'type', type)
+        object.__setattr__(part, 'size', size)
+        object.__setattr__(
+            part, 'slot',
+            PART_SIZES.index(size) * len(PART_TYPES) + PART_TYPES.index(type)
+        )
+        object.__setattr__(part, 'hash_value', hash((type, size)))
+        PARTS_BY_CODE[type + size] = part
+        return part
+
+    def __eq__(self, other: object) -> bool:
+        """Compare slots, which follow from type and size."""
+        if other.__class__ is not Part:
+            return NotImplemented
+        return self.slot == other.slot  # type: ignore
+
+    def __hash__(self) -> int:
+        """Return the precomputed hash."""
+        return self.hash_value
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Unpickle into the shared instance of this Part."""
+        return (Part.from_slot, (self.slot,))
 
     def __str__(self) -> str:
         """Output readable representation (eg. 'aS')."""
         return f'{self.type}{self.size}'
 
+    @staticmethod
+    def from_slot(slot: int) -> Part:
+        """Return the shared Part belonging to a stock slot index."""
+        return PARTS[slot]
 
-@dataclass
-class Product:
-    """Product consisting of multiple Parts, based on Design."""
 
-    name: str
-    size: str
-    parts: Dict[Part, int]
+PARTS: Tuple[Part, ...] = tuple(
+    Part(part_type, size) for size in PART_SIZES for part_type in PART_TYPES)
+
+
+class Product(Record):
+    """Product consisting of multiple Parts, based on Design.
+
+    A product created by ProductManager holds its text format rendered by
+    the ProductRenderer of its design. It is not compared or represented.
+    """
+
+    fields = ('name', 'size', 'parts')
+
+    def __init__(self,
+                 name: str,
+                 size: str,
+                 parts: Dict[Part, int],
+                 rendered: str = '') -> None:
+        """Initialize product of name and size from parts."""
+        self.name = name
+        self.size = size
+        self.parts = parts
+        self.rendered = rendered
 
     def __str__(self) -> str:
         """Output readable representation (eg. '[Name]S1a2b3c')."""
+        if self.rendered:
+            return self.rendered
         parts = ''.join(
             '{}{}'.format(amount, part.type)
             for part, amount in
@@ -37,17 +164,30 @@ class Product:
     def add_part(self, part: Part, amount: int = 1):
         """Add a Part to the Product."""
         self.parts[part] = self.parts.get(part, 0) + amount
+        self.rendered = ''
 
 
-@dataclass(frozen=True)
-class Design:
+class Design(FrozenRecord):
     """Design to produce Products by these Designs."""
 
+    __slots__ = ('name', 'size', 'parts', 'total_parts')
+    fields = __slots__
     name: str
     size: str
     parts: Dict[Part, int]
     total_parts: int
 
+    def __init__(self,
+                 name: str,
+                 size: str,
+                 parts: Dict[Part, int],
+                 total_parts: int) -> None:
+        """Initialize design of name and size from parts and total parts."""
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'size', size)
+        object.__setattr__(self, 'parts', parts)
+        object.__setattr__(self, 'total_parts', total_parts)
+
     def __str__(self) -> str:
         """Output readable representation (eg. '[Name]S1a2b3c10')."""
         parts = ''.join(
@@ -56,3 +196,31 @@ class Design:
                 sorted(self.parts.items(), key=lambda x: x[0].type)
         )
         return f'[{self.name}]{self.size}{parts}{self.total_parts}'
+
+
+class CompiledDesign(FrozenRecord):
+    """Design compiled into stock slot requirements for fast stock checks.
+
+    Requirements are (slot, amount) pairs in slot order (see Part.slot).
+    """
+
+    __slots__ = ('size', 'total_parts', 'requirements')
+    fields = __slots__
+    size: str
+    total_parts: int
+    requirements: Tuple[Tuple[int, int], ...]
+
+    def __init__(self,
+                 size: str,
+                 total_parts: int,
+                 requirements: Tuple[Tuple[int, int], ...]) -> None:
+        """Initialize compiled design of size from its requirements."""
+        object.__setattr__(self, 'size', size)
+        object.__setattr__(self, 'total_parts', total_parts)
+        object.__setattr__(self, 'requirements', requirements)
+
+    @classmethod
+    def from_design(cls, design: Design) -> CompiledDesign:
+        """Compile design."""
+        return cls(design.size, design.total_parts, tuple(sorted(
+            (part.slot, amount) for part, amount in design.parts.items())))
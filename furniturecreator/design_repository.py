@@ -1,33 +1,60 @@
 """Furniture Creator's product design repository."""
 
 from __future__ import annotations
-from typing import Set, List, Dict
-import re
 
-from furniturecreator.dataclasses import Part, Design
+from furniturecreator.dataclasses import Part, Design, CompiledDesign, \
+                                        PARTS, PARTS_BY_CODE
+from furniturecreator.product_renderer import ProductRenderer
+from furniturecreator.design_scheduler import DesignScheduler
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Set, List, Dict, Iterator, Optional, \
+        Sequence
+    from furniturecreator.shared_catalog import SharedDesigns
 
 
 class DesignRepository:
     """Processes and tracks product designs."""
 
-    def __init__(self) -> None:
-        """Initialize empty design list and parts set."""
-        self.designs: List[Design] = []
+    def __init__(self,
+                 policy: str = 'round-robin',
+                 weights: Optional[Dict[str, float]] = None) -> None:
+        """Initialize empty design catalog and parts set.
+
+        The catalog keeps designs in order of addition, their position being
+        the design id, along with its compiled form and its renderer. The
+        scheduler decides the order in which designs are considered for
+        creation by policy (see DesignScheduler), with weights or priorities
+        per design name, 1 by default.
+
+        Designs added are stored in lists of the repository. The designs of
+        a shared catalog are read through its views instead (see share()).
+        """
+        self.design_list: List[Design] = []
+        self.compiled_list: List[CompiledDesign] = []
+        self.renderer_list: List[ProductRenderer] = []
+        self.catalog: Sequence[Design] = self.design_list
+        self.compiled: Sequence[CompiledDesign] = self.compiled_list
+        self.renderers: Sequence[ProductRenderer] = self.renderer_list
+        self.shared: Optional[SharedDesigns] = None
+        self.scheduler = DesignScheduler(policy)
+        self.weights = weights or {}
         self.parts_in_designs: Set[Part] = set()
-        self.index = 0
 
-    def __iter__(self) -> DesignRepository:
-        """Return self as Iterator object."""
-        return self
+    def __iter__(self) -> Iterator[Design]:
+        """Return iterator over designs in the order they are considered."""
+        return (self.catalog[design_id] for design_id in self.scheduler)
+
+    @property
+    def order(self) -> List[int]:
+        """Return all design ids in the order they are considered."""
+        return self.scheduler.order
 
-    def __next__(self) -> Design:
-        """Return the next Design from DesignRepository list."""
-        if self.index < len(self.designs):
-            result = self.designs[self.index]
-            self.index += 1
-            return result
-        self.index = 0
-        raise StopIteration
+    @property
+    def designs(self) -> List[Design]:
+        """Return all designs in the order they are considered for creation."""
+        return list(self)
 
     def save(self, design_str: str) -> None:
         """Pass design into parser and store result internally."""
@@ -35,37 +62,105 @@ class DesignRepository:
         self.add(design)
 
     def parse_design(self, design_str: str) -> Design:
-        """Parse and convert design string into a Design object."""
-        if not (match := re.match(
-            r'^\[(.+)\]([SL])((?:\d+[a-z])+)(\d+)$',
-            design_str
-        )):
+        """Parse and convert design string into a Design object.
+
+        The format is '[Name]', size, amounts and types of the parts and the
+        total amount of parts (eg. '[Chair]S1a2b5'). It is scanned without
+        regular expressions, as the re module is slow to import.
+        """
+        # The name ends at the last ']', none can follow in the format.
+        end = design_str.rfind(']')
+        size = design_str[end + 1:end + 2]
+        rest = design_str[end + 2:]
+        total_start = len(rest)
+        while total_start and rest[total_start - 1].isdecimal():
+            total_start -= 1
+        parts_str = rest[:total_start]
+        if (end < 2 or design_str[0] != '[' or '\n' in design_str
+                or size not in ('S', 'L') or total_start == len(rest)
+                or not self.is_parts_format(parts_str)):
             raise ValueError(
                 f'Incorrect design format (\'{design_str}\').')
 
-        name = match.group(1)
-        size = match.group(2)
-        parts_str = match.group(3)
-        total_parts = int(match.group(4))
+        name = design_str[1:end]
+        total_parts = int(rest[total_start:])
 
         parts = self.parse_parts(parts_str, size)
 
         return Design(name, size, parts, total_parts)
 
+    def is_parts_format(self, parts_str: str) -> bool:
+        """Check string consists of amounts and types of parts only."""
+        digits = 0
+        for character in parts_str:
+            if character.isdecimal():
+                digits += 1
+            elif digits and 'a' <= character <= 'z':
+                digits = 0
+            else:
+                return False
+        return bool(parts_str) and not digits
+
     def parse_parts(self, parts_str: str, size: str) -> Dict[Part, int]:
-        """Parse string of parts and convert it into a Dict of Part objects."""
+        """Parse string of parts and convert it into a Dict of Part objects.
+
+        Every amount directly followed by a part type is a part, other
+        characters are skipped.
+        """
         parts = {}
-        for part_match in re.finditer(r'(\d+[a-z])', parts_str):
-            part_type = part_match.group(1)[-1:]
-            part_amount = int(part_match.group(1)[:-1])
-            parts[Part(part_type, size)] = part_amount
+        start = 0
+        for position, character in enumerate(parts_str):
+            if character.isdecimal():
+                continue
+            if position > start and 'a' <= character <= 'z':
+                part_amount = int(parts_str[start:position])
+                parts[PARTS_BY_CODE[character + size]] = part_amount
+            start = position + 1
 
         return parts
 
     def add(self, design: Design) -> None:
         """Add design and its parts to internal list."""
-        self.add_parts(design.parts)
-        self.designs.append(design)
+        self.add_compiled(design, CompiledDesign.from_design(design))
+
+    def add_compiled(self, design: Design, compiled: CompiledDesign) -> None:
+        """Add design, compiled already, and its parts to internal list."""
+        self.add_all([design], [compiled])
+
+    def add_all(self,
+                designs: Sequence[Design],
+                compiled: Sequence[CompiledDesign]) -> None:
+        """Add designs, compiled already, and their parts to internal list.
+
+        The compiled designs are taken as they are, like those of a cached
+        catalog (see CatalogCache).
+        """
+        if self.shared is not None:
+            raise ValueError('Designs can not be added to a shared catalog.')
+        for design in designs:
+            self.add_parts(design.parts)
+            self.scheduler.add(self.weights.get(design.name, 1.0))
+        self.design_list.extend(designs)
+        self.compiled_list.extend(compiled)
+        self.renderer_list.extend(map(ProductRenderer, designs, compiled))
+
+    def share(self, designs: SharedDesigns) -> None:
+        """Use the designs of a shared catalog as the catalog.
+
+        Only the scheduler state is kept per repository, the designs are read
+        through the views of the shared catalog. Only an empty repository
+        can share a catalog, and no designs can be added to it afterwards.
+        """
+        if self.catalog:
+            raise ValueError('Only an empty repository can share designs.')
+        for name in designs.design_names:
+            self.scheduler.add(self.weights.get(name, 1.0))
+        self.parts_in_designs.update(
+            PARTS[slot] for slot in set(designs.slots))
+        self.catalog = designs.catalog
+        self.compiled = designs.compiled
+        self.renderers = designs.renderers
+        self.shared = designs
 
     def add_parts(self, parts: Dict[Part, int]) -> None:
         """Add parts to internal list."""
@@ -75,10 +170,3 @@ class DesignRepository:
     def get_parts_in_designs(self) -> Set[Part]:
         """Get all parts in designs."""
         return self.parts_in_designs
-
-    def select_design_for_creation(self) -> Design:
-        """Return product design, reset iter and move design to end of list."""
-        design = self.designs[self.index - 1]
-        self.designs.append(self.designs.pop(self.index - 1))
-        self.index = 0
-        return design
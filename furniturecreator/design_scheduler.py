@@ -0,0 +1,112 @@
+"""Furniture Creator's design scheduler."""
+
+from __future__ import annotations
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Iterable, Iterator, List, Sequence
+
+POLICIES = ('round-robin', 'weighted', 'priority')
+
+
+class DesignScheduler:
+    """Decides in which order designs are considered for creation.
+
+    Every design has a key; of the designs that can be created, the design
+    with the lowest key is selected. A design is rotated when a product is
+    created from it, which gives it a new sequence number, higher than that
+    of every other design, and updates its key. Keys per policy:
+    - round-robin: the sequence number, so designs take turns;
+    - weighted: products created divided by the weight of the design, then
+      the sequence number, so designs take turns in proportion to weight;
+    - priority: the negated weight, as priority, then the sequence number,
+      so designs with a higher priority go first and take turns otherwise.
+    Designs are identified by their position in the design catalog. Only the
+    key of the rotated design changes, so selection from a heap of keys takes
+    O(log D) time (see DesignTracker.select_design_id()).
+    """
+
+    def __init__(self, policy: str = 'round-robin') -> None:
+        """Initialize empty scheduler with policy."""
+        if policy not in POLICIES:
+            raise ValueError(f'''Wrong scheduling policy supplied: {policy}.
+                Should be either of: {', '.join(POLICIES)}.''')
+        self.policy = policy
+        self.keys: List[Any] = []
+        self.sequences: List[int] = []
+        self.produced: List[int] = []
+        self.weights: List[float] = []
+        self.sequence = 0
+
+    def __len__(self) -> int:
+        """Return number of designs scheduled."""
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[int]:
+        """Return iterator over design ids in the order of their keys.
+
+        The order is taken when iteration starts, so iterations can be
+        nested and rotating designs does not affect running iterations.
+        """
+        return iter(sorted(range(len(self.keys)),
+                           key=self.keys.__getitem__))
+
+    @property
+    def order(self) -> List[int]:
+        """Return all design ids in the order they are considered."""
+        return list(self)
+
+    def add(self, weight: float = 1.0) -> int:
+        """Schedule a new design after all others and return its id."""
+        if weight <= 0 and self.policy == 'weighted':
+            raise ValueError('Design weight should be positive.')
+        design_id = len(self.keys)
+        self.sequences.append(self.next_sequence())
+        self.produced.append(0)
+        self.weights.append(weight)
+        self.keys.append(self.key(design_id))
+        return design_id
+
+    def key(self, design_id: int) -> Any:
+        """Return the key of design by the policy."""
+        sequence = self.sequences[design_id]
+        if self.policy == 'weighted':
+            return (self.produced[design_id] / self.weights[design_id],
+                    sequence)
+        if self.policy == 'priority':
+            return (-self.weights[design_id], sequence)
+        return sequence
+
+    def next_sequence(self) -> int:
+        """Return the next sequence number."""
+        sequence = self.sequence
+        self.sequence += 1
+        return sequence
+
+    def rotate(self, design_id: int) -> None:
+        """Register a product created from design and update its key."""
+        self.sequences[design_id] = self.next_sequence()
+        self.produced[design_id] += 1
+        self.keys[design_id] = self.key(design_id)
+
+    def select(self, design_ids: Iterable[int]) -> int:
+        """Return the first of the given designs and rotate it."""
+        try:
+            design_id = min(design_ids, key=self.keys.__getitem__)
+        except (ValueError, IndexError):
+            raise ValueError(
+                'None of the given designs are in the scheduler.') from None
+        self.rotate(design_id)
+        return design_id
+
+    def restore(self, order: Sequence[int], produced: Sequence[int]) -> None:
+        """Restore the order of all designs and their products created."""
+        if sorted(order) != list(range(len(self.keys))) \
+                or len(produced) != len(self.keys):
+            raise ValueError('Order and products created should be given '
+                             'for every design.')
+        self.sequence = 0
+        for design_id in order:
+            self.sequences[design_id] = self.next_sequence()
+        self.produced[:] = produced
+        self.keys[:] = map(self.key, range(len(self.keys)))
@@ -0,0 +1,271 @@
+"""Furniture Creator's incremental design readiness tracker."""
+
+from __future__ import annotations
+from bisect import bisect_right
+from heapq import heappop, heappush
+
+from furniturecreator.dataclasses import CompiledDesign, PARTS, SLOT_COUNT
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.design_scheduler import DesignScheduler
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Counter, List, Dict, Optional, Sequence, Tuple
+
+# Selection state of a design: not complete, candidate for selection, or
+# complete but waiting for enough parts of its size in stock.
+INCOMPLETE, CANDIDATE, WAITING = range(3)
+
+
+class DesignTracker:
+    """Tracks for every design how many of its parts are short in stock.
+
+    Designs are identified by their position in the design catalog. For every
+    stock slot a watch index lists the designs using that slot, grouped by the
+    amount they require, so a change in stock only visits the designs whose
+    requirement is crossed by that change.
+
+    Designs of which all part requirements are met are kept per size in a
+    heap by their scheduler key, while those needing more parts of their
+    size than are in stock wait in a heap by total amount of parts, so
+    selection never visits designs of the other size. Heap entries are
+    checked against the current state and key of their design when they
+    reach the top, so selecting and rotating a design takes O(log D)
+    amortized time. A design has at most one entry in the waiting heap,
+    which stays valid as its total never changes.
+    """
+
+    def __init__(self,
+                 part_repository: PartRepository,
+                 scheduler: Optional[DesignScheduler] = None) -> None:
+        """Initialize empty indexes and start observing stock changes.
+
+        Without a scheduler, designs are scheduled round-robin in order of
+        tracking.
+        """
+        self.part_repository = part_repository
+        self.scheduler = \
+            DesignScheduler() if scheduler is None else scheduler
+        # Size and total parts per design, in lists of the tracker unless
+        # read from a shared catalog (see share()).
+        self.size_list: List[str] = []
+        self.total_list: List[int] = []
+        self.sizes: Sequence[str] = self.size_list
+        self.totals: Sequence[int] = self.total_list
+        # Number of part requirements not met by current stock, per design.
+        self.missing: List[int] = []
+        # Per slot: required amount -> ids of designs requiring that amount,
+        # and the sorted list of those amounts.
+        self.watchers: List[Dict[int, List[int]]] = [
+            {} for _ in range(SLOT_COUNT)]
+        self.thresholds: List[List[int]] = [[] for _ in range(SLOT_COUNT)]
+        # Per size, heaps of (key, design id) and (total parts, design id),
+        # and per design its selection state, the key of its entry in the
+        # candidate heap, None if it has none, and whether it has an entry in
+        # the waiting heap.
+        self.candidates: Dict[str, List[Tuple[Any, int]]] = {
+            'S': [], 'L': []}
+        self.waiting: Dict[str, List[Tuple[int, int]]] = {'S': [], 'L': []}
+        self.state: List[int] = []
+        self.entry_keys: List[Any] = []
+        self.in_waiting: List[bool] = []
+        # Counts 'design checks' (designs of which a requirement is crossed
+        # by a stock change) and 'heap pops' when set (see Stats).
+        self.counters: Optional[Counter[str]] = None
+        part_repository.add_observer(self)
+
+    def __len__(self) -> int:
+        """Return the number of tracked designs."""
+        return len(self.missing)
+
+    def track(self, designs: Sequence[CompiledDesign]) -> None:
+        """Start tracking designs of the catalog that are not tracked yet."""
+        for design in designs[len(self):]:
+            self.add(design)
+
+    def share(self, sizes: Sequence[str], totals: Sequence[int]) -> None:
+        """Read size and total parts of designs from a shared catalog.
+
+        Only an empty tracker can share them, the designs tracked next must
+        be those of the shared catalog, in order.
+        """
+        if len(self):
+            raise ValueError('Only an empty tracker can share designs.')
+        self.sizes = sizes
+        self.totals = totals
+
+    def add(self, design: CompiledDesign) -> int:
+        """Start tracking a compiled design and return its id."""
+        design_id = len(self)
+        if self.sizes is self.size_list:
+            self.size_list.append(design.size)
+            self.total_list.append(design.total_parts)
+        self.state.append(INCOMPLETE)
+        self.entry_keys.append(None)
+        self.in_waiting.append(False)
+        if len(self.scheduler) <= design_id:
+            self.scheduler.add()
+
+        missing = 0
+        for slot, amount in design.requirements:
+            watchers = self.watchers[slot]
+            if amount not in watchers:
+                watchers[amount] = []
+                self.thresholds[slot].insert(
+                    bisect_right(self.thresholds[slot], amount), amount)
+            watchers[amount].append(design_id)
+            if self.part_repository.stock[slot] < amount:
+                missing += 1
+
+        self.missing.append(missing)
+        if not missing:
+            self.set_complete(design_id)
+        return design_id
+
+    def stock_changed(self, slot: int, old: int, new: int) -> None:
+        """Update designs whose requirement for slot is crossed by change."""
+        thresholds = self.thresholds[slot]
+        if not thresholds:
+            return
+        watchers = self.watchers[slot]
+        missing = self.missing
+        if new > old:
+            first = bisect_right(thresholds, old)
+            last = bisect_right(thresholds, new)
+            for amount in thresholds[first:last]:
+                for design_id in watchers[amount]:
+                    missing[design_id] -= 1
+                    if not missing[design_id]:
+                        self.set_complete(design_id)
+        else:
+            first = bisect_right(thresholds, new)
+            last = bisect_right(thresholds, old)
+            for amount in thresholds[first:last]:
+                for design_id in watchers[amount]:
+                    if not missing[design_id]:
+                        self.set_incomplete(design_id)
+                    missing[design_id] += 1
+        if self.counters is not None:
+            self.counters['design checks'] += sum(
+                len(watchers[amount]) for amount in thresholds[first:last])
+
+    def set_complete(self, design_id: int) -> None:
+        """Mark design as having all its part requirements met."""
+        self.state[design_id] = CANDIDATE
+        if self.entry_keys[design_id] is None:
+            self.push_candidate(design_id)
+
+    def set_incomplete(self, design_id: int) -> None:
+        """Mark design as no longer having all its requirements met."""
+        # Its heap entries are dropped when they reach the top.
+        self.state[design_id] = INCOMPLETE
+
+    def push_candidate(self, design_id: int) -> None:
+        """Add entry for design with its current key to the candidates."""
+        key = self.scheduler.keys[design_id]
+        self.entry_keys[design_id] = key
+        heappush(self.candidates[self.sizes[design_id]], (key, design_id))
+
+    def select_design_id(self) -> Optional[int]:
+        """Select and rotate the first design that can be created, if any."""
+        best = None
+        for size in self.candidates:
+            top = self.get_first_candidate(size)
+            if top is not None and (best is None or top < best):
+                best = top
+        if best is None:
+            return None
+        design_id = best[1]
+        self.scheduler.rotate(design_id)
+        # Replaces the entry with the old key, which is dropped at the top.
+        self.push_candidate(design_id)
+        return design_id
+
+    def get_first_candidate(self, size: str) -> Optional[Tuple[Any, int]]:
+        """Return heap entry of the first design of size ready for creation.
+
+        Entries on top of the heaps are settled until the top candidate is
+        complete, has its current key and enough parts of its size in stock.
+        """
+        candidates = self.candidates[size]
+        waiting = self.waiting[size]
+        total = self.part_repository.total_per_size[size]
+        state = self.state
+        entry_keys = self.entry_keys
+        in_waiting = self.in_waiting
+        pops = 0
+
+        while waiting and waiting[0][0] <= total:
+            design_id = heappop(waiting)[1]
+            pops += 1
+            in_waiting[design_id] = False
+            if state[design_id] == WAITING:
+                state[design_id] = CANDIDATE
+                self.push_candidate(design_id)
+
+        top = None
+        while candidates:
+            key, design_id = candidates[0]
+            if key != entry_keys[design_id]:
+                # Replaced by an entry with a newer key.
+                heappop(candidates)
+            elif state[design_id] != CANDIDATE:
+                heappop(candidates)
+                entry_keys[design_id] = None
+            elif key != self.scheduler.keys[design_id]:
+                # Rotated by the scheduler directly.
+                heappop(candidates)
+                self.push_candidate(design_id)
+            elif self.totals[design_id] > total:
+                heappop(candidates)
+                entry_keys[design_id] = None
+                state[design_id] = WAITING
+                if not in_waiting[design_id]:
+                    in_waiting[design_id] = True
+                    heappush(waiting, (self.totals[design_id], design_id))
+            else:
+                top = candidates[0]
+                break
+            pops += 1
+        if self.counters is not None:
+            self.counters['heap pops'] += pops
+        return top
+
+    def parts_until_ready(self, slot: int) -> Optional[int]:
+        """Return how many parts of slot make a design creatable, if any.
+
+        This is the amount of parts of slot that, added one at a time,
+        first makes any design creatable, without parts of other slots
+        arriving; at least one. None if no amount of parts of slot does.
+        """
+        # A design of either size creatable already is created after the
+        # first part.
+        for candidate_size in self.candidates:
+            if self.get_first_candidate(candidate_size) is not None:
+                return 1
+        size = PARTS[slot].size
+        stock = self.part_repository.stock[slot]
+        total = self.part_repository.total_per_size[size]
+        best = None
+        # Without candidates, all complete designs of size wait for enough
+        # parts of their size, the first in the heap waits for the fewest.
+        waiting = self.waiting[size]
+        while waiting and self.state[waiting[0][1]] != WAITING:
+            self.in_waiting[heappop(waiting)[1]] = False
+            if self.counters is not None:
+                self.counters['heap pops'] += 1
+        if waiting:
+            best = waiting[0][0] - total
+        # Designs only missing their requirement for slot, from the lowest.
+        thresholds = self.thresholds[slot]
+        watchers = self.watchers[slot]
+        for amount in thresholds[bisect_right(thresholds, stock):]:
+            if best is not None and amount - stock >= best:
+                break
+            for design_id in watchers[amount]:
+                if self.missing[design_id] == 1:
+                    parts = max(amount - stock,
+                                self.totals[design_id] - total)
+                    if best is None or parts < best:
+                        best = parts
+        return best
@@ -0,0 +1,288 @@
+"""Furniture Creator's append-only part journal.
+
+The journal makes the parts processed since the last checkpoint durable. It
+starts with a header and holds one byte per record, except for runs:
+- 0-51: a part, by its stock slot (see Part.slot);
+- RUN: a run of parts (see PartRun), followed by its slot and its amount in
+  base 64 digits of 0x40-0x7F, most significant first;
+- PRODUCT: a product was created from the block of parts or the run before
+  it;
+- COMMIT: all records before it have been written and synced.
+
+The digits of a run keep clear of the other records, so groups can be split
+at their commit records. Version 1 journals hold no runs.
+
+Records are buffered and committed in groups, every commit_parts parts or
+commit_interval seconds, checked between blocks of parts. A commit flushes
+the products written before it, then writes and syncs the group.
+
+Header (little endian): magic b'FCJL', format version (uint16), parts read
+at the checkpoint the journal continues (uint64) and CRC-32 of the designs
+(uint32).
+
+Run the replay tool with:
+python -m furniturecreator replay --checkpoint PATH --journal PATH INPUT
+"""
+
+from __future__ import annotations
+from typing import BinaryIO, List, Optional, Sequence, Tuple, \
+    TYPE_CHECKING
+from dataclasses import dataclass, field
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+
+from furniturecreator.dataclasses import PARTS
+from furniturecreator.part_parser import PartRun
+
+if TYPE_CHECKING:
+    from furniturecreator import FurnitureCreator
+    from furniturecreator.part_parser import Codes
+
+MAGIC = b'FCJL'
+VERSION = 2
+HEADER = struct.Struct('<4sHQI')
+
+PRODUCT = 0xFF
+COMMIT = 0xFE
+RUN = 0xFD
+DIGIT = 0x40
+# A run or a block of part records, followed by the product markers of it.
+BLOCK_RECORDS = re.compile(
+    rb'(?:\xfd([\x00-\x33])([\x40-\x7f]+)|([\x00-\x33]*))(\xff*)')
+
+
+@dataclass
+class JournalTail:
+    """Committed records of a journal, as blocks of part codes."""
+
+    base: int
+    designs_crc: int
+    blocks: List[Tuple[Codes, int]] = field(default_factory=list)
+
+    @property
+    def parts(self) -> int:
+        """Return number of parts in the journal."""
+        return sum(len(codes) for codes, _ in self.blocks)
+
+    @classmethod
+    def read(cls, path: str) -> Optional[JournalTail]:
+        """Return committed records of journal at path, None if missing.
+
+        Records after the last commit were not synced and are ignored.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            raise ValueError('Not a Furniture Creator journal.')
+        magic, version, base, designs_crc = HEADER.unpack_from(data)
+        if version not in (1, VERSION):
+            raise ValueError(f'Unsupported journal version: {version}.')
+
+        tail = cls(base, designs_crc)
+        records = data[HEADER.size:data.rfind(bytes([COMMIT])) + 1]
+        for group in records.split(bytes([COMMIT]))[:-1]:
+            position = 0
+            for match in BLOCK_RECORDS.finditer(group):
+                if match.start() != position:
+                    raise ValueError('Journal holds an invalid record.')
+                if match.end() > position:
+                    codes: Codes = match.group(3)
+                    if match.group(1) is not None:
+                        codes = PartRun(match.group(1)[0],
+                                        decode_amount(match.group(2)))
+                    tail.blocks.append((codes, len(match.group(4))))
+                position = match.end()
+        return tail
+
+
+def encode_amount(amount: int) -> bytes:
+    """Return amount of a run record as base 64 digits."""
+    digits = bytearray()
+    while amount:
+        amount, digit = divmod(amount, 64)
+        digits.append(DIGIT + digit)
+    return bytes(reversed(digits))
+
+
+def decode_amount(digits: bytes) -> int:
+    """Return amount of a run record from its base 64 digits."""
+    amount = 0
+    for digit in digits:
+        amount = amount * 64 + digit - DIGIT
+    return amount
+
+
+def replay(app: FurnitureCreator, tail: JournalTail) -> None:
+    """Create the products of the journal tail in app without output.
+
+    Products are created without rendering them; the number created from
+    every block of parts must match the product markers of that block.
+    """
+    from furniturecreator.checkpoint import designs_crc
+
+    product_manager = app.product_manager
+    if designs_crc(product_manager.design_repository.catalog) != \
+            tail.designs_crc:
+        raise ValueError('Journal was written with different designs.')
+
+    engine = None
+    if app.batch_size:
+        from furniturecreator.batch_engine import BatchEngine
+        engine = BatchEngine(product_manager, app.batch_size)
+    add = app.part_repository.add
+    create_product = product_manager.create_product
+    product_manager.rendering = False
+    try:
+        for codes, products in tail.blocks:
+            if isinstance(codes, PartRun):
+                created = sum(1 for _ in product_manager.add_run(
+                    PARTS[codes.code], codes.amount))
+            elif engine:
+                created = sum(1 for _ in engine.process(codes))
+            else:
+                created = 0
+                for code in codes:
+                    add(PARTS[code])
+                    if create_product():
+                        created += 1
+            if created != products:
+                raise ValueError(
+                    f'Journal replay created {created} products where '
+                    f'{products} were journaled.')
+            app.parts_read += len(codes)
+            app.products_created += created
+    finally:
+        product_manager.rendering = True
+
+
+class Journal:
+    """Appends part and product records to a journal file."""
+
+    def __init__(self,
+                 path: str,
+                 commit_parts: int = 1 << 16,
+                 commit_interval: float = 0.0) -> None:
+        """Initialize journal for path, committing by parts or interval."""
+        if commit_parts < 0 or commit_interval < 0:
+            raise ValueError('Journal commit parts and interval should be '
+                             'positive.')
+        self.path = path
+        self.commit_parts = commit_parts
+        self.commit_interval = commit_interval
+        self.records = bytearray()
+        self.pending_parts = 0
+        self.last_commit = time.monotonic()
+        self.file: Optional[BinaryIO] = None
+        self.commits = 0
+
+    def reset(self, base: int, designs_crc: int) -> None:
+        """Start an empty journal continuing the checkpoint at base parts."""
+        self.close()
+        self.file = open(self.path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, base, designs_crc))
+        self.sync()
+        self.records.clear()
+        self.pending_parts = 0
+
+    def append_parts(self, codes: bytes) -> None:
+        """Append a block of part codes."""
+        self.records += codes
+        self.pending_parts += len(codes)
+
+    def append_run(self, run: PartRun) -> None:
+        """Append a run of parts."""
+        self.records.append(RUN)
+        self.records.append(run.code)
+        self.records += encode_amount(run.amount)
+        self.pending_parts += run.amount
+
+    def append_products(self, count: int) -> None:
+        """Append markers of count products created from the last block."""
+        self.records += bytes([PRODUCT]) * count
+
+    def due(self) -> bool:
+        """Return whether the pending records should be committed."""
+        if self.commit_parts and self.pending_parts >= self.commit_parts:
+            return True
+        return bool(self.commit_interval) \
+            and time.monotonic() - self.last_commit >= self.commit_interval
+
+    def commit(self) -> None:
+        """Write and sync the pending records and a commit record."""
+        if not self.file:
+            raise ValueError('Journal is not started, reset it first.')
+        self.records.append(COMMIT)
+        self.file.write(self.records)
+        self.sync()
+        self.records.clear()
+        self.pending_parts = 0
+        self.last_commit = time.monotonic()
+        self.commits += 1
+
+    def sync(self) -> None:
+        """Flush the journal file to disk."""
+        assert self.file
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        """Close the journal file, dropping records not committed."""
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse command line arguments of the replay command."""
+    parser = argparse.ArgumentParser(
+        prog='furniturecreator replay',
+        description='Rebuild facility state from the last checkpoint and the '
+                    'journal tail, save it as a new checkpoint and empty the '
+                    'journal.'
+    )
+    parser.add_argument('input', metavar='INPUT',
+                        help='input file the checkpoint and journal were '
+                             'written for')
+    parser.add_argument('--checkpoint', required=True, metavar='PATH',
+                        help='checkpoint file to restore and save')
+    parser.add_argument('--journal', required=True, metavar='PATH',
+                        help='journal file to replay')
+    parser.add_argument('--batch-size', type=int, default=0, metavar='N',
+                        help='replay in chunks of N with the NumPy batch '
+                             'engine')
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    """Run replay command, report on STDERR and return exit code."""
+    from furniturecreator import FurnitureCreator, decompressing
+    from furniturecreator.checkpoint import Checkpointer
+
+    arguments = parse_arguments(argv)
+    app = FurnitureCreator(
+        batch_size=arguments.batch_size,
+        checkpointer=Checkpointer(arguments.checkpoint),
+        journal=Journal(arguments.journal),
+        resume=True
+    )
+    start = time.perf_counter()
+    try:
+        with open(arguments.input, 'rb') as file, \
+                decompressing(file) as stream:
+            app.save_designs(app.read_design_buffer(stream))
+            replayed = app.restore_checkpoint(stream)
+    except (OSError, ValueError) as error:
+        print(f'furniturecreator replay: error: {error}', file=sys.stderr)
+        return 1
+    finally:
+        app.journal.close()  # type: ignore
+    print(f'Replayed {replayed} parts in '
+          f'{time.perf_counter() - start:.3f}s: {app.parts_read} parts, '
+          f'{app.products_created} products', file=sys.stderr)
+    return 0
@@ -0,0 +1,138 @@
+"""Furniture Creator's buffered output writer."""
+
+from __future__ import annotations
+import io
+import sys
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Union, BinaryIO, TextIO
+    import threading
+
+FLUSH_POLICIES = ('auto', 'line', 'block', 'count', 'time')
+
+
+class OutputWriter:
+    """Writes lines as encoded bytes to a stream, flushing by policy.
+
+    Flush policies:
+    - line: flush after every line, for interactive use;
+    - block: flush when the buffer reaches the buffer size;
+    - count: flush after every flush_count lines;
+    - time: flush at most flush_interval ms after a line is written, on the
+      next write or by a timer when no line follows, so lines are not held
+      back while the input waits;
+    - auto: line when the stream is a terminal, otherwise block.
+    Lines not flushed by the policy are written by flush() or close().
+    """
+
+    def __init__(self,
+                 stream: Union[BinaryIO, TextIO],
+                 policy: str = 'auto',
+                 flush_count: int = 100,
+                 flush_interval: float = 100,
+                 buffer_size: int = 1 << 16,
+                 encoding: str = 'utf-8') -> None:
+        """Initialize writer for stream with flush policy."""
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f'''Wrong flush policy supplied: {policy}.
+                Should be either of: {', '.join(FLUSH_POLICIES)}.''')
+        if flush_count < 1 or flush_interval < 0:
+            raise ValueError('Flush count and interval should be positive.')
+        if policy == 'auto':
+            policy = 'line' if stream.isatty() else 'block'
+
+        self.stream = stream
+        self.binary = not isinstance(stream, io.TextIOBase)
+        self.policy = policy
+        self.flush_count = flush_count
+        self.flush_interval = flush_interval / 1000
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.last_flush = time.monotonic()
+        # The time policy flushes from a timer thread as well.
+        self.lock: Optional[threading.RLock] = None
+        self.timer: Optional[threading.Timer] = None
+        if policy == 'time':
+            from threading import RLock
+            self.lock = RLock()
+
+    def __enter__(self) -> OutputWriter:
+        """Return self as context manager."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Write pending lines on leaving context."""
+        self.close()
+
+    @classmethod
+    def for_stdout(cls, policy: str = 'auto', **options) -> OutputWriter:
+        """Create writer for the binary buffer underneath STDOUT."""
+        stdout: Union[BinaryIO, TextIO] = sys.stdout
+        if buffer := getattr(sys.stdout, 'buffer', None):
+            sys.stdout.flush()
+            stdout = buffer
+        return cls(stdout, policy, **options)
+
+    def write(self, line: str) -> None:
+        """Write a line, flushing according to policy."""
+        data = line.encode(self.encoding) + b'\n'
+        if self.lock:
+            with self.lock:
+                self.write_timed(data)
+            return
+        self.pending.append(data)
+        self.pending_size += len(data)
+
+        if self.policy == 'line':
+            self.flush()
+        elif self.policy == 'block':
+            if self.pending_size >= self.buffer_size:
+                self.flush()
+        elif self.policy == 'count':
+            if len(self.pending) >= self.flush_count:
+                self.flush()
+
+    def write_timed(self, data: bytes) -> None:
+        """Add data by the time policy, starting a timer to flush it."""
+        self.pending.append(data)
+        self.pending_size += len(data)
+        remaining = self.flush_interval - (time.monotonic() - self.last_flush)
+        if remaining <= 0:
+            self.flush()
+        elif not self.timer:
+            from threading import Timer
+            self.timer = Timer(remaining, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self) -> None:
+        """Write pending lines to stream and flush it."""
+        if self.lock:
+            with self.lock:
+                if self.timer:
+                    self.timer.cancel()
+                    self.timer = None
+                self.write_pending()
+            return
+        self.write_pending()
+
+    def write_pending(self) -> None:
+        """Write pending lines to stream and flush it, by any policy."""
+        if self.pending:
+            data = b''.join(self.pending)
+            if self.binary:
+                self.stream.write(data)  # type: ignore
+            else:
+                self.stream.write(data.decode(self.encoding))  # type: ignore
+            self.pending.clear()
+            self.pending_size = 0
+        self.stream.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Write pending lines, leaving the stream open."""
+        self.flush()
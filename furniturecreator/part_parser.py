@@ -0,0 +1,225 @@
+"""Furniture Creator's block parser for the part section of the input.
+
+A part line holds one part (eg. 'aS') or a run of one part, prefixed by its
+amount (eg. '500aS').
+"""
+
+from __future__ import annotations
+from operator import add
+
+from furniturecreator.dataclasses import FrozenRecord, PARTS, PART_TYPES
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, BinaryIO, Tuple, Union
+    import mmap
+
+    Codes = Union[bytes, 'PartRun']
+
+# Translation tables mapping part type letters onto 0-25 and part size
+# letters onto the slot offset of their size (see Part.slot).
+TYPE_BYTES = PART_TYPES.encode()
+TYPE_SLOTS = bytes.maketrans(TYPE_BYTES, bytes(range(len(PART_TYPES))))
+SIZE_BYTES = b'SL'
+SIZE_OFFSETS = bytes.maketrans(SIZE_BYTES, bytes((0, len(PART_TYPES))))
+PART_CODES: Dict[bytes, int] = {str(part).encode(): part.slot
+                                for part in PARTS}
+
+BLOCK_SIZE = 1 << 16
+
+
+class PartRun(FrozenRecord):
+    """Run of one part from a line of its amount and part (eg. '500aS').
+
+    It stands in for a block of that many codes of the part, its length is
+    the amount; a run of any amount takes the same memory.
+    """
+
+    __slots__ = ('code', 'amount')
+    fields = __slots__
+    code: int
+    amount: int
+
+    def __init__(self, code: int, amount: int) -> None:
+        """Initialize run of amount parts with code."""
+        object.__setattr__(self, 'code', code)
+        object.__setattr__(self, 'amount', amount)
+
+    def __len__(self) -> int:
+        """Return amount of parts."""
+        return self.amount
+
+
+def line_parts(line: bytes) -> int:
+    """Return amount of parts on a part line, which is assumed correct."""
+    line = line.strip()
+    return int(line[:-2]) if len(line) > 2 else 1
+
+
+class PartFormatError(ValueError):
+    """Incorrect part line, holding the codes of the parts before it."""
+
+    def __init__(self, message: str, codes: bytes) -> None:
+        """Initialize error with message and codes of preceding parts."""
+        super().__init__(message)
+        self.codes = codes
+
+
+class PartParser:
+    """Converts blocks of part lines into part codes.
+
+    A part code is the stock slot index of the part (see Part.slot); a block
+    of lines is converted into a bytes object holding one code per line. A
+    run of parts is converted into a PartRun of its own, between the codes
+    of the lines before and after it. The parser counts lines to report the
+    line number of incorrect parts.
+
+    While a block of codes is processed, offset and offset_line hold the
+    input position of its first line, so all parts before that position have
+    been processed. After the last block they hold the end of the input.
+    """
+
+    def __init__(self, first_line: int = 1, offset: int = 0) -> None:
+        """Initialize parser for input starting at line number first_line.
+
+        Offset is the byte offset of the input in its stream.
+        """
+        self.line = first_line
+        self.offset = offset
+        self.offset_line = first_line
+
+    def read(self,
+             stream: BinaryIO,
+             block_size: int = BLOCK_SIZE) -> Iterator[Codes]:
+        """Read stream in blocks and yield part codes per block.
+
+        Blocks are read with read1() where the stream has it, which returns
+        the data available up to block size, so the lines that arrived from
+        a pipe or terminal are processed without waiting for a full block.
+        A line not complete yet is carried over to the next block.
+
+        On an incorrect part the codes of the parts before it are yielded
+        first, so they are processed just like they are line by line.
+        """
+        read = getattr(stream, 'read1', stream.read)
+        remainder = bytearray()
+        while data := read(block_size):
+            end = data.rfind(b'\n') + 1
+            if not end:
+                remainder += data
+                continue
+            block = bytes(remainder) + data[:end] if remainder \
+                else data[:end]
+            remainder[:] = data[end:]
+            yield from self.parse_block_or_raise(block, len(block))
+        if remainder:
+            yield from self.parse_block_or_raise(bytes(remainder) + b'\n',
+                                                 len(remainder))
+
+    def read_buffer(self,
+                    buffer: mmap.mmap,
+                    start: int = 0,
+                    block_size: int = BLOCK_SIZE) -> Iterator[Codes]:
+        """Yield part codes per block of a memory-mapped buffer.
+
+        Blocks are zero-copy views on the buffer, ending at a line end.
+        """
+        size = len(buffer)
+        position = self.offset = start
+        with memoryview(buffer) as view:
+            while position < size:
+                end = buffer.rfind(b'\n', position, position + block_size) + 1
+                if not end:
+                    end = buffer.find(b'\n', position + block_size) + 1
+                if not end:
+                    # The last line has no line end.
+                    block = bytes(view[position:size]) + b'\n'
+                    yield from self.parse_block_or_raise(block,
+                                                         size - position)
+                    return
+                with view[position:end] as block_view:
+                    yield from self.parse_block_or_raise(block_view,
+                                                         end - position)
+                position = end
+
+    def advance(self, length: int, lines: int) -> None:
+        """Move input position past processed lines of length bytes."""
+        self.offset += length
+        self.offset_line += lines
+
+    def parse_block_or_raise(self,
+                             block: Union[bytes, memoryview],
+                             length: int) -> Iterator[Codes]:
+        """Yield codes of block, up to the incorrect part if there is one.
+
+        The input position is moved past the lines of every block of codes
+        once it has been processed; length is the length of block in the
+        input, without a line end added to its last line.
+        """
+        end = self.offset + length
+        try:
+            for codes, codes_length, lines in self.parse_runs(block):
+                yield codes
+                self.advance(min(codes_length, end - self.offset), lines)
+        except PartFormatError as error:
+            if error.codes:
+                yield error.codes
+            raise
+
+    def parse_runs(self, block: Union[bytes, memoryview]
+                   ) -> Iterator[Tuple[Codes, int, int]]:
+        """Convert block of newline terminated part lines into part codes.
+
+        Yield the blocks of codes and runs of parts of the block, with the
+        length and the number of their lines.
+        """
+        # Fast path: every line consists of exactly a type and size letter,
+        # so types, sizes and newlines can be checked and converted as
+        # strided slices of the whole block.
+        count = len(block) // 3
+        if len(block) == count * 3 and block[2::3] == b'\n' * count:
+            types = bytes(block[0::3])
+            sizes = bytes(block[1::3])
+            if not (types.translate(None, TYPE_BYTES)
+                    or sizes.translate(None, SIZE_BYTES)):
+                self.line += count
+                yield (bytes(map(add,
+                                 types.translate(TYPE_SLOTS),
+                                 sizes.translate(SIZE_OFFSETS))),
+                       len(block), count)
+                return
+        yield from self.parse_lines(block)
+
+    def parse_lines(self, block: Union[bytes, memoryview]
+                    ) -> Iterator[Tuple[Codes, int, int]]:
+        """Convert block of part lines into part codes line by line.
+
+        Yield blocks of codes and runs of parts as parse_runs() does.
+        """
+        codes: List[int] = []
+        length = 0
+        for line in bytes(block).split(b'\n')[:-1]:
+            part_bytes = line.strip()
+            if (code := PART_CODES.get(part_bytes)) is None:
+                amount = part_bytes[:-2]
+                code = PART_CODES.get(part_bytes[-2:])
+                if (code is None or not amount.isdigit()
+                        or not int(amount)):
+                    part_str = part_bytes.decode(errors='replace')
+                    raise PartFormatError(
+                        f'Incorrect part format (\'{part_str}\') '
+                        f'on line {self.line}.',
+                        bytes(codes)
+                    )
+                if codes:
+                    yield bytes(codes), length, len(codes)
+                    codes = []
+                    length = 0
+                self.line += 1
+                yield PartRun(code, int(amount)), len(line) + 1, 1
+                continue
+            codes.append(code)
+            length += len(line) + 1
+            self.line += 1
+        if codes:
+            yield bytes(codes), length, len(codes)
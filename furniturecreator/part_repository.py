@@ -1,61 +1,148 @@
 """Furniture Creator's product parts repository."""
 
 from __future__ import annotations
-from typing import List, Dict, Union
-import re
-from operator import itemgetter
 
-from furniturecreator.dataclasses import Part
-from furniturecreator.utilities import filter_parts_dict_by_size
+from furniturecreator.dataclasses import Part, PARTS_BY_CODE, PART_TYPES, \
+                                        SLOT_COUNT
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Dict, Union, Protocol
+
+    class StockObserver(Protocol):
+        """Receives a notification whenever the stock of a slot changes."""
+
+        def stock_changed(self, slot: int, old: int, new: int) -> None:
+            """Handle stock of slot going from old to new amount."""
 
 
 class PartRepository:
-    """Processes and tracks parts in stock."""
+    """Processes and tracks parts in stock.
+
+    Stock is kept in a fixed array of 52 slots, one for every part type and
+    size combination (see Part.slot), with running totals per size.
+
+    Per size two indexes support selecting extra parts for products: a list
+    of parts in stock that are not used in any design, and a bucket queue
+    mapping stock amounts to the slots having that amount in stock.
+    """
 
     def __init__(self) -> None:
-        """Initialize empty parts dictionary and empty totals."""
-        self.parts: Dict[Part, int] = {}
+        """Initialize empty stock slots and empty totals."""
+        self.stock: List[int] = [0] * SLOT_COUNT
         self.total_per_size: Dict[str, int] = {'S': 0, 'L': 0}
+        # Slots currently in stock, in order of arrival. Only touched when a
+        # slot runs out or comes back into stock.
+        self.slots_in_stock: Dict[int, None] = {}
+        self.observers: List[StockObserver] = []
+
+        self.arrival: List[int] = [0] * SLOT_COUNT
+        self.arrivals = 0
+        self.in_design: List[bool] = [False] * SLOT_COUNT
+        self.parts_without_design: Dict[str, List[Part]] = {'S': [], 'L': []}
+        self.buckets: Dict[str, Dict[int, Dict[int, None]]] = {
+            'S': {}, 'L': {}}
+        self.most_per_size: Dict[str, int] = {'S': 0, 'L': 0}
 
     def __str__(self) -> str:
         """Create plain text representation of current stock for humans."""
         stock = '\n'.join(
-            '{}: {}'.format(part, amount)
-            for part, amount in
+            '{}: {}'.format(Part.from_slot(slot), self.stock[slot])
+            for slot in
                 sorted(
-                    self.parts.items(),
-                    key=lambda x: x[0].type
+                    self.slots_in_stock,
+                    key=lambda x: x % len(PART_TYPES)
                 )
         )
         total = self.sum_stock()
         return f'{stock}\nTotal: {total}'
 
+    @property
+    def parts(self) -> Dict[Part, int]:
+        """Return a dictionary of all parts in stock and their amounts."""
+        return {Part.from_slot(slot): self.stock[slot]
+                for slot in self.slots_in_stock}
+
     def save(self, part_str: str) -> None:
         """Convert text format part into Part object and store it."""
-        if not re.match(r'^[a-z][SL]$', part_str):
+        self.add(self.parse(part_str))
+
+    def parse(self, part_str: str) -> Part:
+        """Parse and convert part string into its shared Part object."""
+        if (part := PARTS_BY_CODE.get(part_str)) is None:
             raise ValueError(f'Incorrect part format (\'{part_str}\').')
-        self.add(Part(part_str[0], part_str[1]))
+        return part
 
     def add(self, part: Part, amount: int = 1) -> None:
-        """Add part to internal dictionary and raise total."""
+        """Add part to stock and raise total."""
         if amount < 1:
             raise ValueError('Can not add less than one part.')
-        self.parts[part] = self.sum_stock(part) + amount
+        slot = part.slot
+        old = self.stock[slot]
+        if not old:
+            self.slots_in_stock[slot] = None
+            self.arrival[slot] = self.arrivals
+            self.arrivals += 1
+            if not self.in_design[slot]:
+                self.parts_without_design[part.size].append(part)
+        self.stock[slot] = old + amount
         self.total_per_size[part.size] += amount
+        self.move_bucket(part.size, slot, old, old + amount)
+        for observer in self.observers:
+            observer.stock_changed(slot, old, old + amount)
 
     def remove(self, part: Part, amount: int = 1) -> None:
-        """Remove part from internal dictionary and decrease total."""
+        """Remove part from stock and decrease total."""
         if amount < 1:
             raise ValueError('Can not remove less than one part.')
-        if amount > self.sum_stock(part):
+        slot = part.slot
+        old = self.stock[slot]
+        if amount > old:
             raise ValueError(
                 f'''Not enough parts in stock to remove
-                ({amount} > {self.parts.get(part, 0)}.'''
+                ({amount} > {old}.'''
             )
-        self.parts[part] = self.sum_stock(part) - amount
-        if self.parts[part] == 0:
-            del self.parts[part]
+        self.stock[slot] = old - amount
+        if old == amount:
+            del self.slots_in_stock[slot]
+            if not self.in_design[slot]:
+                self.parts_without_design[part.size].remove(part)
         self.total_per_size[part.size] -= amount
+        self.move_bucket(part.size, slot, old, old - amount)
+        for observer in self.observers:
+            observer.stock_changed(slot, old, old - amount)
+
+    def move_bucket(self, size: str, slot: int, old: int, new: int) -> None:
+        """Move slot from the bucket of its old to its new stock amount."""
+        buckets = self.buckets[size]
+        if old:
+            bucket = buckets[old]
+            del bucket[slot]
+            if not bucket:
+                del buckets[old]
+        if new:
+            if new in buckets:
+                buckets[new][slot] = None
+            else:
+                buckets[new] = {slot: None}
+        most = self.most_per_size[size]
+        if new > most:
+            self.most_per_size[size] = new
+        elif old == most and most not in buckets:
+            self.most_per_size[size] = max(buckets, default=0)
+
+    def mark_in_design(self, part: Part) -> None:
+        """Register part as used in a design."""
+        slot = part.slot
+        if self.in_design[slot]:
+            return
+        self.in_design[slot] = True
+        if self.stock[slot]:
+            self.parts_without_design[part.size].remove(part)
+
+    def add_observer(self, observer: StockObserver) -> None:
+        """Notify observer of every future change in stock."""
+        self.observers.append(observer)
 
     def sum_stock(self, selection: Union[str, Part] = 'A') -> int:
         """Return sum of all parts in stock for given selection."""
@@ -67,7 +154,7 @@ class PartRepository:
 
     def sum_all_stock(self) -> int:
         """Return sum of all parts in stock."""
-        return sum(self.parts.values())
+        return self.total_per_size['S'] + self.total_per_size['L']
 
     def sum_size_stock(self, size: str) -> int:
         """Return sum of all parts in stock for given size."""
@@ -77,15 +164,43 @@ class PartRepository:
 
     def sum_part_stock(self, part: Part) -> int:
         """Return sum of specified part in stock."""
-        return self.parts.get(part, 0)
+        return self.stock[part.slot]
 
     def get_part_list(self) -> List[Part]:
         """Return a list of all parts in stock."""
-        return list(self.parts.keys())
+        return [Part.from_slot(slot) for slot in self.slots_in_stock]
+
+    def get_parts_without_design(self, size: str) -> List[Part]:
+        """Return parts in stock of given size that are in no design.
+
+        The returned list is maintained by the repository and must not be
+        modified. Parts are listed in order of arrival.
+        """
+        if size != 'S' and size != 'L':
+            raise ValueError(f'''Wrong size supplied: {size}. Should be
+                either of: [S]mall or [L]arge.''')
+        return self.parts_without_design[size]
 
     def get_part_with_most_in_stock(self, size: str = '') -> Part:
-        """Return the part of which there are the most of in stock."""
-        scope = self.parts
-        if size:
-            scope = filter_parts_dict_by_size(self.parts, size)
-        return max(scope.items(), key=itemgetter(1))[0]
+        """Return the part of which there are the most of in stock.
+
+        Of parts with an equal amount in stock, the part that arrived first
+        is returned.
+        """
+        if size == 'S' or size == 'L':
+            sizes = size
+        elif size:
+            raise ValueError(f'''Wrong size supplied: {size}. Should be
+                either of: [S]mall or [L]arge.''')
+        else:
+            sizes = 'SL'
+
+        most = max(self.most_per_size[x] for x in sizes)
+        if not most:
+            raise ValueError('No parts in stock to select from.')
+        slots = [x for x in sizes if self.most_per_size[x] == most]
+        slot = min(
+            (slot for x in slots for slot in self.buckets[x][most]),
+            key=self.arrival.__getitem__
+        )
+        return Part.from_slot(slot)
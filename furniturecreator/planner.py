@@ -0,0 +1,449 @@
+"""Furniture Creator's offline production planner.
+
+Plans the products created from a complete input, instead of creating the
+first design that can be created whenever a part arrives. Products can be
+created at any point after their parts arrived, so the products that can be
+created from an input are bound by its stock at the end only: per design a
+number of products is planned that maximizes their total value (1 per
+product unless weighted), within the parts of every slot and the total parts
+of every size. The plan starts from the products of the greedy run and is
+improved by local search, dropping products and refilling the freed parts,
+within a time budget. Products are then scheduled at the earliest part after
+which their parts have arrived.
+
+Run with: python -m furniturecreator plan [options] INPUT
+"""
+
+from __future__ import annotations
+from typing import BinaryIO, Dict, List, Optional, Sequence, TYPE_CHECKING
+from bisect import bisect_right
+from dataclasses import dataclass
+import argparse
+import mmap
+import os
+import random
+import sys
+import time
+
+from furniturecreator import FurnitureCreator, decompressing
+from furniturecreator.dataclasses import CompiledDesign, PARTS, \
+                                        PART_SIZES, PART_TYPES, SLOT_COUNT
+from furniturecreator.output_writer import OutputWriter
+from furniturecreator.part_parser import PartRun
+
+if TYPE_CHECKING:
+    from furniturecreator.part_parser import Codes
+
+# Capacity holds the parts per slot, followed by the total parts per size.
+TOTAL = {size: SLOT_COUNT + index for index, size in enumerate(PART_SIZES)}
+
+
+@dataclass
+class ScheduledProduct:
+    """Product planned from a design, created after a number of parts."""
+
+    parts_read: int
+    design_id: int
+    extra_parts: Dict[int, int]
+
+
+class Arrivals:
+    """Positions in the input of the parts of one slot, kept per run.
+
+    Parts arriving one after another form one run, so a run of parts takes
+    the same memory as a single part.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without parts."""
+        # Position of the first part of every run, and the number of parts
+        # arrived up to the end of every run.
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def __len__(self) -> int:
+        """Return number of parts."""
+        return self.ends[-1] if self.ends else 0
+
+    def add(self, position: int, amount: int) -> None:
+        """Add amount of parts arriving one after another from position."""
+        if self.starts and self.starts[-1] + self.run_length(-1) == position:
+            self.ends[-1] += amount
+            return
+        self.starts.append(position)
+        self.ends.append(len(self) + amount)
+
+    def run_length(self, run: int) -> int:
+        """Return number of parts of run by index."""
+        if run == -1:
+            run = len(self.ends) - 1
+        return self.ends[run] - (self.ends[run - 1] if run else 0)
+
+    def position(self, index: int) -> int:
+        """Return position of the part arrived as number index from 0."""
+        run = bisect_right(self.ends, index)
+        return self.starts[run] + index - (self.ends[run - 1] if run else 0)
+
+    def count(self, position: int) -> int:
+        """Return number of parts arrived up to and including position."""
+        if not (run := bisect_right(self.starts, position)):
+            return 0
+        run -= 1
+        return self.ends[run] - self.run_length(run) \
+            + min(position - self.starts[run] + 1, self.run_length(run))
+
+
+class Planner:
+    """Plans products of compiled designs from the stock of an input."""
+
+    def __init__(self,
+                 designs: Sequence[CompiledDesign],
+                 values: Optional[Sequence[float]] = None) -> None:
+        """Initialize planner for designs with a value per product each."""
+        self.designs = designs
+        self.values = [1.0] * len(designs) if values is None else values
+        if len(self.values) != len(designs):
+            raise ValueError('A value should be given for every design.')
+        # Parts used by a product, which are at least the parts required.
+        self.parts = [max(design.total_parts,
+                          sum(amount for _, amount in design.requirements))
+                      for design in designs]
+        self.iterations = 0
+
+    def value(self, counts: Sequence[int]) -> float:
+        """Return total value of the products planned per design."""
+        return sum(x * value for x, value in zip(counts, self.values))
+
+    def capacity(self, stock: Sequence[int]) -> List[int]:
+        """Return capacity for stock per slot: slots and totals per size."""
+        totals = [sum(stock[index * len(PART_TYPES):
+                            (index + 1) * len(PART_TYPES)])
+                  for index in range(len(PART_SIZES))]
+        return list(stock) + totals
+
+    def fit(self, design_id: int, capacity: Sequence[int]) -> int:
+        """Return number of products of design that fit in capacity."""
+        design = self.designs[design_id]
+        units = capacity[TOTAL[design.size]] // self.parts[design_id]
+        for slot, amount in design.requirements:
+            if amount and capacity[slot] < amount * units:
+                units = capacity[slot] // amount
+        return units
+
+    def use(self,
+            design_id: int,
+            units: int,
+            capacity: List[int]) -> None:
+        """Take capacity of units products of design, negative to free."""
+        design = self.designs[design_id]
+        capacity[TOTAL[design.size]] -= units * self.parts[design_id]
+        for slot, amount in design.requirements:
+            capacity[slot] -= units * amount
+
+    def fill(self,
+             counts: List[int],
+             capacity: List[int],
+             order: Sequence[int]) -> None:
+        """Plan as many products as fit, design by design in order."""
+        for design_id in order:
+            if units := self.fit(design_id, capacity):
+                counts[design_id] += units
+                self.use(design_id, units, capacity)
+
+    def solve(self,
+              stock: Sequence[int],
+              budget: float = 1.0,
+              start: Optional[Sequence[int]] = None,
+              seed: int = 0,
+              iterations: int = 0) -> List[int]:
+        """Return products per design of the best plan found for stock.
+
+        The plan starts from the best of the start plan, if given, and a
+        plan filled with the designs that use the least scarce parts per
+        value first. A local search step drops some products and refills
+        the freed parts in a randomized order; steps run until the budget
+        in seconds or, if given, the number of iterations is spent.
+        """
+        deadline = time.monotonic() + budget
+        empty = self.capacity(stock)
+        if start is not None and len(start) != len(self.designs):
+            raise ValueError('A start plan should count every design.')
+        candidates = [design_id for design_id in range(len(self.designs))
+                      if self.parts[design_id] and self.values[design_id] > 0
+                      and self.fit(design_id, empty)]
+        # Cost of a product: its share of the stock of every slot it uses.
+        efficiency = {}
+        for design_id in candidates:
+            design = self.designs[design_id]
+            cost = self.parts[design_id] / empty[TOTAL[design.size]]
+            cost += sum(amount / empty[slot]
+                        for slot, amount in design.requirements)
+            efficiency[design_id] = self.values[design_id] / cost
+        candidates.sort(key=efficiency.__getitem__, reverse=True)
+
+        counts = [0] * len(self.designs)
+        capacity = list(empty)
+        self.fill(counts, capacity, candidates)
+        if start is not None and self.value(start) > self.value(counts):
+            counts = list(start)
+            capacity = list(empty)
+            for design_id, units in enumerate(counts):
+                self.use(design_id, units, capacity)
+            if min(capacity) < 0:
+                raise ValueError('Start plan uses more parts than in stock.')
+            self.fill(counts, capacity, candidates)
+
+        generator = random.Random(seed)
+        best, best_value = list(counts), self.value(counts)
+        current_value = best_value
+        self.iterations = 0
+        while (self.iterations < iterations if iterations
+               else time.monotonic() < deadline):
+            self.iterations += 1
+            planned = [design_id for design_id in candidates
+                       if counts[design_id]]
+            if not planned:
+                break
+            trial, trial_capacity = list(counts), list(capacity)
+            dropped = set()
+            for _ in range(generator.randint(1, 3)):
+                design_id = generator.choice(planned)
+                if trial[design_id]:
+                    units = generator.randint(1, trial[design_id])
+                    trial[design_id] -= units
+                    self.use(design_id, -units, trial_capacity)
+                    dropped.add(design_id)
+            # Designs dropped go last, so the freed parts go elsewhere.
+            order = sorted(
+                candidates,
+                key=lambda x: (x in dropped,
+                               -efficiency[x] * generator.uniform(0.5, 1.5)))
+            self.fill(trial, trial_capacity, order)
+            trial_value = self.value(trial)
+            if trial_value >= current_value:
+                counts, capacity = trial, trial_capacity
+                current_value = trial_value
+                if trial_value > best_value:
+                    best, best_value = list(trial), trial_value
+        return best
+
+    def schedule(self,
+                 counts: Sequence[int],
+                 blocks: Sequence[Codes]) -> List[ScheduledProduct]:
+        """Return planned products in the order they can be created.
+
+        Products are ordered by the part after which the parts they require
+        have arrived, if no other product took them. Every product is then
+        created after the parts it and all products before it use, taking
+        its extra parts from parts no planned product requires, those that
+        arrived first.
+        """
+        arrivals = [Arrivals() for _ in range(SLOT_COUNT)]
+        parts = 0
+        for block in blocks:
+            if isinstance(block, PartRun):
+                arrivals[block.code].add(parts, block.amount)
+            else:
+                for position, code in enumerate(block, parts):
+                    arrivals[code].add(position, 1)
+            parts += len(block)
+        surplus = [len(slot_arrivals) for slot_arrivals in arrivals]
+        capacity = self.capacity(surplus)
+        for design_id, units in enumerate(counts):
+            self.use(design_id, units, capacity)
+        if min(capacity, default=0) < 0:
+            raise ValueError('Plan uses more parts than in the input.')
+
+        products = []
+        for design_id, units in enumerate(counts):
+            for slot, amount in self.designs[design_id].requirements:
+                surplus[slot] -= units * amount
+            requirements = [(arrivals[slot], amount) for slot, amount
+                            in self.designs[design_id].requirements]
+            for unit in range(1, units + 1):
+                position = max((positions.position(unit * amount - 1)
+                                for positions, amount in requirements
+                                if amount), default=-1)
+                products.append((position, design_id))
+        products.sort()
+
+        used = [0] * SLOT_COUNT
+        position = -1
+        scheduled = []
+        for _, design_id in products:
+            design = self.designs[design_id]
+            for slot, amount in design.requirements:
+                used[slot] += amount
+                if amount:
+                    position = max(position,
+                                   arrivals[slot].position(used[slot] - 1))
+            extra = self.parts[design_id] - sum(
+                amount for _, amount in design.requirements)
+            extra_parts: Dict[int, int] = {}
+            size = PART_SIZES.index(design.size) * len(PART_TYPES)
+            slots = range(size, size + len(PART_TYPES))
+            while extra:
+                # Arrived parts first, otherwise wait for the next to arrive.
+                available = [
+                    (arrivals[slot].count(position) - used[slot], slot)
+                    for slot in slots if surplus[slot]]
+                count, slot = max(available)
+                if count <= 0:
+                    slot = min(slots,
+                               key=lambda x: arrivals[x].position(used[x])
+                               if surplus[x] else parts)
+                    position = arrivals[slot].position(used[slot])
+                    count = 1
+                count = min(count, surplus[slot], extra)
+                used[slot] += count
+                surplus[slot] -= count
+                extra -= count
+                extra_parts[slot] = extra_parts.get(slot, 0) + count
+            scheduled.append(ScheduledProduct(position + 1, design_id,
+                                              extra_parts))
+        return scheduled
+
+
+def run_greedy(app: FurnitureCreator, blocks: Sequence[Codes]) -> List[int]:
+    """Run app on blocks of part codes without output.
+
+    Return the products per design.
+    """
+    product_manager = app.product_manager
+    product_manager.rendering = False
+    engine = None
+    if app.batch_size:
+        from furniturecreator.batch_engine import BatchEngine
+        engine = BatchEngine(product_manager, app.batch_size)
+    add = app.part_repository.add
+    create_product = product_manager.create_product
+    try:
+        for block in blocks:
+            if isinstance(block, PartRun):
+                app.products_created += sum(1 for _ in product_manager.add_run(
+                    PARTS[block.code], block.amount))
+            elif engine:
+                app.products_created += sum(1 for _ in engine.process(block))
+            else:
+                for code in block:
+                    add(PARTS[code])
+                    if create_product():
+                        app.products_created += 1
+            app.parts_read += len(block)
+    finally:
+        product_manager.rendering = True
+    return list(product_manager.design_repository.scheduler.produced)
+
+
+def count_stock(blocks: Sequence[Codes]) -> List[int]:
+    """Return number of parts per slot in blocks of part codes."""
+    stock = [0] * SLOT_COUNT
+    for block in blocks:
+        if isinstance(block, PartRun):
+            stock[block.code] += block.amount
+        else:
+            for slot in set(block):
+                stock[slot] += block.count(slot)
+    return stock
+
+
+def read_input(app: FurnitureCreator, path: str) -> List[Codes]:
+    """Save designs of input at path (STDIN for '-') and return its parts.
+
+    The parts are returned as blocks of part codes and runs of parts.
+    """
+    if path == '-':
+        return read_stream(app, decompressing(sys.stdin.buffer))
+    with open(path, 'rb') as file:
+        if (stream := decompressing(file)) is not file:
+            with stream:
+                return read_stream(app, stream)
+        if not os.fstat(file.fileno()).st_size:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            app.save_designs(app.read_design_mapped(buffer))
+            blocks = app.read_part_codes_mapped(buffer)
+            try:
+                return list(blocks)
+            finally:
+                blocks.close()
+
+
+def read_stream(app: FurnitureCreator, stream: BinaryIO) -> List[Codes]:
+    """Save designs of input stream and return its blocks of parts."""
+    app.save_designs(app.read_design_buffer(stream))
+    return list(app.read_part_codes(stream))
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse command line arguments of the plan command."""
+    from furniturecreator.__main__ import parse_weight
+
+    parser = argparse.ArgumentParser(
+        prog='furniturecreator plan',
+        description='Plan the products created from a complete input to '
+                    'maximize their number or value, write them and report '
+                    'the improvement over the greedy run on STDERR.'
+    )
+    parser.add_argument('input', metavar='INPUT',
+                        help="input file, '-' for STDIN")
+    parser.add_argument('--budget', type=float, default=1.0,
+                        metavar='SECONDS',
+                        help='time spent improving the plan (default: 1)')
+    parser.add_argument('--weight', type=parse_weight, action='append',
+                        default=[], metavar='NAME=VALUE',
+                        help='value of a product of the designs named NAME, '
+                             '1 by default; can be repeated')
+    parser.add_argument('--seed', type=int, default=0, metavar='N',
+                        help='seed of the local search')
+    parser.add_argument('--schedule', action='store_true',
+                        help='prefix every product with the number of parts '
+                             'read when it is created')
+    parser.add_argument('--batch-size', type=int, default=0, metavar='N',
+                        help='run the greedy run in chunks of N with the '
+                             'NumPy batch engine')
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    """Run plan command, write products and return exit code."""
+    arguments = parse_arguments(argv)
+    weights = dict(arguments.weight)
+    app = FurnitureCreator(batch_size=arguments.batch_size)
+    try:
+        blocks = read_input(app, arguments.input)
+    except (OSError, ValueError) as error:
+        print(f'furniturecreator plan: error: {error}', file=sys.stderr)
+        return 1
+    design_repository = app.product_manager.design_repository
+    values = [weights.get(design.name, 1.0)
+              for design in design_repository.catalog]
+
+    start = time.perf_counter()
+    greedy = run_greedy(app, blocks)
+    greedy_seconds = time.perf_counter() - start
+    planner = Planner(design_repository.compiled, values)
+    stock = count_stock(blocks)
+    start = time.perf_counter()
+    counts = planner.solve(stock, arguments.budget, greedy, arguments.seed)
+    scheduled = planner.schedule(counts, blocks)
+    plan_seconds = time.perf_counter() - start
+
+    output = OutputWriter.for_stdout()
+    renderers = design_repository.renderers
+    for product in scheduled:
+        text = renderers[product.design_id].render(
+            {PARTS[slot]: x for slot, x in product.extra_parts.items()})
+        if arguments.schedule:
+            text = f'{product.parts_read}\t{text}'
+        output.write(text)
+    output.flush()
+
+    greedy_value, plan_value = planner.value(greedy), planner.value(counts)
+    gain = (plan_value - greedy_value) / greedy_value if greedy_value else 0
+    print(f'Greedy: {sum(greedy)} products, value {greedy_value:g} in '
+          f'{greedy_seconds:.3f}s', file=sys.stderr)
+    print(f'Plan: {sum(counts)} products, value {plan_value:g} '
+          f'({gain:+.1%}) in {plan_seconds:.3f}s, '
+          f'{planner.iterations} iterations', file=sys.stderr)
+    return 0
@@ -1,26 +1,40 @@
 """Furniture Creator's product manager."""
 
 from __future__ import annotations
-from typing import List, Optional
-import random
 
-from furniturecreator.dataclasses import Part, Product, Design
-from furniturecreator.utilities import filter_parts_list_by_size
+from furniturecreator.dataclasses import Part, Product, Design, \
+                                        PARTS, PART_SIZES
 from furniturecreator.part_repository import PartRepository
+from furniturecreator.utilities import filter_parts_list_by_size, \
+                                       spread_parts_evenly, \
+                                       take_parts_most_in_stock
 from furniturecreator.design_repository import DesignRepository
+from furniturecreator.design_tracker import DesignTracker
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Dict, Iterator, Optional
 
 
 class ProductManager:
     """Processes designs and creates products from parts in stock."""
 
-    def __init__(self, part_repository: PartRepository) -> None:
+    def __init__(self,
+                 part_repository: PartRepository,
+                 policy: str = 'round-robin',
+                 weights: Optional[Dict[str, float]] = None) -> None:
         """Initialize Stock and design repository.
 
-        Part repository must be supplied, empty
-        design repository will be created.
+        Part repository must be supplied, empty design repository will be
+        created, scheduling designs by policy with weights per design name.
         """
         self.part_repository: PartRepository = part_repository
-        self.design_repository: DesignRepository = DesignRepository()
+        self.design_repository: DesignRepository = DesignRepository(
+            policy, weights)
+        self.design_tracker: DesignTracker = DesignTracker(
+            part_repository, self.design_repository.scheduler)
+        # Products are not rendered while replaying a journal.
+        self.rendering = True
 
     def save_design(self, design_str: str) -> None:
         """Pass design to design repository."""
@@ -32,8 +46,9 @@ class ProductManager:
         If enough parts are in stock for a design, create it
         otherwise return None.
         """
-        if not (design := self.select_design()):
+        if (design_id := self.select_design_id()) is None:
             return None
+        design = self.design_repository.catalog[design_id]
 
         product = Product(design.name, design.size, {})
 
@@ -41,51 +56,126 @@ class ProductManager:
             self.part_repository.remove(part, amount)
             product.add_part(part, amount)
 
-        extra_parts = design.total_parts - sum(design.parts.values())
-        while extra_parts > 0:
-            extra_part = self.select_extra_part(design.size)
+        extra_parts: Dict[Part, int] = {}
+        amount = design.total_parts - sum(design.parts.values())
+        if amount > 0:
+            extra_parts = self.select_extra_parts(design.size, amount)
+            for part, extra_amount in extra_parts.items():
+                product.add_part(part, extra_amount)
+                self.part_repository.remove(part, extra_amount)
+
+        if self.rendering:
+            renderer = self.design_repository.renderers[design_id]
+            product.rendered = renderer.render(extra_parts)
+        return product
 
-            product.add_part(extra_part, 1)
-            self.part_repository.remove(extra_part)
-            extra_parts -= 1
+    def create_all_products(self) -> Iterator[Product]:
+        """Create and yield every product that can be created from stock.
 
-        return product
+        Products are created one after another as by create_product(), with
+        designs taking turns by the scheduler, until no design can be
+        created. Ready designs are found by the design tracker, so stock
+        loaded in bulk, restored or matched by new designs is drained
+        without checking every design after every product.
+        """
+        while product := self.create_product():
+            yield product
+
+    def add_run(self, part: Part, amount: int) -> Iterator[Product]:
+        """Add amount of part to stock and yield the products created.
+
+        The products are those created when the parts are added one at a
+        time with an attempt to create a product after each, but the parts
+        up to the next product are added to stock at once.
+        """
+        self.track_designs()
+        tracker = self.design_tracker
+        while amount:
+            until_ready = tracker.parts_until_ready(part.slot)
+            parts = amount if until_ready is None \
+                else min(until_ready, amount)
+            self.part_repository.add(part, parts)
+            amount -= parts
+            # No product could be created after the parts before the last.
+            if product := self.create_product():
+                yield product
+
+    def select_extra_parts(self, size: str, amount: int) -> Dict[Part, int]:
+        """Select the amount of parts best suited to complete a product.
+
+        Follows the same preference as select_extra_part(), but for all
+        extra parts at once: parts not included in any design are spread
+        evenly, any remaining amount is taken from the parts with the most in
+        stock.
+        """
+        self.track_designs()
+        stock = {
+            part: self.part_repository.sum_part_stock(part)
+            for part in self.part_repository.get_parts_without_design(size)
+        }
+        if amount <= sum(stock.values()):
+            return spread_parts_evenly(stock, amount)
+
+        # All parts without design are used, remaining parts of this size
+        # are all included in a design.
+        amount -= sum(stock.values())
+        designed_stock = {
+            part: self.part_repository.sum_part_stock(part)
+            for part in filter_parts_list_by_size(
+                self.part_repository.get_part_list(), size)
+            if part not in stock
+        }
+        stock.update(take_parts_most_in_stock(designed_stock, amount))
+        return stock
 
     def select_extra_part(self, size: str) -> Part:
-        """Select and return the part best suited to complete a product."""
-        # First select all parts in stock that are not included in any
-        # product design, filtered by size. If there are none left without
-        # a product design, choose the part with most in stock.
-        parts_without_design = filter_parts_list_by_size(
-            self.get_all_parts_in_stock_without_design(),
-            size
-        )
-        extra_part: Part
-        if parts_without_design:
-            extra_part = random.choice(parts_without_design)
-        else:
-            extra_part = self.part_repository.get_part_with_most_in_stock(size)
+        """Select and return the part best suited to complete a product.
 
+        A part in stock not included in any design is chosen at random, if
+        there is none the part with most in stock (see select_extra_parts()).
+        """
+        extra_part, = self.select_extra_parts(size, 1)
         return extra_part
 
     def select_design(self) -> Optional[Design]:
         """Select a product design to be created from stock or return None."""
-        for design in self.design_repository:
-            if self.enough_stock_for_design(design):
-                return self.design_repository.select_design_for_creation()
-        return None
+        if (design_id := self.select_design_id()) is None:
+            return None
+        return self.design_repository.catalog[design_id]
+
+    def select_design_id(self) -> Optional[int]:
+        """Select id of a design to be created from stock or return None."""
+        self.track_designs()
+        return self.design_tracker.select_design_id()
+
+    def track_designs(self) -> None:
+        """Register designs saved since the last call with stock indexes."""
+        compiled = self.design_repository.compiled
+        tracker = self.design_tracker
+        if len(tracker) == len(compiled):
+            return
+        shared = self.design_repository.shared
+        if not len(tracker) and shared is not None:
+            tracker.share(shared.sizes, shared.totals)
+        for design_id in range(len(tracker), len(compiled)):
+            design = compiled[design_id]
+            tracker.add(design)
+            for slot, _ in design.requirements:
+                self.part_repository.mark_in_design(PARTS[slot])
 
     def enough_stock_for_design(self, design: Design) -> bool:
         """Check if enough parts are in stock for the specified design."""
-        if self.part_repository.sum_stock(design.size) < design.total_parts:
+        part_repository = self.part_repository
+        if part_repository.total_per_size[design.size] < design.total_parts:
             return False
         for part, amount in design.parts.items():
-            if self.part_repository.sum_stock(part) < amount:
+            if part_repository.stock[part.slot] < amount:
                 return False
         return True
 
     def get_all_parts_in_stock_without_design(self) -> List[Part]:
         """Return all parts in stock that are not included in a design."""
-        all_parts = self.part_repository.get_part_list()
-        return [x for x in all_parts
-                if x not in self.design_repository.get_parts_in_designs()]
+        self.track_designs()
+        part_repository = self.part_repository
+        return [part for size in PART_SIZES
+                for part in part_repository.get_parts_without_design(size)]
@@ -0,0 +1,53 @@
+"""Furniture Creator's precompiled product renderer."""
+
+from __future__ import annotations
+
+from furniturecreator.dataclasses import Part, Design, CompiledDesign, \
+                                        PARTS
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Tuple
+
+CACHE_SIZE = 1024
+
+
+class ProductRenderer:
+    """Renders the text format of Products created by one Design.
+
+    The header ('[Name]S') and the required parts in type order are compiled
+    once. A product only differs from its design by its extra parts, so the
+    rendered text is cached per combination of extra parts.
+    """
+
+    def __init__(self,
+                 design: Design,
+                 compiled: Optional[CompiledDesign] = None) -> None:
+        """Compile header and required part amounts of design.
+
+        The amounts are taken from the compiled design, if given.
+        """
+        self.header = f'[{design.name}]{design.size}'
+        # Parts of a design all have the same size, so slot order is type
+        # order.
+        if compiled is None:
+            compiled = CompiledDesign.from_design(design)
+        self.amounts: Dict[int, int] = dict(compiled.requirements)
+        self.cache: Dict[Tuple[Tuple[int, int], ...], str] = {}
+
+    def render(self, extra_parts: Dict[Part, int]) -> str:
+        """Return text format of the product with given extra parts."""
+        key = tuple(sorted(
+            (part.slot, amount) for part, amount in extra_parts.items()))
+        if (text := self.cache.get(key)) is not None:
+            return text
+
+        amounts = dict(self.amounts)
+        for part, amount in extra_parts.items():
+            amounts[part.slot] = amounts.get(part.slot, 0) + amount
+        text = self.header + ''.join(
+            f'{amounts[slot]}{PARTS[slot].type}' for slot in sorted(amounts)
+        )
+        if len(self.cache) < CACHE_SIZE:
+            self.cache[key] = text
+        return text
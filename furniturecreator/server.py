@@ -0,0 +1,317 @@
+"""Furniture Creator's asyncio server for live part feeds.
+
+Run with: python -m furniturecreator serve --designs PATH [--port N | --unix
+PATH]. Clients either stream part lines, or send 'SUBSCRIBE' as first line
+to receive every product created.
+"""
+
+from __future__ import annotations
+from typing import Optional, Sequence, Set, TYPE_CHECKING
+import argparse
+import asyncio
+
+from furniturecreator.dataclasses import PARTS
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.product_manager import ProductManager
+from furniturecreator.part_parser import PartParser, PartFormatError, \
+    PartRun
+
+if TYPE_CHECKING:
+    from furniturecreator.part_parser import Codes
+
+SUBSCRIBE = b'SUBSCRIBE'
+READ_SIZE = 1 << 14
+# Longest line accepted from a connection, which is also its stream limit.
+MAX_LINE = READ_SIZE
+LINE_TOO_LONG = f'ERROR Line longer than {MAX_LINE} bytes.\n'.encode()
+
+
+class Subscriber:
+    """Connection receiving products through a bounded queue."""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int) -> None:
+        """Initialize subscriber with an empty product queue."""
+        self.writer = writer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(queue_size)
+        self.task = asyncio.current_task()
+
+
+class FacilityServer:
+    """Serves one shared facility to part feed and subscriber connections.
+
+    Part feeds only parse their lines and hand blocks of part codes and runs
+    of parts to a bounded queue. A single engine task takes blocks from that
+    queue and is the only one to change stock. When the engine falls behind
+    the queue fills up, feeds wait to put their blocks and stop reading from
+    their connections, which pushes back on the clients. Subscribers that fall
+    behind so far that their own queue is full are disconnected, so they
+    can not stall production. If the engine fails, feeds receive an error
+    and are disconnected, and so are subscribers.
+    """
+
+    def __init__(self,
+                 product_manager: ProductManager,
+                 queue_size: int = 64,
+                 subscriber_queue_size: int = 1024) -> None:
+        """Initialize server for product manager with bounded queues."""
+        self.product_manager = product_manager
+        self.part_repository = product_manager.part_repository
+        self.queue: asyncio.Queue[Codes] = asyncio.Queue(queue_size)
+        self.subscriber_queue_size = subscriber_queue_size
+        self.subscribers: Set[Subscriber] = set()
+        # Tasks serving part feeds, and the exception that stopped the
+        # engine, if any.
+        self.feeds: Set[asyncio.Task] = set()
+        self.error: Optional[Exception] = None
+        self.engine: Optional[asyncio.Task] = None
+
+    async def start_tcp(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Start engine and listen for connections on host and port."""
+        self.start_engine()
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """Start engine and listen for connections on a Unix socket."""
+        self.start_engine()
+        return await asyncio.start_unix_server(
+            self.handle_connection, path, limit=MAX_LINE)
+
+    def start_engine(self) -> None:
+        """Start the engine task if it is not running."""
+        if not self.engine:
+            self.engine = asyncio.ensure_future(self.run_engine())
+
+    async def stop(self) -> None:
+        """Stop the engine task and disconnect subscribers."""
+        if self.engine:
+            self.engine.cancel()
+            try:
+                await self.engine
+            except asyncio.CancelledError:
+                pass
+            self.engine = None
+        for subscriber in list(self.subscribers):
+            self.unsubscribe(subscriber)
+
+    async def run_engine(self) -> None:
+        """Add parts from the queue to stock and broadcast products."""
+        add = self.part_repository.add
+        create_product = self.product_manager.create_product
+        try:
+            while True:
+                block = await self.queue.get()
+                if isinstance(block, PartRun):
+                    for run_product in self.product_manager.add_run(
+                            PARTS[block.code], block.amount):
+                        self.broadcast(str(run_product).encode() + b'\n')
+                    self.queue.task_done()
+                    continue
+                for code in block:
+                    add(PARTS[code])
+                    if product := create_product():
+                        self.broadcast(str(product).encode() + b'\n')
+                self.queue.task_done()
+        except Exception as error:
+            self.fail(error)
+
+    def fail(self, error: Exception) -> None:
+        """Stop serving after the engine failed with error.
+
+        Feeds are cancelled, which makes them send the error, and
+        subscribers are disconnected.
+        """
+        self.error = error
+        for feed in list(self.feeds):
+            feed.cancel()
+        for subscriber in list(self.subscribers):
+            self.unsubscribe(subscriber)
+
+    def broadcast(self, line: bytes) -> None:
+        """Queue product line for every subscriber."""
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(line)
+            except asyncio.QueueFull:
+                self.unsubscribe(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Disconnect subscriber and stop serving it."""
+        self.subscribers.discard(subscriber)
+        subscriber.writer.close()
+        if subscriber.task and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    async def handle_connection(self,
+                                reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Serve a connection as subscriber or as part feed."""
+        try:
+            try:
+                first_line = await reader.readline()
+            except ValueError:
+                # The first line exceeds the stream limit.
+                writer.write(LINE_TOO_LONG)
+                await writer.drain()
+                return
+            if first_line.strip() == SUBSCRIBE:
+                await self.serve_subscriber(writer)
+            else:
+                await self.serve_feed(first_line, reader, writer)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_subscriber(self, writer: asyncio.StreamWriter) -> None:
+        """Write queued product lines to subscriber until disconnected."""
+        subscriber = Subscriber(writer, self.subscriber_queue_size)
+        self.subscribers.add(subscriber)
+        try:
+            while subscriber in self.subscribers:
+                writer.write(await subscriber.queue.get())
+                await writer.drain()
+        except asyncio.CancelledError:
+            # Cancelled by unsubscribe(), otherwise the server is stopping.
+            if subscriber in self.subscribers:
+                raise
+        finally:
+            self.subscribers.discard(subscriber)
+
+    async def serve_feed(self,
+                         first_line: bytes,
+                         reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter) -> None:
+        """Parse part lines from feed and queue them for the engine.
+
+        The feed is disconnected with an error on a line longer than
+        MAX_LINE, so its buffer holds at most MAX_LINE + READ_SIZE bytes,
+        and when the engine has failed.
+        """
+        if task := asyncio.current_task():
+            self.feeds.add(task)
+        parser = PartParser()
+        buffer = bytearray(first_line)
+        at_end = False
+        try:
+            while not at_end:
+                data = await reader.read(READ_SIZE)
+                at_end = not data
+                buffer += data
+                if at_end and buffer and not buffer.endswith(b'\n'):
+                    buffer += b'\n'
+                end = buffer.rfind(b'\n') + 1
+                if len(buffer) - end > MAX_LINE:
+                    writer.write(LINE_TOO_LONG)
+                    await writer.drain()
+                    return
+                if not end:
+                    continue
+                block = bytes(buffer[:end])
+                del buffer[:end]
+                if not await self.queue_block(parser, block, writer):
+                    return
+        except asyncio.CancelledError:
+            # Cancelled by fail(), otherwise the server is stopping.
+            if self.error is None:
+                raise
+            await self.write_engine_error(writer)
+        finally:
+            self.feeds.discard(task)
+
+    async def queue_block(self,
+                          parser: PartParser,
+                          block: bytes,
+                          writer: asyncio.StreamWriter) -> bool:
+        """Queue codes of block for the engine, return False on errors.
+
+        Codes of the parts before an incorrect part are queued as well.
+        """
+        if self.error is not None:
+            await self.write_engine_error(writer)
+            return False
+        try:
+            for codes in parser.parse_block_or_raise(block, len(block)):
+                # Waits while the queue is full, which stops reading from
+                # this feed until the engine catches up.
+                await self.queue.put(codes)
+        except PartFormatError as error:
+            writer.write(f'ERROR {error}\n'.encode())
+            await writer.drain()
+            return False
+        return True
+
+    async def write_engine_error(self, writer: asyncio.StreamWriter) -> None:
+        """Write the error that stopped the engine to a feed."""
+        writer.write(f'ERROR Engine stopped: {self.error}\n'.encode())
+        await writer.drain()
+
+
+def load_designs(product_manager: ProductManager, path: str) -> None:
+    """Save designs from file, up to the first empty line."""
+    with open(path) as file:
+        for line in file:
+            if not (design_str := line.strip()):
+                return
+            product_manager.save_design(design_str)
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse command line arguments of the serve command."""
+    parser = argparse.ArgumentParser(
+        prog='furniturecreator serve',
+        description='Serve a facility to live part feeds and product '
+                    'subscribers over a socket.'
+    )
+    parser.add_argument(
+        '--designs', required=True, metavar='PATH',
+        help='file with product designs, one per line'
+    )
+    listen = parser.add_mutually_exclusive_group()
+    listen.add_argument(
+        '--port', type=int, default=7878, metavar='N',
+        help='localhost TCP port to listen on (default: 7878)'
+    )
+    listen.add_argument(
+        '--unix', metavar='PATH', help='Unix socket path to listen on'
+    )
+    parser.add_argument(
+        '--host', default='127.0.0.1', help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        '--queue-size', type=int, default=64, metavar='N',
+        help='blocks of parts waiting for the engine before feeds wait'
+    )
+    parser.add_argument(
+        '--subscriber-queue-size', type=int, default=1024, metavar='N',
+        help='products waiting for a subscriber before it is disconnected'
+    )
+    return parser.parse_args(argv)
+
+
+async def serve(arguments: argparse.Namespace) -> None:
+    """Run the server until cancelled."""
+    product_manager = ProductManager(PartRepository())
+    load_designs(product_manager, arguments.designs)
+    server = FacilityServer(product_manager,
+                            arguments.queue_size,
+                            arguments.subscriber_queue_size)
+    if arguments.unix:
+        listener = await server.start_unix(arguments.unix)
+    else:
+        listener = await server.start_tcp(arguments.host, arguments.port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main(argv: Sequence[str]) -> int:
+    """Run serve command and return exit code."""
+    arguments = parse_arguments(argv)
+    try:
+        asyncio.run(serve(arguments))
+    except KeyboardInterrupt:
+        pass
+    return 0
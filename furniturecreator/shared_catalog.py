@@ -0,0 +1,308 @@
+"""Furniture Creator's compiled design catalogs in shared memory.
+
+The batch runner compiles the catalog of every distinct set of designs once
+and places it in a shared memory block. Worker processes attach to the block
+by name and read their designs through views on it, so the names, sizes,
+totals and part requirements of the designs are stored once however many
+workers run. A worker only keeps the state of its own scheduler and design
+tracker.
+
+Block format (native byte order, so every array of uint64 is aligned):
+- header: magic b'FCSC', format version (uint16), 2 padding bytes, hash of
+  the design lines (16 bytes, see catalog_key), number of designs, number of
+  part requirements and length of the names (3 x uint64);
+- totals: total parts per design (uint64);
+- requirement matrix, one row per design: the index of the first
+  requirement of every design and the end of the last (uint64), then the
+  amount per requirement (uint64);
+- name indexes: the index of the first byte of every name and the end of
+  the last (uint64);
+- sizes: size per design (uint8, index in PART_SIZES);
+- slots: slot per requirement (uint8), in slot order per design;
+- names: UTF-8 names of all designs.
+"""
+
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, \
+    TypeVar, Union, overload, TYPE_CHECKING
+from array import array
+from itertools import accumulate
+import struct
+
+from furniturecreator.catalog_cache import catalog_key
+from furniturecreator.dataclasses import CompiledDesign, Design, PARTS, \
+                                        PART_SIZES
+from furniturecreator.design_repository import DesignRepository
+from furniturecreator.product_renderer import ProductRenderer
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+    from furniturecreator.catalog_cache import CatalogCache
+
+T = TypeVar('T')
+
+MAGIC = b'FCSC'
+VERSION = 1
+
+HEADER = struct.Struct('=4sH2x16sQQQ')
+WORD = array('Q').itemsize
+
+
+def catalog_to_block(key: bytes,
+                     design_repository: DesignRepository) -> bytes:
+    """Return block format of the designs of repository keyed by key."""
+    designs = design_repository.catalog
+    compiled = design_repository.compiled
+    names = [design.name.encode() for design in designs]
+    starts = list(accumulate(
+        (len(design.requirements) for design in compiled), initial=0))
+    name_starts = list(accumulate(map(len, names), initial=0))
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, key, len(designs), starts[-1],
+                    name_starts[-1]),
+        array('Q', [design.total_parts for design in designs]).tobytes(),
+        array('Q', starts).tobytes(),
+        array('Q', [amount for design in compiled
+                    for _, amount in design.requirements]).tobytes(),
+        array('Q', name_starts).tobytes(),
+        bytes(PART_SIZES.index(design.size) for design in designs),
+        bytes(slot for design in compiled for slot, _ in design.requirements),
+        b''.join(names),
+    ])
+
+
+class SharedSequence(Sequence[T]):
+    """Read-only sequence of items built on access by their index."""
+
+    def __init__(self, length: int, get: Callable[[int], T]) -> None:
+        """Initialize sequence of length, getting items from get(index)."""
+        self.length = length
+        self.get = get
+
+    def __len__(self) -> int:
+        """Return number of items."""
+        return self.length
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        """Return item at index, or list of the items in a slice."""
+        if isinstance(index, slice):
+            return [self.get(item)
+                    for item in range(self.length)[index]]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('Design id out of range.')
+        return self.get(index)
+
+
+class SharedDesigns:
+    """Designs of a catalog, read through views on its shared memory block.
+
+    The catalog, compiled designs, names and sizes are sequences building
+    their items on access, the totals are a view on the block. Designs,
+    compiled designs and renderers are kept per worker once built, so every
+    product of a design reuses them.
+    """
+
+    def __init__(self, buffer: memoryview) -> None:
+        """Initialize views on the catalog in buffer.
+
+        Raise ValueError if buffer does not hold a complete catalog.
+        """
+        (magic, version, self.key, count, requirements,
+         names) = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('No shared catalog in block.')
+        self.views: List[memoryview] = []
+        self.decoded: Dict[int, Design] = {}
+        self.decoded_compiled: Dict[int, CompiledDesign] = {}
+        self.rendered: Dict[int, ProductRenderer] = {}
+        offset = HEADER.size
+        # Arrays of uint64 first, then of uint8.
+        for length, size in ((count, WORD), (count + 1, WORD),
+                             (requirements, WORD), (count + 1, WORD),
+                             (count, 1), (requirements, 1), (names, 1)):
+            end = offset + length * size
+            if end > len(buffer):
+                self.release()
+                raise ValueError('Shared catalog is truncated.')
+            view = buffer[offset:end]
+            self.views.append(view.cast('Q') if size == WORD else view)
+            offset = end
+        (self.totals, self.starts, self.amounts, self.name_starts,
+         self.size_indexes, self.slots, self.names) = self.views
+        self.catalog = SharedSequence(count, self.get_design)
+        self.compiled = SharedSequence(count, self.get_compiled)
+        self.renderers = SharedSequence(count, self.get_renderer)
+        self.design_names = SharedSequence(count, self.get_name)
+        self.sizes = SharedSequence(count, self.get_size)
+
+    def __len__(self) -> int:
+        """Return number of designs."""
+        return len(self.totals)
+
+    def get_name(self, design_id: int) -> str:
+        """Return name of design."""
+        return str(self.names[self.name_starts[design_id]:
+                              self.name_starts[design_id + 1]], 'utf-8')
+
+    def get_size(self, design_id: int) -> str:
+        """Return size of design."""
+        return PART_SIZES[self.size_indexes[design_id]]
+
+    def get_requirements(self,
+                         design_id: int) -> Tuple[Tuple[int, int], ...]:
+        """Return (slot, amount) requirements of design in slot order."""
+        start = self.starts[design_id]
+        end = self.starts[design_id + 1]
+        return tuple(zip(self.slots[start:end], self.amounts[start:end]))
+
+    def get_design(self, design_id: int) -> Design:
+        """Return design, built on first use."""
+        if (design := self.decoded.get(design_id)) is None:
+            design = self.decoded[design_id] = Design(
+                self.get_name(design_id), self.get_size(design_id), {
+                    PARTS[slot]: amount
+                    for slot, amount in self.get_requirements(design_id)
+                }, self.totals[design_id])
+        return design
+
+    def get_compiled(self, design_id: int) -> CompiledDesign:
+        """Return compiled design, built on first use."""
+        if (compiled := self.decoded_compiled.get(design_id)) is None:
+            compiled = self.decoded_compiled[design_id] = CompiledDesign(
+                self.get_size(design_id), self.totals[design_id],
+                self.get_requirements(design_id))
+        return compiled
+
+    def get_renderer(self, design_id: int) -> ProductRenderer:
+        """Return renderer of design, created on first use."""
+        if (renderer := self.rendered.get(design_id)) is None:
+            renderer = self.rendered[design_id] = ProductRenderer(
+                self.get_design(design_id), self.get_compiled(design_id))
+        return renderer
+
+    def release(self) -> None:
+        """Release the views, after which the block can be closed."""
+        for view in self.views:
+            view.release()
+        self.decoded.clear()
+        self.decoded_compiled.clear()
+        self.rendered.clear()
+
+
+class SharedCatalog:
+    """Reads designs from the catalog in a shared memory block.
+
+    The block stays attached while its designs are in use, until close().
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize with name of the shared memory block."""
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.memory: Optional[SharedMemory] = None
+        self.designs: Optional[SharedDesigns] = None
+
+    def load(self, key: bytes) -> Optional[SharedDesigns]:
+        """Return designs of block if they are keyed by key, None if not."""
+        if self.memory is None:
+            self.attach()
+        if self.designs is None or self.designs.key != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.designs
+
+    def attach(self) -> None:
+        """Attach to the block and its designs, if it holds a catalog."""
+        from multiprocessing.shared_memory import SharedMemory
+        try:
+            self.memory = SharedMemory(self.name)
+        except OSError:
+            return
+        assert self.memory.buf is not None
+        try:
+            self.designs = SharedDesigns(self.memory.buf)
+        except (struct.error, ValueError):
+            self.close()
+
+    def save_designs(self,
+                     design_repository: DesignRepository,
+                     design_strs: Sequence[str]) -> None:
+        """Add designs to repository from the block, parsing on a miss."""
+        if (designs := self.load(catalog_key(design_strs))) is not None:
+            design_repository.share(designs)
+            return
+        for design_str in design_strs:
+            design_repository.save(design_str)
+
+    def close(self) -> None:
+        """Release the views on the block and detach from it."""
+        if self.designs is not None:
+            self.designs.release()
+            self.designs = None
+        if self.memory is not None:
+            self.memory.close()
+            self.memory = None
+
+
+class SharedCatalogs:
+    """Creates and owns one shared memory block per distinct catalog.
+
+    Blocks are unlinked on close(), after the workers are done with them.
+    """
+
+    def __init__(self, catalog_cache: Optional[CatalogCache] = None) -> None:
+        """Initialize without blocks, compiling through catalog cache."""
+        self.catalog_cache = catalog_cache
+        self.blocks: Dict[bytes, SharedMemory] = {}
+
+    def __enter__(self) -> SharedCatalogs:
+        """Return self as context manager."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close and unlink all blocks on leaving context."""
+        self.close()
+
+    def share(self, design_strs: Sequence[str]) -> str:
+        """Return name of block of the designs, creating it when needed.
+
+        Designs that can not be compiled or stored return '', workers parse
+        those themselves and report their errors.
+        """
+        from multiprocessing.shared_memory import SharedMemory
+        key = catalog_key(design_strs)
+        if key in self.blocks:
+            return self.blocks[key].name
+        design_repository = DesignRepository()
+        try:
+            if self.catalog_cache:
+                self.catalog_cache.save_designs(design_repository,
+                                                design_strs)
+            else:
+                for design_str in design_strs:
+                    design_repository.save(design_str)
+            data = catalog_to_block(key, design_repository)
+        except (ValueError, OverflowError, struct.error):
+            return ''
+        memory = SharedMemory(create=True, size=len(data))
+        assert memory.buf is not None
+        memory.buf[:len(data)] = data
+        self.blocks[key] = memory
+        return memory.name
+
+    def close(self) -> None:
+        """Close and unlink all blocks."""
+        for memory in self.blocks.values():
+            memory.close()
+            memory.unlink()
+        self.blocks.clear()
@@ -0,0 +1,146 @@
+"""Furniture Creator's stage statistics.
+
+Statistics are gathered by wrapping the methods of one FurnitureCreator
+instance with counting and timing versions, and through the counters of its
+design tracker, so nothing is measured, and nothing costs time, unless
+Stats.instrument() is called.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, TypeVar
+from collections import Counter, defaultdict
+from functools import wraps
+import time
+
+from furniturecreator import FurnitureCreator
+from furniturecreator.output_writer import OutputWriter
+
+Function = TypeVar('Function', bound=Callable[..., Any])
+
+STAGES = {
+    'parse': 'parse parts',
+    'stock': 'add parts to stock',
+    'create': 'create products',
+    'select': '  select design',
+    'filler': '  select extra parts',
+    'output': 'write products',
+}
+
+
+class Stats:
+    """Counters and cumulative timings per stage of a run."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters and timings."""
+        self.counters: Counter[str] = Counter({
+            'design checks': 0,
+            'heap pops': 0,
+            'extra parts without design': 0,
+            'extra parts most in stock': 0,
+        })
+        self.products: Counter[str] = Counter()
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.app: FurnitureCreator
+
+    def timed(self, stage: str, function: Function) -> Function:
+        """Return function adding its running time to stage."""
+        timings = self.timings
+        clock = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings[stage] += clock() - start
+        return wrapper  # type: ignore
+
+    def timed_iterator(self,
+                       stage: str,
+                       function: Callable[..., Iterator[Any]]
+                       ) -> Callable[..., Iterator[Any]]:
+        """Return generator function adding time of every step to stage."""
+        timings = self.timings
+        clock = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            iterator = function(*args, **kwargs)
+            try:
+                while True:
+                    start = clock()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        timings[stage] += clock() - start
+                    yield item
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close:
+                    close()
+        return wrapper
+
+    def instrument(self, app: FurnitureCreator) -> None:
+        """Wrap methods of app and its components to gather statistics."""
+        self.app = app
+        part_repository = app.part_repository
+        product_manager = app.product_manager
+        tracker = product_manager.design_tracker
+        counters = self.counters
+
+        app.read_part_codes = self.timed_iterator(  # type: ignore
+            'parse', app.read_part_codes)
+        app.read_part_codes_mapped = self.timed_iterator(  # type: ignore
+            'parse', app.read_part_codes_mapped)
+        part_repository.add = self.timed(  # type: ignore
+            'stock', part_repository.add)
+
+        create_product = self.timed('create', product_manager.create_product)
+
+        @wraps(create_product)
+        def count_product() -> Any:
+            if product := create_product():
+                self.products[f'[{product.name}]{product.size}'] += 1
+            return product
+        product_manager.create_product = count_product  # type: ignore
+
+        product_manager.select_design_id = self.timed(  # type: ignore
+            'select', product_manager.select_design_id)
+        tracker.counters = counters
+
+        select_extra_parts = self.timed(
+            'filler', product_manager.select_extra_parts)
+
+        @wraps(select_extra_parts)
+        def count_filler(size: str, amount: int) -> Any:
+            selection = select_extra_parts(size, amount)
+            for part, part_amount in selection.items():
+                if part_repository.in_design[part.slot]:
+                    counters['extra parts most in stock'] += part_amount
+                else:
+                    counters['extra parts without design'] += part_amount
+            return selection
+        product_manager.select_extra_parts = count_filler  # type: ignore
+
+        if not app.output:
+            app.output = OutputWriter.for_stdout()
+        app.output.write = self.timed(  # type: ignore
+            'output', app.output.write)
+
+    def report(self) -> str:
+        """Return human readable summary of the statistics."""
+        lines = [
+            f'Parts processed: {self.app.parts_read}',
+            f'Products created: {self.app.products_created}',
+        ]
+        for name, amount in self.products.most_common():
+            lines.append(f'  {name}: {amount}')
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f'{name.capitalize()}: {amount}')
+        lines.append('Time per stage:')
+        for stage, label in STAGES.items():
+            lines.append(f'  {label}: {self.timings[stage]:.3f}s')
+        return '\n'.join(lines)
@@ -1,10 +1,14 @@
 """Furniture Creator global utility functions."""
 
 from __future__ import annotations
-from typing import List, Dict
+import random
 
 from furniturecreator.dataclasses import Part
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Dict
+
 
 def filter_parts_list_by_size(
         parts: List[Part],
@@ -20,7 +24,60 @@ def filter_parts_dict_by_size(
         parts: Dict[Part, int],
         size: str) -> Dict[Part, int]:
     """Filter a dict of parts by size."""
-    if size != 'S' and size != 'L':
-        raise ValueError(f'''Wrong size supplied: {'size'}. Should be
-            either of: [S]mall or [L]arge.''')
-    return {f: n for f, n in parts.items() if f.size == size}
+    return {f: parts[f] for f in filter_parts_list_by_size(list(parts), size)}
+
+
+def spread_parts_evenly(
+        parts: Dict[Part, int],
+        amount: int) -> Dict[Part, int]:
+    """Select amount of parts from stock, spread as evenly as possible.
+
+    Every part is taken up to the same level, limited by its stock. Parts
+    that receive one more to reach the requested amount are chosen at random.
+    """
+    if amount > sum(parts.values()):
+        raise ValueError('Not enough parts in stock to select from.')
+    # Find the highest level that takes no more than the requested amount.
+    low, high = 0, max(parts.values(), default=0)
+    while low < high:
+        level = (low + high + 1) // 2
+        if sum(min(x, level) for x in parts.values()) <= amount:
+            low = level
+        else:
+            high = level - 1
+    selection = {part: min(stock, low) for part, stock in parts.items()}
+    remainder = amount - sum(selection.values())
+    above = [part for part, stock in parts.items() if stock > low]
+    for part in random.sample(above, remainder):
+        selection[part] += 1
+    return {part: x for part, x in selection.items() if x}
+
+
+def take_parts_most_in_stock(
+        parts: Dict[Part, int],
+        amount: int) -> Dict[Part, int]:
+    """Select amount of parts from stock, one by one the most in stock.
+
+    Equal to repeatedly taking one of the part with the most in stock, where
+    ties are resolved by order of the parts dictionary.
+    """
+    if amount > sum(parts.values()):
+        raise ValueError('Not enough parts in stock to select from.')
+    # Find the lowest level to which taking everything above it takes no
+    # more than the requested amount.
+    low, high = 0, max(parts.values(), default=0)
+    while low < high:
+        level = (low + high) // 2
+        if sum(max(0, x - level) for x in parts.values()) <= amount:
+            high = level
+        else:
+            low = level + 1
+    selection = {part: max(0, stock - low) for part, stock in parts.items()}
+    remainder = amount - sum(selection.values())
+    for part, stock in parts.items():
+        if not remainder:
+            break
+        if stock >= low:
+            selection[part] += 1
+            remainder -= 1
+    return {part: x for part, x in selection.items() if x}
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import unittest
+import random
+
+from furniturecreator.dataclasses import Part
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.product_manager import ProductManager
+
+try:
+    import numpy  # noqa: F401
+    from furniturecreator.batch_engine import BatchEngine
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+@unittest.skipUnless(HAS_NUMPY, 'batch engine requires NumPy')
+class TestBatchEngine(unittest.TestCase):
+
+    designs = ['[Table]L10a15b5c30', '[Table]S10a10b25', '[Desk]L15b1c21',
+               '[Desk]S10b5c16', '[Chair]L2a1c6', '[Stool]S2a3']
+
+    def setUp(self) -> None:
+        self.part_repository = PartRepository()
+        self.manager = ProductManager(self.part_repository)
+        for design_str in self.designs:
+            self.manager.save_design(design_str)
+
+    def tearDown(self) -> None:
+        del self.manager
+
+    def fixture_slots(self, seed: int, amount: int) -> list:
+        generator = random.Random(seed)
+        return [generator.choice([0, 1, 2, 3, 26, 27, 28, 29])
+                for _ in range(amount)]
+
+    def create_products_per_part(self, slots: list, seed: int) -> list:
+        part_repository = PartRepository()
+        manager = ProductManager(part_repository)
+        for design_str in self.designs:
+            manager.save_design(design_str)
+        random.seed(seed)
+        products = []
+        for slot in slots:
+            part_repository.add(Part.from_slot(slot))
+            if product := manager.create_product():
+                products.append(str(product))
+        return products
+
+    # compile
+    def test_compile(self) -> None:
+        engine = BatchEngine(self.manager)
+        self.assertEqual(engine.requirements.shape, (6, 52))
+        self.assertEqual(engine.requirements[0, 26], 10)
+        self.assertEqual(engine.requirements[0, 27], 15)
+        self.assertEqual(list(engine.totals), [30, 25, 21, 16, 6, 3])
+        self.assertEqual(list(engine.large),
+                         [True, False, True, False, True, False])
+
+    def test_compile_slots(self) -> None:
+        engine = BatchEngine(self.manager)
+        self.assertEqual(list(engine.slots), [0, 1, 2, 26, 27, 28])
+        self.assertEqual(list(engine.slot_requirements[0]),
+                         [0, 10, 0, 0, 0, 2])
+
+    def test_compile_invalid_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            BatchEngine(self.manager, 0)
+
+    # process
+    def test_process_matches_per_part(self) -> None:
+        slots = self.fixture_slots(3, 2000)
+        expected = self.create_products_per_part(slots, 42)
+        for chunk_size in (1, 13, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                self.setUp()
+                engine = BatchEngine(self.manager, chunk_size)
+                random.seed(42)
+                result = [str(x) for x in engine.process(slots)]
+                self.assertEqual(result, expected)
+
+    def test_process_stock(self) -> None:
+        engine = BatchEngine(self.manager)
+        result = [str(x) for x in engine.process([0, 0, 26, 29, 0, 1])]
+        self.assertEqual(result, ['[Stool]S3a'])
+        self.assertEqual(
+            self.part_repository.parts,
+            {Part('a', 'L'): 1, Part('d', 'L'): 1, Part('b', 'S'): 1}
+        )
+
+    def test_process_window(self) -> None:
+        engine = BatchEngine(self.manager, 4096)
+        self.assertEqual(engine.window, 32)
+        list(engine.process([27] * 100))
+        self.assertEqual(engine.window, 256)
+        list(engine.process([0, 0, 0]))
+        self.assertEqual(engine.window, 32)
+        self.assertEqual(BatchEngine(self.manager, 8).window, 8)
+
+    def test_process_recompiles_new_designs(self) -> None:
+        engine = BatchEngine(self.manager)
+        self.manager.save_design('[Peg]S1z1')
+        self.assertEqual([str(x) for x in engine.process([25])],
+                         ['[Peg]S1z'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import unittest
+import os
+import tempfile
+
+from furniturecreator import batch_runner
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.directory.name, 'input')
+        self.output_dir = os.path.join(self.directory.name, 'output')
+        os.mkdir(self.input_dir)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def fixture_input(self, name: str, content: str) -> str:
+        path = os.path.join(self.input_dir, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    # run_file
+    def test_run_file(self) -> None:
+        input_path = self.fixture_input(
+            'day1.txt', '[Stool]S2a1b3\n\naS\naS\nbS\naS\n')
+        output_path = os.path.join(self.directory.name, 'day1.out')
+        stats = batch_runner.run_file(input_path, output_path)
+        self.assertEqual((stats.parts, stats.products, stats.error),
+                         (4, 1, ''))
+        with open(output_path) as file:
+            self.assertEqual(file.read(), '[Stool]S2a1b\n')
+
+    def test_run_file_error(self) -> None:
+        input_path = self.fixture_input('day1.txt', '[Stool]S2a1b3\n\naX\n')
+        output_path = os.path.join(self.directory.name, 'day1.out')
+        stats = batch_runner.run_file(input_path, output_path)
+        self.assertIn('line 3', stats.error)
+        self.assertIn('error', str(stats))
+
+    def test_run_file_catalog_cache(self) -> None:
+        input_path = self.fixture_input(
+            'day1.txt', '[Stool]S2a1b3\n\naS\naS\nbS\naS\n')
+        output_path = os.path.join(self.directory.name, 'day1.out')
+        cache_dir = os.path.join(self.directory.name, 'cache')
+        for _ in range(2):
+            stats = batch_runner.run_file(input_path, output_path,
+                                          catalog_cache=cache_dir)
+            self.assertEqual(stats.products, 1)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    # collect_input_paths
+    def test_collect_input_paths(self) -> None:
+        second = self.fixture_input('b.txt', '')
+        first = self.fixture_input('a.txt', '')
+        os.mkdir(os.path.join(self.input_dir, 'c'))
+        self.assertEqual(
+            batch_runner.collect_input_paths([self.input_dir, second]),
+            [first, second, second]
+        )
+
+    # output_paths_for
+    def test_output_paths_for(self) -> None:
+        self.assertEqual(
+            batch_runner.output_paths_for(['x/a.txt', 'b'], 'out'),
+            [os.path.join('out', 'a.txt.out'), os.path.join('out', 'b.out')]
+        )
+
+    def test_output_paths_for_duplicate(self) -> None:
+        with self.assertRaises(ValueError):
+            batch_runner.output_paths_for(['x/a.txt', 'y/a.txt'], 'out')
+
+    # run
+    def test_run(self) -> None:
+        self.fixture_input('a.txt', '[Lamp]L1c1\n\ncL\ncL\n')
+        self.fixture_input('b.txt', '[Stool]S2a1b3\n\naS\naS\nbS\n')
+        all_stats = batch_runner.run(
+            batch_runner.collect_input_paths([self.input_dir]),
+            self.output_dir,
+            workers=2
+        )
+        self.assertEqual([x.products for x in all_stats], [2, 1])
+        with open(os.path.join(self.output_dir, 'a.txt.out')) as file:
+            self.assertEqual(file.read(), '[Lamp]L1c\n[Lamp]L1c\n')
+
+    def test_run_shared_catalog(self) -> None:
+        self.fixture_input('a.txt', '[Lamp]L1c1\n\ncL\ncL\n')
+        self.fixture_input('b.txt', '[Lamp]L1c1\n\ncL\n')
+        self.fixture_input('c.txt', '[Stool]S2a1b3\n\naS\naS\nbX\n')
+        all_stats = batch_runner.run(
+            batch_runner.collect_input_paths([self.input_dir]),
+            self.output_dir,
+            workers=2,
+            shared_catalog=True
+        )
+        self.assertEqual([x.products for x in all_stats], [2, 1, 0])
+        self.assertIn('line 5', all_stats[2].error)
+        with open(os.path.join(self.output_dir, 'b.txt.out')) as file:
+            self.assertEqual(file.read(), '[Lamp]L1c\n')
+
+    # read_design_strs
+    def test_read_design_strs(self) -> None:
+        path = self.fixture_input('a.txt', '[Lamp]L1c1\n[Stool]S1a1\n\ncL\n')
+        self.assertEqual(batch_runner.read_design_strs(path),
+                         ['[Lamp]L1c1', '[Stool]S1a1'])
+        self.assertEqual(batch_runner.read_design_strs(path + '.missing'),
+                         [])
+
+
+if __name__ == "__main__":
+    unittest.main()
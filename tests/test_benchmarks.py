@@ -0,0 +1,89 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+
+from benchmarks.workload import Workload, generate_designs, generate_parts, \
+                                part_weights
+from benchmarks.measure import percentile, measure_part_repository_save, \
+                               measure_startup, over_startup_budget, \
+                               FIRST_LINE_TIMEOUT
+from furniturecreator.design_repository import DesignRepository
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'samples')
+
+
+class TestWorkload(unittest.TestCase):
+
+    def test_workload_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            Workload(mix='normal')
+        with self.assertRaises(ValueError):
+            Workload(filler='lots')
+        with self.assertRaises(ValueError):
+            Workload(designs=0)
+
+    def test_workload_name(self) -> None:
+        self.assertEqual(Workload(10, 500, 'skewed', 'high', 3).name,
+                         'd10-p500-skewed-high-s3')
+
+    # generate_designs
+    def test_generate_designs(self) -> None:
+        designs = generate_designs(Workload(designs=50, filler='high'))
+        self.assertEqual(len(designs), 50)
+        self.assertEqual(designs, generate_designs(
+            Workload(designs=50, filler='high')))
+        design_repository = DesignRepository()
+        for design_str in designs:
+            design_repository.save(design_str)
+        for design in design_repository.designs:
+            self.assertGreaterEqual(design.total_parts,
+                                    3 * sum(design.parts.values()))
+
+    # generate_parts
+    def test_generate_parts(self) -> None:
+        first, second = io.BytesIO(), io.BytesIO()
+        generate_parts(Workload(parts=1000, seed=4), first)
+        generate_parts(Workload(parts=1000, seed=4), second)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertEqual(len(first.getvalue()), 3000)
+
+    # part_weights
+    def test_part_weights(self) -> None:
+        self.assertEqual(set(part_weights(Workload())), {1.0})
+        skewed = part_weights(Workload(mix='skewed'))
+        self.assertEqual(max(skewed), 1.0)
+        self.assertEqual(len(set(skewed)), 52)
+
+
+class TestMeasure(unittest.TestCase):
+
+    def test_percentile(self) -> None:
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 0.5), 3)
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 0.99), 5)
+        self.assertEqual(percentile([], 0.5), 0)
+
+    def test_measure_part_repository_save(self) -> None:
+        result = measure_part_repository_save(Workload(parts=200))
+        self.assertEqual(result['parts'], 200)
+        self.assertEqual(result['latency_samples'], 4)
+
+    def test_measure_startup(self) -> None:
+        result = measure_startup(os.path.join(SAMPLES, 'short1.txt'), 1)
+        self.assertEqual(result['runs'], 1)
+        self.assertGreater(result['interpreter_ms'], 0)
+        # Single runs are noisy, the difference to the interpreter may be
+        # negative.
+        self.assertEqual(set(result), {'interpreter_ms', 'import_ms',
+                                       'first_product_ms', 'runs'})
+        # The first product is written before the input is closed.
+        self.assertLess(result['first_product_ms'], FIRST_LINE_TIMEOUT * 1000)
+
+    def test_over_startup_budget(self) -> None:
+        self.assertEqual(over_startup_budget(
+            {'import_ms': 1.0, 'first_product_ms': 1e6}),
+            ['first_product_ms'])
+
+
+if __name__ == "__main__":
+    unittest.main()
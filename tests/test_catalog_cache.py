@@ -0,0 +1,122 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+from furniturecreator import FurnitureCreator
+from furniturecreator.catalog_cache import CatalogCache, catalog_from_bytes, \
+    catalog_key, catalog_to_bytes
+from furniturecreator.dataclasses import CompiledDesign
+from furniturecreator.design_repository import DesignRepository
+from furniturecreator.output_writer import OutputWriter
+
+DESIGN_STRS = ['[Stool]S1c3b3a10', '[Lamp]L1a1z2', '[Chair]S2b4']
+INPUT = ('\n'.join(DESIGN_STRS) + '\n\n'
+         + 'aS\naS\nbS\ncS\nbS\nzL\naS\nbS\nzL\naL\ncS\nbS\naS\n' * 3)
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache = CatalogCache(self.directory)
+        self.key = catalog_key(DESIGN_STRS)
+        self.repository = DesignRepository()
+        for design_str in DESIGN_STRS:
+            self.repository.save(design_str)
+
+    def tearDown(self) -> None:
+        del self.repository
+
+    def run_app(self, cache: CatalogCache = None) -> bytes:
+        output = io.BytesIO()
+        path = os.path.join(self.directory, 'input.txt')
+        with open(path, 'w') as file:
+            file.write(INPUT)
+        FurnitureCreator(input_path=path, output=OutputWriter(output),
+                         catalog_cache=cache).main()
+        return output.getvalue()
+
+    # catalog_to_bytes / catalog_from_bytes
+    def test_bytes(self) -> None:
+        data = catalog_to_bytes(self.key, self.repository.catalog,
+                                self.repository.compiled)
+        self.assertEqual(data[:4], b'FCDC')
+        designs, compiled = catalog_from_bytes(self.key, data)
+        self.assertEqual(designs, self.repository.catalog)
+        self.assertEqual(compiled, self.repository.compiled)
+        self.assertEqual([list(design.parts) for design in designs],
+                         [list(design.parts)
+                          for design in self.repository.catalog])
+
+    def test_bytes_empty(self) -> None:
+        key = catalog_key([])
+        self.assertEqual(
+            catalog_from_bytes(key, catalog_to_bytes(key, [], [])), ([], []))
+
+    def test_from_bytes_invalid(self) -> None:
+        data = catalog_to_bytes(self.key, self.repository.catalog,
+                                self.repository.compiled)
+        corrupt = data[:30] + bytes([data[30] ^ 1]) + data[31:]
+        cases = [
+            (b'', 'Not a Furniture Creator catalog'),
+            (b'XXXX' + data[4:], 'Not a Furniture Creator catalog'),
+            (data[:4] + b'\x01\x00' + data[6:], 'Unsupported .* version'),
+            (corrupt, 'corrupt'),
+        ]
+        for data, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(ValueError, message):
+                    catalog_from_bytes(self.key, data)
+        with self.assertRaisesRegex(ValueError, 'different designs'):
+            catalog_from_bytes(catalog_key(DESIGN_STRS[:1]), data)
+
+    # load / save
+    def test_load_missing(self) -> None:
+        self.assertIsNone(self.cache.load(self.key))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_save(self) -> None:
+        self.cache.save(self.key, self.repository.catalog,
+                        self.repository.compiled)
+        self.cache.save(self.key, self.repository.catalog,
+                        self.repository.compiled)
+        self.assertEqual(os.listdir(self.directory),
+                         [self.key.hex() + '.catalog'])
+        self.assertEqual(self.cache.load(self.key),
+                         (self.repository.catalog, self.repository.compiled))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_save_huge_amount(self) -> None:
+        repository = DesignRepository()
+        repository.save(f'[Stool]S{2 ** 64}a{2 ** 64}')
+        self.cache.save(self.key, repository.catalog, repository.compiled)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    # save_designs
+    def test_save_designs(self) -> None:
+        self.cache.save_designs(DesignRepository(), DESIGN_STRS)
+        repository = DesignRepository()
+        with patch.object(CompiledDesign, 'from_design') as from_design:
+            self.cache.save_designs(repository, DESIGN_STRS)
+        from_design.assert_not_called()
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(repository.catalog, self.repository.catalog)
+        self.assertEqual(repository.compiled, self.repository.compiled)
+        self.assertEqual(repository.parts_in_designs,
+                         self.repository.parts_in_designs)
+
+    # FurnitureCreator
+    def test_main(self) -> None:
+        expected = self.run_app()
+        self.assertEqual(self.run_app(self.cache), expected)
+        self.assertEqual(self.run_app(self.cache), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+import random
+import tempfile
+import zlib
+
+from furniturecreator import FurnitureCreator
+from furniturecreator.checkpoint import Checkpoint, Checkpointer
+from furniturecreator.output_writer import OutputWriter
+
+DESIGNS = b'[Stool]S1a3\n[Lamp]L1c2\n[Chair]S2b4\n\n'
+PARTS = b'aS\ncL\nbS\naS\nbS\ncS\naL\nbS\nbL\naS\nbS\ncS\n' * 5
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'state.bin')
+        random.seed(3)
+        self.checkpoint = Checkpoint(
+            offset=40, line=4, parts_read=12, products_created=3,
+            designs_crc=1234, stock=[(27, 2), (0, 1)], order=[1, 0, 2],
+            produced=[4, 0, 3],
+            random_state=random.getstate()
+        )
+
+    def tearDown(self) -> None:
+        del self.checkpoint
+
+    def fixture_input(self, content: bytes) -> str:
+        path = os.path.join(self.directory, f'input{len(content)}.txt')
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def run_app(self,
+                content: bytes,
+                resume: bool = False,
+                parts: int = 0) -> bytes:
+        output = io.BytesIO()
+        app = FurnitureCreator(
+            input_path=self.fixture_input(content),
+            output=OutputWriter(output),
+            checkpointer=Checkpointer(self.path, parts),
+            resume=resume
+        )
+        app.main()
+        return output.getvalue()
+
+    # to_bytes / from_bytes
+    def test_bytes(self) -> None:
+        data = self.checkpoint.to_bytes()
+        self.assertEqual(data[:4], b'FCCP')
+        self.assertEqual(Checkpoint.from_bytes(data), self.checkpoint)
+
+    def test_bytes_without_random_state(self) -> None:
+        checkpoint = Checkpoint(stock=[(51, 7)])
+        self.assertEqual(Checkpoint.from_bytes(checkpoint.to_bytes()),
+                         checkpoint)
+
+    def test_from_bytes_version_1(self) -> None:
+        data = self.checkpoint.to_bytes()
+        # Version 1 has no products created per design.
+        produced = data.index(bytes([4, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0]))
+        data = data[:4] + b'\x01\x00' + data[6:produced] + \
+            data[produced + 12:-4]
+        data += zlib.crc32(data).to_bytes(4, 'little')
+        self.checkpoint.produced = []
+        self.assertEqual(Checkpoint.from_bytes(data), self.checkpoint)
+
+    def test_from_bytes_invalid(self) -> None:
+        data = self.checkpoint.to_bytes()
+        corrupt = data[:20] + bytes([data[20] ^ 1]) + data[21:]
+        cases = [
+            (b'', 'Not a Furniture Creator checkpoint'),
+            (b'XXXX' + data[4:], 'Not a Furniture Creator checkpoint'),
+            (data[:4] + b'\x03\x00' + data[6:], 'Unsupported .* version'),
+            (corrupt, 'corrupt'),
+        ]
+        for data, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(ValueError, message):
+                    Checkpoint.from_bytes(data)
+
+    # save / load
+    def test_save(self) -> None:
+        self.checkpoint.save(self.path)
+        self.checkpoint.save(self.path)
+        self.assertEqual(os.listdir(self.directory), ['state.bin'])
+        self.assertEqual(Checkpoint.load(self.path), self.checkpoint)
+
+    # restore
+    def test_restore_different_designs(self) -> None:
+        app = FurnitureCreator()
+        app.product_manager.save_design('[Stool]S1a3')
+        with self.assertRaisesRegex(ValueError, 'different designs'):
+            self.checkpoint.restore(app)
+
+    def test_restore_order(self) -> None:
+        app = FurnitureCreator()
+        for design_str in ('[Stool]S1a3', '[Lamp]L1c2', '[Chair]S2b4'):
+            app.product_manager.save_design(design_str)
+        checkpoint = Checkpoint.capture(app, 0, 1)
+        checkpoint.order = [2, 0, 1]
+        checkpoint.produced = [1, 0, 5]
+        checkpoint.restore(app)
+        scheduler = app.product_manager.design_repository.scheduler
+        self.assertEqual(scheduler.order, [2, 0, 1])
+        self.assertEqual(scheduler.produced, [1, 0, 5])
+
+    # Checkpointer
+    def test_checkpointer_due(self) -> None:
+        checkpointer = Checkpointer(self.path, parts=10)
+        self.assertFalse(checkpointer.due(9))
+        self.assertTrue(checkpointer.due(10))
+        checkpointer.save(self.checkpoint)
+        self.assertFalse(checkpointer.due(21))
+        self.assertTrue(checkpointer.due(22))
+        self.assertTrue(Checkpointer(self.path, interval=1e-9).due(0))
+        self.assertFalse(Checkpointer(self.path).due(100))
+
+    def test_checkpointer_load_missing(self) -> None:
+        self.assertIsNone(Checkpointer(self.path).load())
+
+    # FurnitureCreator
+    def test_resume(self) -> None:
+        random.seed(1)
+        expected = self.run_app(DESIGNS + PARTS)
+        os.remove(self.path)
+
+        half = len(PARTS) // 2
+        random.seed(1)
+        first = self.run_app(DESIGNS + PARTS[:half], parts=4)
+        checkpoint = Checkpoint.load(self.path)
+        self.assertEqual(checkpoint.offset, len(DESIGNS) + half)
+        self.assertEqual(checkpoint.line, 5 + half // 3)
+
+        random.seed(2)
+        second = self.run_app(DESIGNS + PARTS, resume=True)
+        self.assertEqual(first + second, expected)
+
+    def test_resume_stdin(self) -> None:
+        random.seed(1)
+        expected = self.run_app(DESIGNS + PARTS)
+        os.remove(self.path)
+
+        half = len(PARTS) // 2
+        random.seed(1)
+        first = self.run_app(DESIGNS + PARTS[:half])
+        app = FurnitureCreator(checkpointer=Checkpointer(self.path),
+                               resume=True)
+        stream = io.BufferedReader(io.BytesIO(DESIGNS + PARTS))
+        for design_str in app.read_design_buffer(stream):
+            app.product_manager.save_design(design_str)
+        app.restore_checkpoint(stream)
+        app.output = OutputWriter(io.BytesIO())
+        app.create_products(app.read_part_codes(stream))
+        self.assertEqual(first + app.output.stream.getvalue(), expected)
+        self.assertEqual(app.parts_read, len(PARTS) // 3)
+
+    def test_resume_without_checkpoint(self) -> None:
+        random.seed(1)
+        expected = self.run_app(DESIGNS + PARTS)
+        os.remove(self.path)
+        random.seed(1)
+        self.assertEqual(self.run_app(DESIGNS + PARTS, resume=True),
+                         expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import unittest
+import pickle
 
-from furniturecreator.dataclasses import Part, Product, Design
+from furniturecreator.dataclasses import Part, Product, Design, PARTS, \
+                                        PARTS_BY_CODE, CompiledDesign
 
 
 class TestFurnitureCreatorDataClasses(unittest.TestCase):
@@ -11,6 +13,11 @@ class TestFurnitureCreatorDataClasses(unittest.TestCase):
         self.assertEqual(Part('c', 'S'), Part('c', 'S'))
         self.assertEqual(Part('m', 'L'), Part(size='L', type='m'))
 
+    def test_part_shared(self) -> None:
+        self.assertIs(Part('c', 'S'), Part('c', 'S'))
+        self.assertIs(Part(size='L', type='m'), PARTS_BY_CODE['mL'])
+        self.assertIs(Part('d', 'L'), PARTS[29])
+
     def test_part_compare_different(self) -> None:
         self.assertNotEqual(Part('c', 'S'), Part('c', 'L'))
 
@@ -18,6 +25,44 @@ class TestFurnitureCreatorDataClasses(unittest.TestCase):
         part = Part('a', 'L')
         self.assertEqual(part.__str__(), 'aL')
 
+    def test_part_slot(self) -> None:
+        self.assertEqual(Part('a', 'S').slot, 0)
+        self.assertEqual(Part('z', 'S').slot, 25)
+        self.assertEqual(Part('a', 'L').slot, 26)
+        self.assertEqual(Part('z', 'L').slot, 51)
+
+    def test_part_from_slot(self) -> None:
+        self.assertEqual(Part.from_slot(3), Part('d', 'S'))
+        self.assertEqual(Part.from_slot(29), Part('d', 'L'))
+        self.assertIs(Part.from_slot(29), PARTS_BY_CODE['dL'])
+
+    def test_part_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            Part('A', 'S')
+        with self.assertRaises(ValueError):
+            Part('a', 'M')
+        with self.assertRaises(ValueError):
+            Part('ab', 'S')
+
+    def test_part_hash(self) -> None:
+        self.assertEqual(hash(Part('k', 'L')), hash(PARTS_BY_CODE['kL']))
+        self.assertEqual({Part('k', 'L'): 1}[PARTS_BY_CODE['kL']], 1)
+
+    def test_part_slots(self) -> None:
+        with self.assertRaises(AttributeError):
+            Part('a', 'S').__dict__
+
+    def test_part_pickle(self) -> None:
+        part = pickle.loads(pickle.dumps(Part('q', 'S')))
+        self.assertIs(part, PARTS_BY_CODE['qS'])
+
+    def test_parts_table(self) -> None:
+        self.assertEqual(len(PARTS), 52)
+        self.assertEqual(len(PARTS_BY_CODE), 52)
+        for slot, part in enumerate(PARTS):
+            self.assertEqual(part.slot, slot)
+            self.assertIs(PARTS_BY_CODE[str(part)], part)
+
     # Product
     def test_product_compare(self) -> None:
         product1 = Product('Lounge chair', 'S', {
@@ -53,6 +98,13 @@ class TestFurnitureCreatorDataClasses(unittest.TestCase):
         })
         self.assertEqual(product.__str__(), '[Side table]S1a10b6c')
 
+    def test_product_str_rendered(self) -> None:
+        product = Product('Side table', 'S', {Part('a', 'S'): 1})
+        product.rendered = '[Side table]S1a'
+        self.assertEqual(product.__str__(), '[Side table]S1a')
+        product.add_part(Part('b', 'S'))
+        self.assertEqual(product.__str__(), '[Side table]S1a1b')
+
     # Design
     def test_design_compare(self) -> None:
         product1 = Design('Chair', 'S', {
@@ -88,6 +140,15 @@ class TestFurnitureCreatorDataClasses(unittest.TestCase):
         }, 20)
         self.assertEqual(product.__str__(), '[Bed]S1a10b6c20')
 
+    # CompiledDesign
+    def test_compiled_design_from_design(self) -> None:
+        design = Design('Lamp', 'L', {
+            Part('c', 'L'): 2,
+            Part('a', 'L'): 1,
+        }, 5)
+        self.assertEqual(CompiledDesign.from_design(design),
+                         CompiledDesign('L', 5, ((26, 1), (28, 2))))
+
 
 if __name__ == "__main__":
     unittest.main()
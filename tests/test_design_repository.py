@@ -1,7 +1,7 @@
 from __future__ import annotations
 import unittest
 
-from furniturecreator.dataclasses import Part, Design
+from furniturecreator.dataclasses import Part, Design, CompiledDesign
 from furniturecreator.design_repository import DesignRepository
 
 
@@ -100,6 +100,22 @@ class TestDesignRepository(unittest.TestCase):
             }, 4)
         ]
         self.assertEqual(self.design_repository.designs, expected)
+        self.assertEqual(self.design_repository.compiled,
+                         [CompiledDesign('L', 4, ((49, 1), (50, 1), (51, 1)))])
+
+    # add_all
+    def test_add_all(self) -> None:
+        designs = [Design('B', 'L', {Part('z', 'L'): 1, Part('x', 'L'): 2}, 3),
+                   Design('C', 'S', {Part('a', 'S'): 1}, 1)]
+        compiled = [CompiledDesign('L', 3, ((49, 2), (51, 1))),
+                    CompiledDesign('S', 1, ((0, 1),))]
+        self.design_repository.add_all(designs, compiled)
+        self.assertEqual(self.design_repository.designs, designs)
+        self.assertIs(self.design_repository.compiled[0], compiled[0])
+        self.assertEqual(self.design_repository.renderers[0].render({}),
+                         '[B]L2x1z')
+        self.assertEqual(self.design_repository.parts_in_designs,
+                         {Part('x', 'L'), Part('z', 'L'), Part('a', 'S')})
 
     # add_parts
     def test_add_parts(self) -> None:
@@ -129,6 +145,22 @@ class TestDesignRepository(unittest.TestCase):
         }
         self.assertEqual(self.design_repository.parts_in_designs, expected)
 
+    # __iter__
+    def test_iter_nested(self) -> None:
+        self.design_repository.save('[Desk]S10a5b3c20')
+        self.design_repository.save('[Chair]S1a1b4')
+        names = [(outer.name, inner.name)
+                 for outer in self.design_repository
+                 for inner in self.design_repository]
+        self.assertEqual(names, [('Desk', 'Desk'), ('Desk', 'Chair'),
+                                 ('Chair', 'Desk'), ('Chair', 'Chair')])
+
+    def test_weights(self) -> None:
+        repository = DesignRepository('priority', {'Chair': 5})
+        repository.save('[Desk]S10a5b3c20')
+        repository.save('[Chair]S1a1b4')
+        self.assertEqual([x.name for x in repository], ['Chair', 'Desk'])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import unittest
+
+from furniturecreator.design_scheduler import DesignScheduler
+
+
+class TestDesignScheduler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scheduler = DesignScheduler()
+        for _ in range(3):
+            self.scheduler.add()
+
+    def tearDown(self) -> None:
+        del self.scheduler
+
+    def test_invalid_policy(self) -> None:
+        with self.assertRaises(ValueError):
+            DesignScheduler('random')
+
+    # add
+    def test_add(self) -> None:
+        self.assertEqual(self.scheduler.add(), 3)
+        self.assertEqual(self.scheduler.order, [0, 1, 2, 3])
+        self.assertEqual(len(self.scheduler), 4)
+
+    def test_add_invalid_weight(self) -> None:
+        with self.assertRaises(ValueError):
+            DesignScheduler('weighted').add(0)
+
+    # __iter__
+    def test_iter_during_rotation(self) -> None:
+        order = []
+        for design_id in self.scheduler:
+            order.append(design_id)
+            self.scheduler.rotate(design_id)
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(self.scheduler.order, [0, 1, 2])
+
+    # select
+    def test_select_round_robin(self) -> None:
+        self.assertEqual(self.scheduler.select({1, 2}), 1)
+        self.assertEqual(self.scheduler.order, [0, 2, 1])
+        self.assertEqual(self.scheduler.select({1, 2}), 2)
+        self.assertEqual(self.scheduler.select([0, 1, 2]), 0)
+        self.assertEqual(self.scheduler.order, [1, 2, 0])
+        self.assertEqual(self.scheduler.produced, [1, 1, 1])
+
+    def test_select_weighted(self) -> None:
+        scheduler = DesignScheduler('weighted')
+        scheduler.add(1)
+        scheduler.add(2)
+        selected = [scheduler.select({0, 1}) for _ in range(6)]
+        self.assertEqual(selected, [0, 1, 1, 0, 1, 1])
+
+    def test_select_priority(self) -> None:
+        scheduler = DesignScheduler('priority')
+        for priority in (1, 3, 3):
+            scheduler.add(priority)
+        selected = [scheduler.select({0, 1, 2}) for _ in range(3)]
+        self.assertEqual(selected, [1, 2, 1])
+        self.assertEqual(scheduler.select({0}), 0)
+
+    def test_select_unknown(self) -> None:
+        with self.assertRaises(ValueError):
+            self.scheduler.select({4})
+        with self.assertRaises(ValueError):
+            self.scheduler.select(set())
+
+    # restore
+    def test_restore(self) -> None:
+        self.scheduler.restore([2, 0, 1], [0, 4, 1])
+        self.assertEqual(self.scheduler.order, [2, 0, 1])
+        self.assertEqual(self.scheduler.produced, [0, 4, 1])
+        self.assertEqual(self.scheduler.add(), 3)
+        self.assertEqual(self.scheduler.order, [2, 0, 1, 3])
+        with self.assertRaises(ValueError):
+            self.scheduler.restore([0, 1], [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
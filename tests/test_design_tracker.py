@@ -0,0 +1,228 @@
+from __future__ import annotations
+import unittest
+import random
+from typing import List
+
+from furniturecreator.dataclasses import Part, Design, CompiledDesign
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.design_tracker import DesignTracker, CANDIDATE, \
+    INCOMPLETE, WAITING
+
+
+class TestDesignTracker(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.part_repository = PartRepository()
+        self.tracker = DesignTracker(self.part_repository)
+
+    def tearDown(self) -> None:
+        del self.tracker
+
+    def ready_designs(self, designs: List[CompiledDesign]) -> List[int]:
+        # Ids of the designs that can be created, checked one by one.
+        stock = self.part_repository.stock
+        total_per_size = self.part_repository.total_per_size
+        return [
+            design_id for design_id, design in enumerate(designs)
+            if design.total_parts <= total_per_size[design.size]
+            and all(stock[slot] >= amount
+                    for slot, amount in design.requirements)
+        ]
+
+    def design_chair(self) -> CompiledDesign:
+        return CompiledDesign.from_design(Design('Chair', 'S', {
+            Part('a', 'S'): 2,
+            Part('b', 'S'): 1,
+        }, 4))
+
+    # add
+    def test_add(self) -> None:
+        self.assertEqual(self.tracker.add(self.design_chair()), 0)
+        self.assertEqual(self.tracker.add(self.design_chair()), 1)
+        self.assertEqual(self.tracker.missing, [2, 2])
+        self.assertEqual(self.tracker.thresholds[0], [2])
+        self.assertEqual(self.tracker.watchers[0], {2: [0, 1]})
+
+    def test_add_with_stock(self) -> None:
+        self.part_repository.add(Part('a', 'S'), 2)
+        self.tracker.add(self.design_chair())
+        self.assertEqual(self.tracker.missing, [1])
+
+    # track
+    def test_track(self) -> None:
+        designs = [self.design_chair()]
+        self.tracker.track(designs)
+        designs.append(self.design_chair())
+        self.tracker.track(designs)
+        self.assertEqual(len(self.tracker), 2)
+
+    # stock_changed
+    def test_stock_changed(self) -> None:
+        self.tracker.add(self.design_chair())
+        self.part_repository.add(Part('a', 'S'))
+        self.assertEqual(self.tracker.missing, [2])
+        self.part_repository.add(Part('a', 'S'))
+        self.part_repository.add(Part('b', 'S'), 5)
+        self.assertEqual(self.tracker.missing, [0])
+        self.assertEqual(self.tracker.state, [CANDIDATE])
+
+        self.part_repository.remove(Part('b', 'S'), 4)
+        self.assertEqual(self.tracker.missing, [0])
+        self.part_repository.remove(Part('b', 'S'))
+        self.part_repository.remove(Part('a', 'S'), 2)
+        self.assertEqual(self.tracker.missing, [2])
+        self.assertEqual(self.tracker.state, [INCOMPLETE])
+
+    # get_first_candidate
+    def test_get_first_candidate(self) -> None:
+        self.tracker.add(self.design_chair())
+        self.part_repository.add(Part('a', 'S'), 2)
+        self.part_repository.add(Part('b', 'S'))
+        self.assertIsNone(self.tracker.get_first_candidate('S'))
+        self.part_repository.add(Part('c', 'L'))
+        self.assertIsNone(self.tracker.get_first_candidate('S'))
+        self.part_repository.add(Part('c', 'S'))
+        self.assertEqual(self.tracker.get_first_candidate('S'),
+                         (self.tracker.scheduler.keys[0], 0))
+
+    def test_get_first_candidate_by_total(self) -> None:
+        for size, total in (('S', 6), ('S', 2), ('L', 1), ('S', 4)):
+            slot = 0 if size == 'S' else 26
+            self.tracker.add(CompiledDesign(size, total, ((slot, 1),)))
+        self.assertEqual(self.tracker.state, [INCOMPLETE] * 4)
+        self.part_repository.add(Part('a', 'S'))
+        self.assertEqual(self.tracker.state,
+                         [CANDIDATE, CANDIDATE, INCOMPLETE, CANDIDATE])
+        self.assertIsNone(self.tracker.get_first_candidate('S'))
+        self.assertEqual(self.tracker.state,
+                         [WAITING, WAITING, INCOMPLETE, WAITING])
+        self.part_repository.add(Part('b', 'S'), 3)
+        self.assertEqual(self.tracker.get_first_candidate('S'),
+                         (self.tracker.scheduler.keys[1], 1))
+        self.assertEqual(self.tracker.state,
+                         [WAITING, CANDIDATE, INCOMPLETE, CANDIDATE])
+        self.part_repository.remove(Part('a', 'S'))
+        self.assertIsNone(self.tracker.get_first_candidate('S'))
+
+    # select_design_id
+    def test_select_design_id(self) -> None:
+        for _ in range(3):
+            self.tracker.add(self.design_chair())
+        self.assertIsNone(self.tracker.select_design_id())
+        self.part_repository.add(Part('a', 'S'), 2)
+        self.part_repository.add(Part('b', 'S'), 1)
+        self.assertIsNone(self.tracker.select_design_id())
+        self.part_repository.add(Part('c', 'S'))
+        self.assertEqual(self.tracker.select_design_id(), 0)
+        self.assertEqual(self.tracker.select_design_id(), 1)
+        self.assertEqual(self.tracker.scheduler.order, [2, 0, 1])
+
+        self.part_repository.remove(Part('b', 'S'))
+        self.assertIsNone(self.tracker.select_design_id())
+        self.part_repository.add(Part('b', 'S'))
+        self.assertEqual(self.tracker.select_design_id(), 2)
+
+    def test_select_design_id_waiting_for_total(self) -> None:
+        self.tracker.add(CompiledDesign('S', 3, ((0, 1),)))
+        self.tracker.add(CompiledDesign('L', 1, ((26, 1),)))
+        self.part_repository.add(Part('a', 'S'))
+        self.assertIsNone(self.tracker.select_design_id())
+        self.part_repository.add(Part('a', 'L'))
+        self.assertEqual(self.tracker.select_design_id(), 1)
+        self.part_repository.add(Part('b', 'S'), 2)
+        self.assertEqual(self.tracker.select_design_id(), 0)
+
+    def test_select_design_id_waiting_once(self) -> None:
+        # A design completed again while waiting for its total is not
+        # added to the waiting heap again.
+        self.tracker.add(CompiledDesign('S', 1000, ((0, 1),)))
+        self.tracker.add(CompiledDesign('S', 1, ((0, 1),)))
+        for _ in range(100):
+            self.part_repository.add(Part('a', 'S'))
+            self.assertEqual(self.tracker.select_design_id(), 1)
+            self.part_repository.remove(Part('a', 'S'))
+        self.assertEqual(self.tracker.waiting['S'], [(1000, 0)])
+        self.assertEqual(self.tracker.in_waiting, [True, False])
+
+    def test_select_design_id_rotated_by_scheduler(self) -> None:
+        self.tracker.add(self.design_chair())
+        self.tracker.add(self.design_chair())
+        self.part_repository.add(Part('a', 'S'), 2)
+        self.part_repository.add(Part('b', 'S'), 2)
+        self.assertEqual(self.tracker.scheduler.select({0}), 0)
+        self.assertEqual(self.tracker.select_design_id(), 1)
+        self.assertEqual(self.tracker.select_design_id(), 0)
+
+    def test_select_design_id_matches_ready_designs(self) -> None:
+        generator = random.Random(5)
+        designs = []
+        for _ in range(40):
+            size = generator.choice('SL')
+            offset = 0 if size == 'S' else 26
+            slots = generator.sample(range(offset, offset + 4), 2)
+            requirements = tuple(sorted(
+                (slot, generator.randint(1, 3)) for slot in slots))
+            total = sum(x for _, x in requirements) + generator.randint(0, 3)
+            designs.append(CompiledDesign(size, total, requirements))
+            self.tracker.add(designs[-1])
+        keys = self.tracker.scheduler.keys
+        for _ in range(2000):
+            slot = generator.choice([0, 1, 2, 3, 26, 27, 28, 29])
+            self.part_repository.add(Part.from_slot(slot))
+            ready = self.ready_designs(designs)
+            expected = min(ready, key=keys.__getitem__) if ready else None
+            design_id = self.tracker.select_design_id()
+            self.assertEqual(design_id, expected)
+            if design_id is not None:
+                for slot, amount in designs[design_id].requirements:
+                    self.part_repository.remove(Part.from_slot(slot), amount)
+
+    # parts_until_ready
+    def test_parts_until_ready(self) -> None:
+        self.tracker.add(self.design_chair())
+        self.tracker.add(CompiledDesign('S', 5, ((0, 4),)))
+        self.assertEqual(self.tracker.parts_until_ready(0), 5)
+        self.assertIsNone(self.tracker.parts_until_ready(1))
+        self.part_repository.add(Part('b', 'S'))
+        self.assertEqual(self.tracker.parts_until_ready(0), 3)
+        self.assertIsNone(self.tracker.parts_until_ready(1))
+        self.assertIsNone(self.tracker.parts_until_ready(26))
+        self.part_repository.add(Part('a', 'S'), 2)
+        self.assertEqual(self.tracker.parts_until_ready(1), 1)
+        self.assertEqual(self.tracker.parts_until_ready(0), 1)
+
+    def test_parts_until_ready_other_size_ready(self) -> None:
+        self.tracker.add(CompiledDesign('L', 1, ((28, 1),)))
+        self.tracker.add(CompiledDesign('S', 3, ((0, 3),)))
+        self.part_repository.add(Part('c', 'L'))
+        self.assertEqual(self.tracker.parts_until_ready(0), 1)
+
+    def test_parts_until_ready_matches_adding_parts(self) -> None:
+        generator = random.Random(7)
+        designs = []
+        for _ in range(20):
+            slots = generator.sample(range(4), 2)
+            requirements = tuple(sorted(
+                (slot, generator.randint(1, 6)) for slot in slots))
+            total = sum(x for _, x in requirements) + generator.randint(0, 6)
+            designs.append(CompiledDesign('S', total, requirements))
+            self.tracker.add(designs[-1])
+        for _ in range(200):
+            slot = generator.randrange(5)
+            expected = None
+            for parts in range(1, 30):
+                self.part_repository.add(Part.from_slot(slot))
+                if expected is None and self.ready_designs(designs):
+                    expected = parts
+            self.part_repository.remove(Part.from_slot(slot), 29)
+            self.assertEqual(self.tracker.parts_until_ready(slot), expected)
+            if (design_id := self.tracker.select_design_id()) is not None:
+                for slot, amount in designs[design_id].requirements:
+                    self.part_repository.remove(Part.from_slot(slot), amount)
+            self.part_repository.add(
+                Part.from_slot(generator.randrange(5)),
+                generator.randint(1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,26 @@
 from __future__ import annotations
 import unittest
+import bz2
+import gzip
+import lzma
 import sys
 import io
+import os
+import select
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
 
-from furniturecreator import FurnitureCreator
+from furniturecreator import FurnitureCreator, decompressing, skip_bytes, \
+    skip_parts, skip_parts_mapped
+from furniturecreator.dataclasses import Part
+from furniturecreator.output_writer import OutputWriter
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 
 class TestFurnitureCreator(unittest.TestCase):
@@ -61,6 +78,187 @@ class TestFurnitureCreator(unittest.TestCase):
             ['cL', 'zS', 'aS', 'aL', 'cL', 'zS']
         )
 
+    # read_design_buffer
+    def test_read_design_buffer(self) -> None:
+        self.fixture_stdin_multi_line()
+        self.assertEqual(
+            list(self.app.read_design_buffer(sys.stdin.buffer)),
+            ['[Cabinet]L20a15c45', '[Couch]S16b8k3z27']
+        )
+        self.assertEqual(self.app.lines_read, 3)
+        self.assertEqual(self.app.offset, 38)
+
+    # read_part_codes
+    def test_read_part_codes(self) -> None:
+        self.fixture_stdin_multi_line()
+        for i in self.app.read_design_buffer(sys.stdin.buffer):
+            pass
+        self.assertEqual(
+            b''.join(self.app.read_part_codes(sys.stdin.buffer)),
+            bytes([28, 25, 0, 26, 28, 25])
+        )
+
+    # main_mapped
+    def test_main_mapped(self) -> None:
+        with tempfile.NamedTemporaryFile('w', delete=False) as file:
+            file.write('[Stool]S2a1b3\n[Lamp]L1c1\n\naS\ncL\naS\nbS\n')
+        self.addCleanup(os.remove, file.name)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            FurnitureCreator(input_path=file.name).main()
+        self.assertEqual(output.getvalue(), '[Lamp]L1c\n[Stool]S2a1b\n')
+
+    def test_main_mapped_runs(self) -> None:
+        designs = '[Stool]S2a1b3\n[Lamp]L1c1\n\n'
+        outputs = []
+        for parts in ('aS\ncL\ncL\naS\nbS\nbS\ncL\n', '1aS\n2cL\naS\n2bS\ncL'):
+            with tempfile.NamedTemporaryFile('w', delete=False) as file:
+                file.write(designs + parts)
+            self.addCleanup(os.remove, file.name)
+            output = io.BytesIO()
+            app = FurnitureCreator(input_path=file.name,
+                                   output=OutputWriter(output))
+            app.main()
+            self.assertEqual(app.parts_read, 7)
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertEqual(outputs[0],
+                         b'[Lamp]L1c\n[Lamp]L1c\n[Stool]S2a1b\n[Lamp]L1c\n')
+
+    def fixture_huge_run(self) -> str:
+        with tempfile.NamedTemporaryFile('wb', delete=False) as file:
+            file.write(b'[Lamp]L1b1\n\n1000000000000aS\nbL\n')
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def check_huge_run(self, **options: object) -> None:
+        output = io.BytesIO()
+        app = FurnitureCreator(input_path=self.fixture_huge_run(),
+                               output=OutputWriter(output),
+                               **options)  # type: ignore
+        app.main()
+        self.assertEqual(output.getvalue(), b'[Lamp]L1b\n')
+        self.assertEqual(app.parts_read, 10 ** 12 + 1)
+
+    def test_main_huge_run_journal(self) -> None:
+        from furniturecreator.checkpoint import Checkpointer
+        from furniturecreator.journal import Journal
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        journal = Journal(os.path.join(directory.name, 'journal'))
+        self.addCleanup(journal.close)
+        self.check_huge_run(
+            checkpointer=Checkpointer(os.path.join(directory.name, 'state')),
+            journal=journal)
+
+    @unittest.skipUnless(HAS_NUMPY, 'batch engine requires NumPy')
+    def test_main_huge_run_batch(self) -> None:
+        self.check_huge_run(batch_size=64)
+
+    def test_main_compressed(self) -> None:
+        content = b'[Stool]S2a1b3\n[Lamp]L1c1\n\naS\n2cL\naS\nbS\n'
+        for module in (gzip, lzma, bz2):
+            with self.subTest(module=module.__name__):
+                with tempfile.NamedTemporaryFile(delete=False) as file:
+                    file.write(module.compress(content))
+                self.addCleanup(os.remove, file.name)
+                output = io.BytesIO()
+                FurnitureCreator(input_path=file.name,
+                                 output=OutputWriter(output)).main()
+                self.assertEqual(output.getvalue(),
+                                 b'[Lamp]L1c\n[Lamp]L1c\n[Stool]S2a1b\n')
+
+    # drain
+    def test_drain(self) -> None:
+        output = io.BytesIO()
+        app = FurnitureCreator(output=OutputWriter(output))
+        app.save_designs(['[Lamp]L1c1'])
+        app.part_repository.add(Part('c', 'L'), 3)
+        app.drain()
+        app.output.flush()
+        self.assertEqual(output.getvalue(),
+                         b'[Lamp]L1c\n[Lamp]L1c\n[Lamp]L1c\n')
+        self.assertEqual(app.products_created, 3)
+
+    # decompressing
+    def test_decompressing(self) -> None:
+        stream = io.BufferedReader(io.BytesIO(b'aS\n'))
+        self.assertIs(decompressing(stream), stream)
+        for module in (gzip, lzma, bz2):
+            with self.subTest(module=module.__name__):
+                stream = io.BytesIO(module.compress(b'[A]S1a1\n'))
+                self.assertEqual(decompressing(stream).read(), b'[A]S1a1\n')
+
+    # read_design_mapped
+    def test_read_design_mapped(self) -> None:
+        buffer = b'[Cabinet]L20a15c45\r\n[Couch]S16b8k3z27\n\ncL\n'
+        self.assertEqual(
+            list(self.app.read_design_mapped(buffer)),
+            ['[Cabinet]L20a15c45', '[Couch]S16b8k3z27']
+        )
+        self.assertEqual(self.app.offset, 39)
+        self.assertEqual(self.app.lines_read, 3)
+
+    # skip_bytes
+    def test_skip_bytes(self) -> None:
+        stream = io.BytesIO(b'aS\nbL\ncS\n')
+        skip_bytes(stream, 3)
+        self.assertEqual(stream.read(), b'bL\ncS\n')
+
+    def test_skip_bytes_not_seekable(self) -> None:
+        read_fd, write_fd = os.pipe()
+        with open(write_fd, 'wb') as file:
+            file.write(b'aS\nbL\ncS\n')
+        with open(read_fd, 'rb') as stream:
+            skip_bytes(stream, 6)
+            self.assertEqual(stream.read(), b'cS\n')
+            with self.assertRaisesRegex(ValueError, 'Input ends'):
+                skip_bytes(stream, 1)
+
+    # skip_parts
+    def test_skip_parts(self) -> None:
+        stream = io.BytesIO(b'aS\n3bL\ncS\ndS\n')
+        self.assertEqual(skip_parts(stream, 4), (7, 2))
+        self.assertEqual(stream.read(), b'cS\ndS\n')
+        with self.assertRaisesRegex(ValueError, 'Input ends'):
+            skip_parts(io.BytesIO(b'aS\n'), 2)
+
+    def test_skip_parts_mapped(self) -> None:
+        buffer = b'[A]S1a1\n\naS\n3bL\ncS\ndS'
+        self.assertEqual(skip_parts_mapped(buffer, 9, 5), (19, 3))
+        self.assertEqual(skip_parts_mapped(buffer, 19, 1), (21, 1))
+        with self.assertRaisesRegex(ValueError, 'Input ends'):
+            skip_parts_mapped(buffer, 19, 2)
+
+    # interactive input
+    def test_products_before_end_of_input(self) -> None:
+        # Parts arriving through a pipe are processed as they arrive, not
+        # when a full block of input has been read.
+        with subprocess.Popen(
+                [sys.executable, '-m', 'furniturecreator', '--flush', 'line'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                cwd=os.path.dirname(os.path.dirname(__file__))) as process:
+            assert process.stdin and process.stdout
+            process.stdin.write(b'[Stool]S1a1\n\naS\n')
+            process.stdin.flush()
+            ready, _, _ = select.select([process.stdout], [], [], 10)
+            line = process.stdout.readline() if ready else b''
+            process.stdin.close()
+            process.wait(10)
+        self.assertEqual(line, b'[Stool]S1a\n')
+
+    # imports
+    def test_import_lean(self) -> None:
+        # Modules slow to import are only loaded by the modes needing them.
+        code = ('import sys, furniturecreator.__main__; print(*sorted('
+                '{"argparse", "dataclasses", "mmap", "numpy", "re", '
+                '"typing"} & set(sys.modules)))')
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+        self.assertEqual(result.stdout.split(), [])
+
 
 if __name__ == "__main__":
     unittest.main()
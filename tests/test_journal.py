@@ -0,0 +1,269 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+import random
+import tempfile
+from contextlib import redirect_stderr
+from typing import Iterator
+
+from furniturecreator import FurnitureCreator, journal
+from furniturecreator.checkpoint import Checkpoint, Checkpointer
+from furniturecreator.journal import COMMIT, HEADER, MAGIC, PRODUCT, \
+    Journal, JournalTail, decode_amount, encode_amount, replay
+from furniturecreator.output_writer import OutputWriter
+from furniturecreator.part_parser import PartParser, PartRun
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+DESIGNS = b'[Stool]S1a3\n[Lamp]L1c2\n[Chair]S2b4\n\n'
+PARTS = b'aS\ncL\nbS\naS\nbS\ncS\naL\nbS\nbL\naS\nbS\ncS\n' * 5
+PART_RUNS = b'aS\n3cL\nbS\n2aS\nbS\ncS\naL\n5bS\nbL\naS\nbS\n4cS\n' * 5
+
+
+class Crash(Exception):
+    pass
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'parts.journal')
+        self.checkpoint_path = os.path.join(self.directory, 'state.bin')
+        self.input_path = os.path.join(self.directory, 'input.txt')
+        with open(self.input_path, 'wb') as file:
+            file.write(DESIGNS + PARTS)
+        self.journal = Journal(self.path, commit_parts=2)
+        self.addCleanup(self.journal.close)
+
+    def tearDown(self) -> None:
+        del self.journal
+
+    def fixture_app(self,
+                    resume: bool = False,
+                    batch_size: int = 0) -> FurnitureCreator:
+        app = FurnitureCreator(
+            batch_size=batch_size,
+            input_path=self.input_path,
+            output=OutputWriter(io.BytesIO()),
+            checkpointer=Checkpointer(self.checkpoint_path, 24),
+            journal=Journal(self.path, commit_parts=6),
+            resume=resume
+        )
+        return app
+
+    def crash_after(self, app: FurnitureCreator, blocks: int) -> None:
+        create_products = app.create_products
+
+        def limited(codes: Iterator[bytes]) -> Iterator[bytes]:
+            for number, block in enumerate(codes):
+                if number == blocks:
+                    raise Crash()
+                yield block
+
+        def create_products_then_crash(codes: Iterator[bytes]) -> None:
+            create_products(limited(codes))
+        app.create_products = create_products_then_crash  # type: ignore
+
+    def fixture_parser_blocks(self, app: FurnitureCreator) -> None:
+        def read_part_codes_mapped(buffer):  # type: ignore
+            app.parser = PartParser(app.lines_read + 1, app.offset)
+            yield from app.parser.read_buffer(buffer, app.offset, 9)
+        app.read_part_codes_mapped = read_part_codes_mapped  # type: ignore
+
+    # Journal
+    def test_commit(self) -> None:
+        self.journal.reset(7, 1234)
+        self.journal.append_parts(bytes([0, 27]))
+        self.journal.append_products(1)
+        self.assertTrue(self.journal.due())
+        self.journal.commit()
+        self.journal.append_parts(bytes([3]))
+        self.journal.commit()
+        self.journal.append_parts(bytes([5]))
+        self.journal.close()
+
+        tail = JournalTail.read(self.path)
+        self.assertEqual((tail.base, tail.designs_crc), (7, 1234))
+        self.assertEqual(tail.blocks, [(bytes([0, 27]), 1), (bytes([3]), 0)])
+        self.assertEqual(tail.parts, 3)
+
+    def test_commit_runs(self) -> None:
+        self.journal.reset(0, 0)
+        self.journal.append_run(PartRun(27, 10 ** 12))
+        self.journal.append_products(2)
+        self.journal.append_parts(bytes([0]))
+        self.journal.commit()
+        self.assertEqual(self.journal.pending_parts, 0)
+
+        tail = JournalTail.read(self.path)
+        self.assertEqual(tail.blocks,
+                         [(PartRun(27, 10 ** 12), 2), (bytes([0]), 0)])
+        self.assertEqual(tail.parts, 10 ** 12 + 1)
+
+    def test_commit_not_started(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'not started'):
+            self.journal.commit()
+
+    def test_due(self) -> None:
+        self.journal.append_parts(bytes([0]))
+        self.assertFalse(self.journal.due())
+        self.assertTrue(Journal(self.path, 0, 1e-9).due())
+        self.assertFalse(Journal(self.path, 0).due())
+
+    # encode_amount / decode_amount
+    def test_amount(self) -> None:
+        for amount in (1, 63, 64, 0xFEFF, 10 ** 30):
+            with self.subTest(amount=amount):
+                digits = encode_amount(amount)
+                self.assertTrue(all(0x40 <= digit <= 0x7F
+                                    for digit in digits))
+                self.assertEqual(decode_amount(digits), amount)
+
+    # JournalTail
+    def test_read_version_1(self) -> None:
+        with open(self.path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, 1, 5, 6) + bytes([1, 2, PRODUCT,
+                                                           COMMIT]))
+        tail = JournalTail.read(self.path)
+        self.assertEqual((tail.base, tail.blocks), (5, [(bytes([1, 2]), 1)]))
+
+    def test_read_missing(self) -> None:
+        self.assertIsNone(JournalTail.read(self.path))
+
+    def test_read_invalid(self) -> None:
+        self.journal.reset(0, 0)
+        self.journal.append_parts(bytes([60]))
+        self.journal.commit()
+        cases = [
+            (b'XXXX', 'Not a Furniture Creator journal'),
+            (b'FCJL\x03\x00' + bytes(12), 'Unsupported journal version'),
+        ]
+        with self.assertRaisesRegex(ValueError, 'invalid record'):
+            JournalTail.read(self.path)
+        for data, message in cases:
+            with self.subTest(message=message):
+                with open(self.path, 'wb') as file:
+                    file.write(data)
+                with self.assertRaisesRegex(ValueError, message):
+                    JournalTail.read(self.path)
+
+    # replay
+    def test_replay_mismatch(self) -> None:
+        app = FurnitureCreator()
+        app.product_manager.save_design('[Stool]S1a1')
+        tail = JournalTail(0, 0, [(bytes([0]), 1)])
+        with self.assertRaisesRegex(ValueError, 'different designs'):
+            replay(app, tail)
+        tail.designs_crc = Checkpoint.capture(app, 0, 1).designs_crc
+        replay(app, tail)
+        self.assertEqual((app.parts_read, app.products_created), (1, 1))
+        self.assertTrue(app.product_manager.rendering)
+        with self.assertRaisesRegex(ValueError, '0 products where 1'):
+            replay(app, JournalTail(0, tail.designs_crc, [(bytes([1]), 1)]))
+
+    # FurnitureCreator
+    def test_resume(self) -> None:
+        self.check_resume(batch_size=0)
+
+    @unittest.skipUnless(HAS_NUMPY, 'batch engine requires NumPy')
+    def test_resume_batch(self) -> None:
+        self.check_resume(batch_size=4)
+
+    def check_resume(self, batch_size: int) -> None:
+        random.seed(1)
+        app = self.fixture_app(batch_size=batch_size)
+        self.fixture_parser_blocks(app)
+        app.main()
+        expected = app.output.stream.getvalue()
+
+        random.seed(1)
+        app = self.fixture_app(batch_size=batch_size)
+        self.fixture_parser_blocks(app)
+        self.crash_after(app, 18)
+        with self.assertRaises(Crash):
+            app.main()
+        first = app.output.stream.getvalue()
+        self.assertEqual(JournalTail.read(self.path).parts, 6)
+        self.assertEqual(Checkpoint.load(self.checkpoint_path).parts_read, 48)
+
+        random.seed(2)
+        app = self.fixture_app(resume=True, batch_size=batch_size)
+        app.main()
+        self.assertEqual(first + app.output.stream.getvalue(), expected)
+        self.assertEqual(app.parts_read, len(PARTS) // 3)
+
+    def test_resume_runs(self) -> None:
+        self.check_resume_runs(batch_size=0)
+
+    @unittest.skipUnless(HAS_NUMPY, 'batch engine requires NumPy')
+    def test_resume_runs_batch(self) -> None:
+        self.check_resume_runs(batch_size=4)
+
+    def check_resume_runs(self, batch_size: int) -> None:
+        with open(self.input_path, 'wb') as file:
+            file.write(DESIGNS + PART_RUNS)
+        random.seed(1)
+        app = self.fixture_app(batch_size=batch_size)
+        self.fixture_parser_blocks(app)
+        app.main()
+        expected = app.output.stream.getvalue()
+        os.remove(self.path)
+        os.remove(self.checkpoint_path)
+
+        random.seed(1)
+        app = self.fixture_app(batch_size=batch_size)
+        self.fixture_parser_blocks(app)
+        self.crash_after(app, 9)
+        with self.assertRaises(Crash):
+            app.main()
+        first = app.output.stream.getvalue()
+        self.assertEqual(JournalTail.read(self.path).parts, 22)
+
+        app = self.fixture_app(resume=True, batch_size=batch_size)
+        app.main()
+        self.assertEqual(first + app.output.stream.getvalue(), expected)
+        self.assertEqual(app.parts_read, 110)
+
+    def test_journal_requires_checkpointer(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'requires a checkpointer'):
+            FurnitureCreator(journal=self.journal)
+
+    # main
+    def test_main(self) -> None:
+        random.seed(1)
+        app = self.fixture_app()
+        self.fixture_parser_blocks(app)
+        self.crash_after(app, 18)
+        with self.assertRaises(Crash):
+            app.main()
+
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            self.assertEqual(journal.main([
+                '--checkpoint', self.checkpoint_path,
+                '--journal', self.path, self.input_path]), 0)
+        self.assertRegex(stderr.getvalue(), 'Replayed 6 parts .*: 54 parts')
+        checkpoint = Checkpoint.load(self.checkpoint_path)
+        self.assertEqual(checkpoint.parts_read, 54)
+        self.assertEqual(checkpoint.offset, len(DESIGNS) + 54 * 3)
+        self.assertEqual(JournalTail.read(self.path).parts, 0)
+
+    def test_main_error(self) -> None:
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            self.assertEqual(journal.main([
+                '--checkpoint', self.checkpoint_path,
+                '--journal', self.path, 'missing.txt']), 1)
+        self.assertIn('error', stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
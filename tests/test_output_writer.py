@@ -0,0 +1,96 @@
+from __future__ import annotations
+import unittest
+from unittest.mock import patch
+import io
+
+from furniturecreator.output_writer import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.stream = io.BytesIO()
+
+    def tearDown(self) -> None:
+        del self.stream
+
+    def test_invalid_policy(self) -> None:
+        with self.assertRaises(ValueError):
+            OutputWriter(self.stream, 'never')
+        with self.assertRaises(ValueError):
+            OutputWriter(self.stream, 'count', flush_count=0)
+
+    def test_auto_policy(self) -> None:
+        self.assertEqual(OutputWriter(self.stream).policy, 'block')
+        with patch.object(self.stream, 'isatty', return_value=True):
+            self.assertEqual(OutputWriter(self.stream).policy, 'line')
+
+    # write
+    def test_write_line(self) -> None:
+        writer = OutputWriter(self.stream, 'line')
+        writer.write('[Chair]S1a')
+        self.assertEqual(self.stream.getvalue(), b'[Chair]S1a\n')
+
+    def test_write_block(self) -> None:
+        writer = OutputWriter(self.stream, 'block', buffer_size=24)
+        writer.write('[Chair]S1a')
+        writer.write('[Chair]S1b')
+        self.assertEqual(self.stream.getvalue(), b'')
+        writer.write('[Chair]S1c')
+        self.assertEqual(self.stream.getvalue(),
+                         b'[Chair]S1a\n[Chair]S1b\n[Chair]S1c\n')
+
+    def test_write_count(self) -> None:
+        writer = OutputWriter(self.stream, 'count', flush_count=2)
+        writer.write('[Chair]S1a')
+        self.assertEqual(self.stream.getvalue(), b'')
+        writer.write('[Chair]S1b')
+        self.assertEqual(self.stream.getvalue(),
+                         b'[Chair]S1a\n[Chair]S1b\n')
+
+    def test_write_time(self) -> None:
+        with patch('time.monotonic', return_value=10.0):
+            writer = OutputWriter(self.stream, 'time', flush_interval=60000)
+            writer.write('[Chair]S1a')
+        self.assertEqual(self.stream.getvalue(), b'')
+        with patch('time.monotonic', return_value=70.0):
+            writer.write('[Chair]S1b')
+        self.assertEqual(self.stream.getvalue(),
+                         b'[Chair]S1a\n[Chair]S1b\n')
+        self.assertIsNone(writer.timer)
+
+    def test_write_time_without_next_line(self) -> None:
+        # A line is flushed by a timer when no line follows in time.
+        writer = OutputWriter(self.stream, 'time', flush_interval=10)
+        writer.write('[Chair]S1a')
+        timer = writer.timer
+        timer.join(5)
+        self.assertEqual(self.stream.getvalue(), b'[Chair]S1a\n')
+        self.assertIsNone(writer.timer)
+
+    def test_write_text_stream(self) -> None:
+        stream = io.StringIO()
+        with OutputWriter(stream, 'block') as writer:
+            writer.write('[Stoel]S1ä')
+        self.assertEqual(stream.getvalue(), '[Stoel]S1ä\n')
+
+    # close
+    def test_close(self) -> None:
+        writer = OutputWriter(self.stream, 'block')
+        writer.write('[Chair]S1a')
+        writer.close()
+        self.assertEqual(self.stream.getvalue(), b'[Chair]S1a\n')
+        self.assertFalse(self.stream.closed)
+
+    def test_close_time(self) -> None:
+        writer = OutputWriter(self.stream, 'time', flush_interval=60000)
+        writer.write('[Chair]S1a')
+        timer = writer.timer
+        writer.close()
+        self.assertEqual(self.stream.getvalue(), b'[Chair]S1a\n')
+        timer.join(5)
+        self.assertFalse(timer.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
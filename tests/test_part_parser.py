@@ -0,0 +1,166 @@
+from __future__ import annotations
+import unittest
+import io
+import mmap
+import tempfile
+
+from furniturecreator.part_parser import PartParser, PartFormatError, \
+    PartRun, line_parts
+
+
+class TestPartParser(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.parser = PartParser(first_line=4)
+
+    def tearDown(self) -> None:
+        del self.parser
+
+    # read
+    def test_read(self) -> None:
+        stream = io.BytesIO(b'aS\nbL\nzS\nzL\ncS')
+        self.assertEqual(b''.join(self.parser.read(stream, 4)),
+                         bytes([0, 27, 25, 51, 2]))
+        self.assertEqual(self.parser.line, 9)
+
+    def test_read_line_over_blocks(self) -> None:
+        stream = io.BytesIO(b'aS\n1000bL\ncS\n')
+        self.assertEqual(list(self.parser.read(stream, 2)),
+                         [bytes([0]), PartRun(27, 1000), bytes([2])])
+        self.assertEqual(self.parser.line, 7)
+
+    def test_read_invalid(self) -> None:
+        stream = io.BytesIO(b'aS\nbL\nbX\naS\n')
+        codes = self.parser.read(stream)
+        self.assertEqual(next(codes), bytes([0, 27]))
+        with self.assertRaisesRegex(ValueError, 'on line 6'):
+            next(codes)
+
+    def test_read_offset(self) -> None:
+        parser = PartParser(first_line=4, offset=10)
+        codes = parser.read(io.BytesIO(b'aS\nbL\nzS\nzL\ncS'), 7)
+        positions = [(parser.offset, parser.offset_line) for _ in codes]
+        self.assertEqual(positions, [(10, 4), (16, 6), (22, 8)])
+        self.assertEqual((parser.offset, parser.offset_line), (24, 9))
+
+    def test_read_runs(self) -> None:
+        parser = PartParser(first_line=4, offset=10)
+        codes = parser.read(io.BytesIO(b'aS\nbL\n500zS\n2cS\ndS'), 9)
+        blocks = []
+        for block in codes:
+            blocks.append((block, parser.offset, parser.offset_line))
+        self.assertEqual(blocks, [
+            (bytes([0, 27]), 10, 4),
+            (PartRun(25, 500), 16, 6),
+            (PartRun(2, 2), 22, 7),
+            (bytes([3]), 26, 8),
+        ])
+        self.assertEqual((parser.offset, parser.offset_line), (28, 9))
+
+    # read_buffer
+    def fixture_buffer(self, content: bytes) -> mmap.mmap:
+        file = tempfile.TemporaryFile()
+        self.addCleanup(file.close)
+        file.write(content)
+        file.flush()
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_read_buffer(self) -> None:
+        buffer = self.fixture_buffer(b'[A]S1a2\n\naS\nbL\nzS\nzL\ncS')
+        self.assertEqual(b''.join(self.parser.read_buffer(buffer, 9, 4)),
+                         bytes([0, 27, 25, 51, 2]))
+        self.assertEqual(self.parser.line, 9)
+
+    def test_read_buffer_offset(self) -> None:
+        buffer = self.fixture_buffer(b'[A]S1a2\n\naS\nbL\nzS\nzL\ncS')
+        codes = self.parser.read_buffer(buffer, 9, 7)
+        positions = [(self.parser.offset, self.parser.offset_line)
+                     for _ in codes]
+        self.assertEqual(positions, [(9, 4), (15, 6), (21, 8)])
+        self.assertEqual((self.parser.offset, self.parser.offset_line),
+                         (23, 9))
+
+    def test_read_buffer_long_line(self) -> None:
+        buffer = self.fixture_buffer(b'aS\n    bL    \nzS\n')
+        self.assertEqual(b''.join(self.parser.read_buffer(buffer, 0, 4)),
+                         bytes([0, 27, 25]))
+
+    def test_read_buffer_invalid(self) -> None:
+        buffer = self.fixture_buffer(b'aS\nbL\nbX\naS\n')
+        codes = self.parser.read_buffer(buffer)
+        self.assertEqual(next(codes), bytes([0, 27]))
+        with self.assertRaisesRegex(ValueError, 'on line 6'):
+            next(codes)
+
+    def test_read_buffer_runs(self) -> None:
+        buffer = self.fixture_buffer(b'aS\n12bL\ncS\n')
+        self.assertEqual(list(self.parser.read_buffer(buffer)),
+                         [bytes([0]), PartRun(27, 12), bytes([2])])
+        self.assertEqual(self.parser.line, 7)
+
+    # parse_runs
+    def test_parse_runs(self) -> None:
+        self.assertEqual(list(self.parser.parse_runs(b'aS\nbL\n')),
+                         [(bytes([0, 27]), 6, 2)])
+        self.assertEqual(self.parser.line, 6)
+
+    def test_parse_runs_whitespace(self) -> None:
+        self.assertEqual(list(self.parser.parse_runs(b'aS\r\n bL \nzL\n')),
+                         [(bytes([0, 27, 51]), 12, 3)])
+        self.assertEqual(self.parser.line, 7)
+
+    def test_parse_runs_invalid(self) -> None:
+        for block in (b'aS\nAS\n', b'aS\naM\n', b'aS\n\n', b'aS\naSL\n'):
+            with self.subTest(block=block):
+                parser = PartParser()
+                with self.assertRaises(PartFormatError) as context:
+                    list(parser.parse_runs(block))
+                self.assertIn('on line 2', str(context.exception))
+                self.assertEqual(context.exception.codes, bytes([0]))
+
+    def test_parse_runs_runs(self) -> None:
+        self.assertEqual(list(self.parser.parse_runs(b'aS\n3bL\n 2aS \n')),
+                         [(bytes([0]), 3, 1), (PartRun(27, 3), 4, 1),
+                          (PartRun(0, 2), 6, 1)])
+        self.assertEqual(self.parser.line, 7)
+
+    def test_parse_runs_invalid_runs(self) -> None:
+        for block in (b'3aS\n0aS\n', b'3aS\n-1aS\n', b'3aS\n3AS\n',
+                      b'3aS\n3 aS\n', b'3aS\n3\n'):
+            with self.subTest(block=block):
+                parser = PartParser()
+                runs = parser.parse_runs(block)
+                self.assertEqual(next(runs), (PartRun(0, 3), 4, 1))
+                with self.assertRaises(PartFormatError) as context:
+                    next(runs)
+                self.assertIn('on line 2', str(context.exception))
+                self.assertEqual(context.exception.codes, b'')
+
+    def test_parse_block_or_raise(self) -> None:
+        blocks = self.parser.parse_block_or_raise(b'aS\n9bL\ncS\naM\n', 15)
+        self.assertEqual(next(blocks), bytes([0]))
+        self.assertEqual(next(blocks), PartRun(27, 9))
+        self.assertEqual(next(blocks), bytes([2]))
+        with self.assertRaisesRegex(PartFormatError, 'on line 7'):
+            next(blocks)
+        # The codes before the incorrect part are not past the position.
+        self.assertEqual((self.parser.offset, self.parser.offset_line),
+                         (7, 6))
+
+    # PartRun
+    def test_part_run(self) -> None:
+        run = PartRun(27, 3)
+        self.assertEqual(len(run), 3)
+        self.assertEqual(run, PartRun(27, 3))
+        self.assertNotEqual(run, PartRun(27, 4))
+
+    # line_parts
+    def test_line_parts(self) -> None:
+        self.assertEqual(line_parts(b'aS\n'), 1)
+        self.assertEqual(line_parts(b' 500aS\r\n'), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
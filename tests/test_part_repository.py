@@ -50,6 +50,16 @@ class TestPartRepository(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.part_repository.save('dLS')
 
+    # parse
+    def test_parse(self) -> None:
+        self.assertEqual(self.part_repository.parse('qL'), Part('q', 'L'))
+        self.assertIs(self.part_repository.parse('qL'),
+                      self.part_repository.parse('qL'))
+
+    def test_parse_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            self.part_repository.parse('QL')
+
     # add
     def test_add(self) -> None:
         self.part_repository.add(Part('a', 'L'), 12)
@@ -66,6 +76,13 @@ class TestPartRepository(unittest.TestCase):
         self.assertEqual(self.part_repository.total_per_size,
                          {'S': 0, 'L': 17})
 
+    def test_add_stock_slots(self) -> None:
+        self.part_repository.add(Part('c', 'S'), 4)
+        self.part_repository.add(Part('c', 'L'), 2)
+        self.assertEqual(self.part_repository.stock[2], 4)
+        self.assertEqual(self.part_repository.stock[28], 2)
+        self.assertEqual(sum(self.part_repository.stock), 6)
+
     def test_add_too_few(self) -> None:
         with self.assertRaises(ValueError):
             self.part_repository.add(Part('t', 'L'), 0)
@@ -188,7 +205,71 @@ class TestPartRepository(unittest.TestCase):
         ]
         self.assertEqual(result, expected)
 
+    # mark_in_design
+    def test_mark_in_design(self) -> None:
+        self.part_repository.save('aS')
+        self.part_repository.save('bS')
+        self.part_repository.mark_in_design(Part('a', 'S'))
+        self.part_repository.mark_in_design(Part('a', 'S'))
+        self.part_repository.mark_in_design(Part('c', 'S'))
+        self.part_repository.save('cS')
+        self.assertEqual(
+            self.part_repository.get_parts_without_design('S'),
+            [Part('b', 'S')]
+        )
+
+    # get_parts_without_design
+    def test_get_parts_without_design(self) -> None:
+        self.part_repository.save('dS')
+        self.part_repository.save('aL')
+        self.part_repository.save('bS')
+        self.part_repository.save('dS')
+        self.assertEqual(
+            self.part_repository.get_parts_without_design('S'),
+            [Part('d', 'S'), Part('b', 'S')]
+        )
+        self.part_repository.remove(Part('d', 'S'), 2)
+        self.part_repository.save('dS')
+        self.assertEqual(
+            self.part_repository.get_parts_without_design('S'),
+            [Part('b', 'S'), Part('d', 'S')]
+        )
+        self.assertEqual(
+            self.part_repository.get_parts_without_design('L'),
+            [Part('a', 'L')]
+        )
+
+    def test_get_parts_without_design_invalid_size(self) -> None:
+        with self.assertRaises(ValueError):
+            self.part_repository.get_parts_without_design('X')
+
+    # move_bucket
+    def test_move_bucket(self) -> None:
+        self.part_repository.add(Part('a', 'S'), 3)
+        self.part_repository.add(Part('b', 'S'), 3)
+        self.part_repository.add(Part('c', 'S'), 1)
+        self.assertEqual(self.part_repository.buckets['S'],
+                         {3: {0: None, 1: None}, 1: {2: None}})
+        self.assertEqual(self.part_repository.most_per_size['S'], 3)
+
+        self.part_repository.remove(Part('a', 'S'), 2)
+        self.part_repository.remove(Part('b', 'S'), 3)
+        self.assertEqual(self.part_repository.buckets['S'],
+                         {1: {2: None, 0: None}})
+        self.assertEqual(self.part_repository.most_per_size['S'], 1)
+
     # get_part_with_most_in_stock
+    def test_get_part_with_most_in_stock_tie(self) -> None:
+        self.part_repository.save('cS')
+        self.part_repository.save('bS')
+        self.part_repository.save('aS')
+        self.part_repository.save('aS')
+        self.part_repository.save('bS')
+        self.assertEqual(
+            self.part_repository.get_part_with_most_in_stock('S'),
+            Part('b', 'S')
+        )
+
     def test_get_part_with_most_in_stock(self) -> None:
         self.part_repository.save('dL')
         self.part_repository.save('eS')
@@ -233,6 +314,16 @@ class TestPartRepository(unittest.TestCase):
             Part('d', 'L')
         )
 
+    def test_get_part_with_most_in_stock_empty(self) -> None:
+        self.part_repository.save('aL')
+        with self.assertRaises(ValueError):
+            self.part_repository.get_part_with_most_in_stock('S')
+
+    def test_get_part_with_most_in_stock_invalid_size(self) -> None:
+        self.part_repository.save('aL')
+        with self.assertRaises(ValueError):
+            self.part_repository.get_part_with_most_in_stock('X')
+
 
 if __name__ == "__main__":
     unittest.main()
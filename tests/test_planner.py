@@ -0,0 +1,153 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+from furniturecreator import FurnitureCreator, planner
+from furniturecreator.dataclasses import CompiledDesign, PART_TYPES, \
+    SLOT_COUNT
+from furniturecreator.part_parser import PartRun
+from furniturecreator.planner import Arrivals, Planner, ScheduledProduct, \
+    count_stock, read_input, run_greedy
+
+# The greedy run creates X from the first two parts, leaving both b parts
+# unused; two Y use all parts.
+DESIGNS = b'[X]S2a2\n[Y]S1a1b2\n\n'
+PARTS = b'aS\naS\nbS\nbS\n'
+X = CompiledDesign('S', 2, ((0, 2),))
+Y = CompiledDesign('S', 2, ((0, 1), (1, 1)))
+
+
+def stock_of(**amounts: int) -> list:
+    stock = [0] * SLOT_COUNT
+    for part_type, amount in amounts.items():
+        stock[PART_TYPES.index(part_type)] = amount
+    return stock
+
+
+class TestPlanner(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.planner = Planner([X, Y])
+
+    def tearDown(self) -> None:
+        del self.planner
+
+    def fixture_input(self, parts: bytes = PARTS) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'input.txt')
+        with open(path, 'wb') as file:
+            file.write(DESIGNS + parts)
+        return path
+
+    def test_values_invalid(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'every design'):
+            Planner([X, Y], [1.0])
+
+    def test_fit(self) -> None:
+        capacity = self.planner.capacity(stock_of(a=5, b=2))
+        self.assertEqual(capacity[SLOT_COUNT:], [7, 0])
+        self.assertEqual(self.planner.fit(0, capacity), 2)
+        self.assertEqual(self.planner.fit(1, capacity), 2)
+        self.planner.use(1, 2, capacity)
+        self.assertEqual(capacity[:2], [3, 0])
+        self.assertEqual(self.planner.fit(0, capacity), 1)
+
+    # solve
+    def test_solve(self) -> None:
+        counts = self.planner.solve(stock_of(a=2, b=2), start=[1, 0],
+                                    iterations=10)
+        self.assertEqual(counts, [0, 2])
+        self.assertEqual(self.planner.value(counts), 2)
+
+    def test_solve_values(self) -> None:
+        planner = Planner([X, Y], [3.0, 1.0])
+        counts = planner.solve(stock_of(a=2, b=2), iterations=10)
+        self.assertEqual(counts, [1, 0])
+
+    def test_solve_start_over_stock(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'more parts than in stock'):
+            Planner([X, Y], [1.0, 5.0]).solve(stock_of(a=2), start=[0, 2])
+
+    # schedule
+    def test_schedule(self) -> None:
+        blocks = [b'\x00\x00\x01\x01']
+        self.assertEqual(self.planner.schedule([0, 2], blocks), [
+            ScheduledProduct(3, 1, {}),
+            ScheduledProduct(4, 1, {}),
+        ])
+
+    def test_schedule_extra_parts(self) -> None:
+        planner = Planner([CompiledDesign('S', 3, ((0, 1),))])
+        self.assertEqual(planner.schedule([1], [b'\x00\x02\x02\x00\x02']),
+                         [ScheduledProduct(3, 0, {2: 2})])
+
+    def test_schedule_over_stock(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'more parts than in the'):
+            self.planner.schedule([2, 0], [b'\x00\x00\x01\x01'])
+
+    def test_schedule_runs(self) -> None:
+        planner = Planner([X, Y, CompiledDesign('S', 4, ((2, 1),))])
+        blocks = [b'\x01', PartRun(0, 5), b'\x02\x01', PartRun(1, 3),
+                  b'\x00\x03']
+        expanded = [b'\x01' + b'\x00' * 5 + b'\x02\x01' + b'\x01' * 3
+                    + b'\x00\x03']
+        for counts in ([1, 3, 1], [3, 0, 1], [0, 5, 0]):
+            with self.subTest(counts=counts):
+                self.assertEqual(planner.schedule(counts, blocks),
+                                 planner.schedule(counts, expanded))
+
+    # Arrivals
+    def test_arrivals(self) -> None:
+        arrivals = Arrivals()
+        arrivals.add(2, 1)
+        arrivals.add(3, 4)
+        arrivals.add(10, 2)
+        self.assertEqual(len(arrivals), 7)
+        self.assertEqual(arrivals.starts, [2, 10])
+        self.assertEqual([arrivals.position(index) for index in range(7)],
+                         [2, 3, 4, 5, 6, 10, 11])
+        self.assertEqual([arrivals.count(position) for position in range(13)],
+                         [0, 0, 1, 2, 3, 4, 5, 5, 5, 5, 6, 7, 7])
+
+    # run_greedy / read_input / count_stock
+    def test_run_greedy(self) -> None:
+        app = FurnitureCreator()
+        blocks = read_input(app, self.fixture_input())
+        self.assertEqual(blocks, [b'\x00\x00\x01\x01'])
+        self.assertEqual(run_greedy(app, blocks), [1, 0])
+        self.assertEqual(app.parts_read, 4)
+        self.assertEqual(app.products_created, 1)
+
+    def test_run_greedy_runs(self) -> None:
+        app = FurnitureCreator()
+        blocks = read_input(app, self.fixture_input(b'2aS\nbS\n3bS\n'))
+        self.assertEqual(blocks, [PartRun(0, 2), b'\x01', PartRun(1, 3)])
+        self.assertEqual(count_stock(blocks), stock_of(a=2, b=4))
+        self.assertEqual(run_greedy(app, blocks), [1, 0])
+        self.assertEqual(app.parts_read, 6)
+
+    # main
+    def test_main(self) -> None:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            self.assertEqual(planner.main([
+                '--budget', '0.05', '--schedule', self.fixture_input()]), 0)
+        self.assertEqual(stdout.getvalue(),
+                         '3\t[Y]S1a1b\n4\t[Y]S1a1b\n')
+        self.assertIn('Greedy: 1 products, value 1', stderr.getvalue())
+        self.assertIn('Plan: 2 products, value 2 (+100.0%)',
+                      stderr.getvalue())
+
+    def test_main_error(self) -> None:
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            self.assertEqual(planner.main(['missing.txt']), 1)
+        self.assertIn('error', stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
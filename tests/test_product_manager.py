@@ -1,5 +1,6 @@
 from __future__ import annotations
 import unittest
+import random
 
 from furniturecreator.dataclasses import Part, Product, Design
 from furniturecreator.part_repository import PartRepository
@@ -35,6 +36,117 @@ class TestProductManager(unittest.TestCase):
         })
         self.assertEqual(self.manager.create_product(), expected)
 
+    def test_create_product_extra_parts(self) -> None:
+        self.manager.save_design('[Shelf]L1a6')
+        self.part_repository.add(Part('a', 'L'), 4)
+        self.part_repository.add(Part('b', 'L'), 2)
+
+        expected = Product('Shelf', 'L', {
+            Part('a', 'L'): 4,
+            Part('b', 'L'): 2
+        })
+        self.assertEqual(self.manager.create_product(), expected)
+        self.assertEqual(self.part_repository.sum_all_stock(), 0)
+
+    def test_create_product_not_rendering(self) -> None:
+        self.manager.save_design('[Shelf]L1a2')
+        self.part_repository.add(Part('a', 'L'), 2)
+        self.manager.rendering = False
+        product = self.manager.create_product()
+        self.assertEqual(product.rendered, '')
+        self.assertEqual(str(product), '[Shelf]L2a')
+
+    # create_all_products
+    def test_create_all_products(self) -> None:
+        self.manager.save_design('[Chair]S2a1b4')
+        self.manager.save_design('[Stool]S2a2')
+        self.part_repository.add(Part('a', 'S'), 10)
+        self.part_repository.add(Part('b', 'S'), 2)
+        # Designs take turns; the Chairs take an a as extra part.
+        self.assertEqual(
+            [str(product) for product in self.manager.create_all_products()],
+            ['[Chair]S3a1b', '[Stool]S2a', '[Chair]S3a1b', '[Stool]S2a'])
+        self.assertEqual(self.part_repository.sum_part_stock(Part('a', 'S')),
+                         0)
+        self.assertEqual(list(self.manager.create_all_products()), [])
+
+    def test_create_all_products_new_design(self) -> None:
+        self.manager.save_design('[Lamp]L1c1')
+        self.part_repository.add(Part('a', 'S'), 5)
+        self.assertEqual(list(self.manager.create_all_products()), [])
+        self.manager.save_design('[Stool]S2a2')
+        self.assertEqual(
+            [str(product) for product in self.manager.create_all_products()],
+            ['[Stool]S2a', '[Stool]S2a'])
+
+    def test_create_all_products_leaves_no_design_ready(self) -> None:
+        generator = random.Random(5)
+        for number in range(8):
+            self.manager.save_design(
+                f'[D{number}]{generator.choice("SL")}' + ''.join(
+                    f'{generator.randint(1, 5)}{part_type}'
+                    for part_type in generator.sample('abcd', 2))
+                + str(generator.randint(2, 16)))
+        for _ in range(500):
+            self.part_repository.add(
+                Part(generator.choice('abcdef'), generator.choice('SL')))
+        self.assertGreater(len(list(self.manager.create_all_products())), 20)
+        self.assertFalse(any(self.manager.enough_stock_for_design(design)
+                             for design in self.manager.design_repository))
+
+    # add_run
+    def test_add_run(self) -> None:
+        self.manager.save_design('[Chair]S2a1b4')
+        self.manager.save_design('[Stool]S3a3')
+        self.part_repository.add(Part('b', 'S'))
+        # Both designs can be created after the third part, the Chair is
+        # created first and takes the last part as extra part.
+        products = self.manager.add_run(Part('a', 'S'), 10)
+        self.assertEqual([str(product) for product in products],
+                         ['[Chair]S3a1b', '[Stool]S3a', '[Stool]S3a'])
+        self.assertEqual(self.part_repository.sum_part_stock(Part('a', 'S')),
+                         1)
+
+    def test_add_run_with_other_size_ready(self) -> None:
+        self.manager.save_design('[Lamp]L1c1')
+        self.manager.save_design('[Stool]S3a3')
+        self.part_repository.add(Part('c', 'L'))
+        # The Lamp is created after the first part of the run.
+        products = self.manager.add_run(Part('a', 'S'), 3)
+        self.assertEqual([str(product) for product in products],
+                         ['[Lamp]L1c', '[Stool]S3a'])
+
+    def test_add_run_matches_adding_parts(self) -> None:
+        generator = random.Random(3)
+        designs = [
+            f'[D{number}]{generator.choice("SL")}' + ''.join(
+                f'{generator.randint(1, 5)}{part_type}'
+                for part_type in generator.sample('abcd', 2))
+            + str(generator.randint(2, 16))
+            for number in range(6)
+        ]
+        runs = [(Part(generator.choice('abcdef'), generator.choice('SL')),
+                 generator.choice((1, 3, 20)))
+                for _ in range(300)]
+        outputs = []
+        for by_run in (False, True):
+            random.seed(1)
+            manager = ProductManager(PartRepository())
+            for design_str in designs:
+                manager.save_design(design_str)
+            output = []
+            for part, amount in runs:
+                if by_run:
+                    output.extend(map(str, manager.add_run(part, amount)))
+                    continue
+                for _ in range(amount):
+                    manager.part_repository.add(part)
+                    if product := manager.create_product():
+                        output.append(str(product))
+            outputs.append(output)
+        self.assertGreater(len(outputs[0]), 50)
+        self.assertEqual(outputs[1], outputs[0])
+
     # select_extra_part
     def test_select_extra_part(self) -> None:
         self.manager.save_design('[Bookcase]S1a1b1c4')
@@ -52,7 +164,24 @@ class TestProductManager(unittest.TestCase):
             Part('d', 'S')
         )
 
-    # select_design
+    # select_extra_parts
+    def test_select_extra_parts(self) -> None:
+        self.manager.save_design('[Bookcase]S1a1b1c4')
+        self.part_repository.add(Part('a', 'S'), 3)
+        self.part_repository.add(Part('b', 'S'), 5)
+        self.part_repository.add(Part('d', 'S'), 2)
+        self.part_repository.add(Part('e', 'S'), 2)
+        self.part_repository.add(Part('e', 'L'), 9)
+        self.assertEqual(
+            self.manager.select_extra_parts('S', 4),
+            {Part('d', 'S'): 2, Part('e', 'S'): 2}
+        )
+        self.assertEqual(
+            self.manager.select_extra_parts('S', 8),
+            {Part('d', 'S'): 2, Part('e', 'S'): 2,
+             Part('b', 'S'): 3, Part('a', 'S'): 1}
+        )
+
     def test_select_design(self) -> None:
         self.manager.save_design('[Chair]S1a1b1c4')
         self.part_repository.save('aS')
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import unittest
+
+from furniturecreator.dataclasses import Part, Design
+from furniturecreator.product_renderer import ProductRenderer
+
+
+class TestProductRenderer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.renderer = ProductRenderer(Design('Chair', 'L', {
+            Part('s', 'L'): 8,
+            Part('d', 'L'): 5,
+        }, 20))
+
+    def tearDown(self) -> None:
+        del self.renderer
+
+    def test_compile(self) -> None:
+        self.assertEqual(self.renderer.header, '[Chair]L')
+        self.assertEqual(list(self.renderer.amounts.items()),
+                         [(29, 5), (44, 8)])
+
+    # render
+    def test_render_without_extra_parts(self) -> None:
+        self.assertEqual(self.renderer.render({}), '[Chair]L5d8s')
+
+    def test_render_extra_parts(self) -> None:
+        result = self.renderer.render({
+            Part('y', 'L'): 1,
+            Part('d', 'L'): 3,
+            Part('a', 'L'): 3,
+        })
+        self.assertEqual(result, '[Chair]L3a8d8s1y')
+
+    def test_render_cached(self) -> None:
+        first = self.renderer.render({Part('b', 'L'): 2, Part('c', 'L'): 5})
+        second = self.renderer.render({Part('c', 'L'): 5, Part('b', 'L'): 2})
+        self.assertIs(first, second)
+        self.assertEqual(len(self.renderer.cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
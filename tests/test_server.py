@@ -0,0 +1,124 @@
+from __future__ import annotations
+import unittest
+import asyncio
+import os
+import tempfile
+
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.product_manager import ProductManager
+from furniturecreator.server import FacilityServer, LINE_TOO_LONG, \
+    MAX_LINE, load_designs
+
+
+class TestFacilityServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.manager = ProductManager(PartRepository())
+        self.manager.save_design('[Stool]S2a1b3')
+        self.manager.save_design('[Lamp]L1c1')
+        self.server = FacilityServer(self.manager, subscriber_queue_size=2)
+        self.listener = await self.server.start_tcp('127.0.0.1', 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self) -> None:
+        self.listener.close()
+        await self.listener.wait_closed()
+        await self.server.stop()
+
+    async def subscribe(self) -> asyncio.StreamReader:
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.addCleanup(writer.close)
+        writer.write(b'SUBSCRIBE\n')
+        await writer.drain()
+        while not self.server.subscribers:
+            await asyncio.sleep(0.01)
+        return reader
+
+    async def feed(self, data: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(data)
+        writer.write_eof()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def test_feeds_and_subscriber(self) -> None:
+        subscriber = await self.subscribe()
+        await self.feed(b'aS\ncL\naS\n')
+        await self.feed(b'bS')
+        self.assertEqual(await subscriber.readline(), b'[Lamp]L1c\n')
+        self.assertEqual(await subscriber.readline(), b'[Stool]S2a1b\n')
+
+    async def test_feed_runs(self) -> None:
+        subscriber = await self.subscribe()
+        await self.feed(b'cL\n1000000000000aS\nbS\n')
+        self.assertEqual(await subscriber.readline(), b'[Lamp]L1c\n')
+        self.assertEqual(await subscriber.readline(), b'[Stool]S2a1b\n')
+        await self.server.queue.join()
+        self.assertEqual(self.manager.part_repository.sum_all_stock(),
+                         10 ** 12 - 2)
+
+    async def test_feed_error(self) -> None:
+        response = await self.feed(b'cL\ncX\ncL\n')
+        self.assertEqual(
+            response, b"ERROR Incorrect part format ('cX') on line 2.\n")
+        await self.server.queue.join()
+        self.assertEqual(self.manager.part_repository.sum_all_stock(), 0)
+
+    async def test_feed_line_too_long(self) -> None:
+        response = await self.feed(b'aS\n' + b'1' * (MAX_LINE + 1))
+        self.assertEqual(response, LINE_TOO_LONG)
+        await self.server.queue.join()
+        self.assertEqual(self.manager.part_repository.sum_all_stock(), 1)
+
+    async def test_first_line_too_long(self) -> None:
+        response = await self.feed(b'1' * (MAX_LINE + 1) + b'aS\n')
+        self.assertEqual(response, LINE_TOO_LONG)
+
+    async def test_feed_long_lines(self) -> None:
+        # Lines up to the limit are accepted across reads.
+        line = b' ' * (MAX_LINE - 3) + b'aS\n'
+        self.assertEqual(await self.feed(b'aS\n' + line * 3), b'')
+        await self.server.queue.join()
+        self.assertEqual(self.manager.part_repository.sum_all_stock(), 4)
+
+    async def test_slow_subscriber_disconnected(self) -> None:
+        subscriber = await self.subscribe()
+        self.server.broadcast(b'[Lamp]L1c\n')
+        self.server.broadcast(b'[Lamp]L1c\n')
+        self.assertEqual(len(self.server.subscribers), 1)
+        self.server.broadcast(b'[Lamp]L1c\n')
+        self.assertEqual(len(self.server.subscribers), 0)
+        self.assertEqual(await subscriber.read(), b'')
+
+    async def test_engine_error(self) -> None:
+        def select_design_id() -> None:
+            raise RuntimeError('Out of glue')
+        self.manager.select_design_id = select_design_id  # type: ignore
+        subscriber = await self.subscribe()
+        # The feed stays connected, so it is waiting for more parts when
+        # the engine fails.
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.addCleanup(writer.close)
+        writer.write(b'aS\naS\n')
+        await writer.drain()
+        self.assertEqual(await asyncio.wait_for(reader.read(), 10),
+                         b'ERROR Engine stopped: Out of glue\n')
+        self.assertEqual(await subscriber.read(), b'')
+        self.assertEqual(await self.feed(b'aS\n'),
+                         b'ERROR Engine stopped: Out of glue\n')
+
+
+class TestLoadDesigns(unittest.TestCase):
+
+    def test_load_designs(self) -> None:
+        with tempfile.NamedTemporaryFile('w', delete=False) as file:
+            file.write('[Stool]S2a1b3\n[Lamp]L1c1\n\naS\n')
+        self.addCleanup(os.remove, file.name)
+        manager = ProductManager(PartRepository())
+        load_designs(manager, file.name)
+        self.assertEqual(len(manager.design_repository.designs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import unittest
+import tempfile
+from multiprocessing.shared_memory import SharedMemory
+
+from furniturecreator.catalog_cache import CatalogCache, catalog_key
+from furniturecreator.dataclasses import Part
+from furniturecreator.design_repository import DesignRepository
+from furniturecreator.part_repository import PartRepository
+from furniturecreator.product_manager import ProductManager
+from furniturecreator.shared_catalog import SharedCatalog, SharedCatalogs, \
+                                           SharedDesigns, catalog_to_block
+
+DESIGN_STRS = ['[Stool]S1c3b3a10', '[Lamp]L1a1z2', '[Chair]S2b4']
+
+
+class TestSharedCatalog(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.catalogs = SharedCatalogs()
+        self.addCleanup(self.catalogs.close)
+        self.repository = DesignRepository()
+        for design_str in DESIGN_STRS:
+            self.repository.save(design_str)
+
+    def tearDown(self) -> None:
+        del self.repository
+
+    # SharedCatalogs
+    def test_share(self) -> None:
+        name = self.catalogs.share(DESIGN_STRS)
+        self.assertEqual(self.catalogs.share(list(DESIGN_STRS)), name)
+        self.assertNotEqual(self.catalogs.share(DESIGN_STRS[:1]), name)
+        self.assertEqual(len(self.catalogs.blocks), 2)
+
+    def test_share_invalid(self) -> None:
+        self.assertEqual(self.catalogs.share(['[Stool]X1a1']), '')
+        self.assertEqual(self.catalogs.share([f'[Stool]S{2 ** 64}a1']), '')
+        self.assertEqual(self.catalogs.blocks, {})
+
+    def test_share_catalog_cache(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = CatalogCache(directory.name)
+        for _ in range(2):
+            with SharedCatalogs(cache) as catalogs:
+                catalog = SharedCatalog(catalogs.share(DESIGN_STRS))
+                designs = catalog.load(catalog_key(DESIGN_STRS))
+                self.assertEqual(list(designs.catalog),
+                                 self.repository.catalog)
+                catalog.close()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_close(self) -> None:
+        name = self.catalogs.share(DESIGN_STRS)
+        self.catalogs.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name)
+
+    # SharedDesigns
+    def test_shared_designs(self) -> None:
+        designs = SharedDesigns(memoryview(
+            catalog_to_block(b'k' * 16, self.repository)))
+        self.addCleanup(designs.release)
+        self.assertEqual(designs.key, b'k' * 16)
+        self.assertEqual(len(designs), 3)
+        self.assertEqual(list(designs.catalog), self.repository.catalog)
+        self.assertEqual(list(designs.compiled), self.repository.compiled)
+        self.assertEqual(list(designs.design_names),
+                         ['Stool', 'Lamp', 'Chair'])
+        self.assertEqual(list(designs.sizes), ['S', 'L', 'S'])
+        self.assertEqual(list(designs.totals), [10, 2, 4])
+        self.assertEqual(designs.catalog[-1], self.repository.catalog[2])
+        self.assertEqual(designs.catalog[1:], self.repository.catalog[1:])
+        with self.assertRaises(IndexError):
+            designs.compiled[3]
+        self.assertIs(designs.catalog[0], designs.catalog[0])
+        self.assertIs(designs.compiled[0], designs.compiled[0])
+        self.assertIs(designs.renderers[0], designs.renderers[0])
+        self.assertEqual(designs.renderers[0].render({Part('d', 'S'): 2}),
+                         '[Stool]S3a3b1c2d')
+
+    def test_shared_designs_invalid(self) -> None:
+        block = catalog_to_block(b'k' * 16, self.repository)
+        for data in (b'FCDC' + block[4:], block[:-1]):
+            with self.assertRaises(ValueError):
+                SharedDesigns(memoryview(data))
+
+    # SharedCatalog
+    def test_load(self) -> None:
+        catalog = SharedCatalog(self.catalogs.share(DESIGN_STRS))
+        self.addCleanup(catalog.close)
+        designs = catalog.load(catalog_key(DESIGN_STRS))
+        self.assertEqual(list(designs.catalog), self.repository.catalog)
+        self.assertIsNone(catalog.load(catalog_key(DESIGN_STRS[:1])))
+        self.assertIsNone(SharedCatalog('fc-missing').load(b''))
+        self.assertEqual((catalog.hits, catalog.misses), (1, 1))
+
+    def test_save_designs(self) -> None:
+        catalog = SharedCatalog(self.catalogs.share(DESIGN_STRS))
+        self.addCleanup(catalog.close)
+        for design_strs in (DESIGN_STRS, DESIGN_STRS[::-1]):
+            repository = DesignRepository()
+            catalog.save_designs(repository, design_strs)
+            self.assertEqual(
+                [str(design) for design in repository.catalog],
+                [str(repository.parse_design(design_str))
+                 for design_str in design_strs])
+        self.assertEqual((catalog.hits, catalog.misses), (1, 1))
+
+    def test_save_designs_shares_views(self) -> None:
+        catalog = SharedCatalog(self.catalogs.share(DESIGN_STRS))
+        self.addCleanup(catalog.close)
+        repository = DesignRepository('weighted', {'Lamp': 2.0})
+        catalog.save_designs(repository, DESIGN_STRS)
+        self.assertIs(repository.shared, catalog.designs)
+        self.assertEqual(repository.scheduler.weights, [1.0, 2.0, 1.0])
+        self.assertEqual(repository.get_parts_in_designs(),
+                         set(self.repository.get_parts_in_designs()))
+        with self.assertRaises(ValueError):
+            repository.save('[Table]S1a1')
+        with self.assertRaises(ValueError):
+            repository.share(catalog.designs)
+
+    def test_products_from_shared_catalog(self) -> None:
+        catalog = SharedCatalog(self.catalogs.share(DESIGN_STRS))
+        self.addCleanup(catalog.close)
+        outputs = []
+        for shared in (False, True):
+            manager = ProductManager(PartRepository())
+            if shared:
+                catalog.save_designs(manager.design_repository, DESIGN_STRS)
+            else:
+                for design_str in DESIGN_STRS:
+                    manager.save_design(design_str)
+            output = []
+            for code in 'abczabcdabzzzbcbaacb':
+                for size in 'SL':
+                    manager.part_repository.save(code + size)
+                    if product := manager.create_product():
+                        output.append(product.rendered)
+            outputs.append(output)
+        self.assertIs(manager.design_tracker.totals, catalog.designs.totals)
+        self.assertGreater(len(outputs[0]), 5)
+        self.assertEqual(outputs[1], outputs[0])
+
+    def test_close_releases_views(self) -> None:
+        catalog = SharedCatalog(self.catalogs.share(DESIGN_STRS))
+        designs = catalog.load(catalog_key(DESIGN_STRS))
+        catalog.close()
+        self.assertIsNone(catalog.memory)
+        with self.assertRaises(ValueError):
+            designs.totals[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
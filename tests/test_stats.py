@@ -0,0 +1,66 @@
+from __future__ import annotations
+import unittest
+import io
+import os
+import tempfile
+
+from furniturecreator import FurnitureCreator
+from furniturecreator.output_writer import OutputWriter
+from furniturecreator.stats import Stats
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self) -> None:
+        with tempfile.NamedTemporaryFile('w', delete=False) as file:
+            file.write('[Stool]S1a3\n[Lamp]L1c1\n\n'
+                       'aS\ncL\naS\nbS\naS\nzL\n')
+        self.addCleanup(os.remove, file.name)
+        self.output = io.BytesIO()
+        self.app = FurnitureCreator(input_path=file.name,
+                                    output=OutputWriter(self.output))
+        self.stats = Stats()
+
+    def tearDown(self) -> None:
+        del self.app
+
+    # instrument
+    def test_instrument(self) -> None:
+        self.stats.instrument(self.app)
+        self.app.main()
+        self.assertEqual(self.output.getvalue(),
+                         b'[Lamp]L1c\n[Stool]S2a1b\n')
+        self.assertEqual(self.stats.products, {'[Lamp]L': 1, '[Stool]S': 1})
+        self.assertEqual(self.stats.counters['extra parts without design'],
+                         1)
+        self.assertEqual(self.stats.counters['extra parts most in stock'], 1)
+        # Designs are tracked from the first selection, after the first aS.
+        # The cL, the Lamp, the Stool and the last aS then each cross the
+        # requirement of one design.
+        self.assertEqual(self.stats.counters['design checks'], 4)
+        self.assertGreater(self.stats.counters['heap pops'], 0)
+        self.assertEqual(set(self.stats.timings),
+                         {'parse', 'stock', 'create', 'select', 'filler',
+                          'output'})
+
+    def test_not_instrumented(self) -> None:
+        self.app.main()
+        self.assertNotIn('write', self.app.output.__dict__)
+        self.assertNotIn('add', self.app.part_repository.__dict__)
+        self.assertNotIn('create_product',
+                         self.app.product_manager.__dict__)
+        self.assertIsNone(self.app.product_manager.design_tracker.counters)
+
+    # report
+    def test_report(self) -> None:
+        self.stats.instrument(self.app)
+        self.app.main()
+        report = self.stats.report()
+        self.assertIn('Parts processed: 6\n', report)
+        self.assertIn('Products created: 2\n', report)
+        self.assertIn('  [Lamp]L: 1\n', report)
+        self.assertIn('    select design: ', report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,9 @@ import unittest
 
 from furniturecreator.dataclasses import Part
 from furniturecreator.utilities import filter_parts_list_by_size, \
-                                       filter_parts_dict_by_size
+                                       filter_parts_dict_by_size, \
+                                       spread_parts_evenly, \
+                                       take_parts_most_in_stock
 
 
 class TestFurnitureCreatorUtilities(unittest.TestCase):
@@ -44,6 +46,42 @@ class TestFurnitureCreatorUtilities(unittest.TestCase):
         with self.assertRaises(ValueError):
             filter_parts_dict_by_size({}, 'X')
 
+    # spread_parts_evenly
+    def test_spread_parts_evenly(self) -> None:
+        input = {Part('a', 'S'): 2, Part('b', 'S'): 9, Part('c', 'S'): 6}
+        expected = {Part('a', 'S'): 2, Part('b', 'S'): 5, Part('c', 'S'): 5}
+        self.assertEqual(spread_parts_evenly(input, 12), expected)
+
+    def test_spread_parts_evenly_remainder(self) -> None:
+        input = {Part('a', 'S'): 1, Part('b', 'S'): 9, Part('c', 'S'): 6}
+        result = spread_parts_evenly(input, 8)
+        self.assertEqual(result[Part('a', 'S')], 1)
+        self.assertEqual(
+            sorted([result[Part('b', 'S')], result[Part('c', 'S')]]), [3, 4])
+
+    def test_spread_parts_evenly_too_many(self) -> None:
+        with self.assertRaises(ValueError):
+            spread_parts_evenly({Part('a', 'S'): 1}, 2)
+
+    # take_parts_most_in_stock
+    def test_take_parts_most_in_stock(self) -> None:
+        input = {Part('a', 'L'): 3, Part('b', 'L'): 9, Part('c', 'L'): 6}
+        expected = {Part('b', 'L'): 5, Part('c', 'L'): 2}
+        self.assertEqual(take_parts_most_in_stock(input, 7), expected)
+
+    def test_take_parts_most_in_stock_tie(self) -> None:
+        input = {Part('c', 'L'): 4, Part('b', 'L'): 4, Part('a', 'L'): 4}
+        expected = {Part('c', 'L'): 2, Part('b', 'L'): 1, Part('a', 'L'): 1}
+        self.assertEqual(take_parts_most_in_stock(input, 4), expected)
+
+    def test_take_parts_most_in_stock_all(self) -> None:
+        input = {Part('a', 'L'): 3, Part('b', 'L'): 1}
+        self.assertEqual(take_parts_most_in_stock(input, 4), input)
+
+    def test_take_parts_most_in_stock_too_many(self) -> None:
+        with self.assertRaises(ValueError):
+            take_parts_most_in_stock({Part('a', 'S'): 1}, 2)
+
 
 if __name__ == "__main__":
     unittest.main()